@@ -25,9 +25,17 @@ CREATE TABLE IF NOT EXISTS cache_data (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     data_type VARCHAR(50) NOT NULL,
     compressed BOOLEAN DEFAULT FALSE,
-    data_size INTEGER DEFAULT 0
+    data_size INTEGER DEFAULT 0,
+    content_hash VARCHAR(64),
+    tags TEXT[] DEFAULT '{}'
 );
 
+-- Migração para instalações existentes: hash do conteúdo usado na revalidação
+-- (o app consulta apenas expires_at/updated_at/content_hash antes de baixar data)
+ALTER TABLE cache_data ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+-- Tags de invalidação em lote (ex.: 'services_catalogue')
+ALTER TABLE cache_data ADD COLUMN IF NOT EXISTS tags TEXT[] DEFAULT '{}';
+
 -- =====================================================
 -- 2. CRIAR TABELA DE STATUS DE SINCRONIZAÇÃO
 -- =====================================================
@@ -44,6 +52,13 @@ CREATE TABLE IF NOT EXISTS sync_status (
     processing_time_ms INTEGER DEFAULT 0
 );
 
+-- Leases de atualização: apenas uma instância recarrega cada conjunto de dados da API Omie
+CREATE TABLE IF NOT EXISTS cache_leases (
+    name VARCHAR(100) PRIMARY KEY,
+    owner VARCHAR(255) NOT NULL,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
 -- =====================================================
 -- 3. CRIAR ÍNDICES PARA PERFORMANCE
 -- =====================================================
@@ -54,6 +69,7 @@ CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache_data(expires_at);
 CREATE INDEX IF NOT EXISTS idx_cache_data_type ON cache_data(data_type);
 CREATE INDEX IF NOT EXISTS idx_cache_created_at ON cache_data(created_at);
 CREATE INDEX IF NOT EXISTS idx_cache_data_type_expires ON cache_data(data_type, expires_at);
+CREATE INDEX IF NOT EXISTS idx_cache_tags ON cache_data USING GIN (tags);
 
 -- Índices para sync_status
 CREATE INDEX IF NOT EXISTS idx_sync_data_type ON sync_status(data_type);
@@ -157,6 +173,7 @@ CREATE TRIGGER update_cache_data_updated_at
 -- Habilitar RLS nas tabelas
 ALTER TABLE cache_data ENABLE ROW LEVEL SECURITY;
 ALTER TABLE sync_status ENABLE ROW LEVEL SECURITY;
+ALTER TABLE cache_leases ENABLE ROW LEVEL SECURITY;
 
 -- Políticas para cache_data (acesso total para service role)
 CREATE POLICY "Enable all operations for service role" ON cache_data
@@ -166,6 +183,10 @@ CREATE POLICY "Enable all operations for service role" ON cache_data
 CREATE POLICY "Enable all operations for service role" ON sync_status
     FOR ALL USING (true);
 
+-- Políticas para cache_leases (acesso total para service role)
+CREATE POLICY "Enable all operations for service role" ON cache_leases
+    FOR ALL USING (true);
+
 -- =====================================================
 -- 7. CRIAR VIEWS ÚTEIS
 -- =====================================================
@@ -280,11 +301,14 @@ END $;
 📋 TABELAS CRIADAS:
 - cache_data: Armazena dados em cache com compressão
 - sync_status: Controla status de sincronização
+- cache_leases: Leases de atualização entre instâncias
 
 🔧 FUNCIONALIDADES:
 - Cache com TTL configurável por tipo de dados
 - Compressão automática para dados grandes
 - Limpeza automática de dados expirados
+- Revalidação barata por content_hash (sem baixar o payload)
+- Invalidação em lote por padrão de chave, tipo ou tags (um único DELETE)
 - Estatísticas detalhadas de uso
 - Controle de sincronização
 
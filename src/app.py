@@ -1,16 +1,31 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
-from flask_session import Session
-from services.omie_service import OmieService
-from services.auth_service import AuthService
-from services.background_service import background_service
-from services.startup_service import initialize_startup_service
-from services.cache_service import SupabaseCacheService
-from services.progressive_loader import ProgressiveDataLoader
-from services.api_endpoints import optimized_api, initialize_services
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, Response, stream_with_context, get_template_attribute
+from werkzeug.local import LocalProxy
+from services.service_registry import service_registry, boot_report
+from services.background_service import background_service, PRIORITY_USER
+from services.api_endpoints import optimized_api
+from services.async_runtime import run_sync
+from services.memory_cache import memory_cache
+from services.invalidation import invalidation_bus
+from services.refresh_lock import refresh_coordinator
+from services.progress_events import progress_events
+from services.service_filters import filter_orders, iter_filtered_orders, sort_orders_by_date
+from services.order_export import export_row, iter_csv, iter_ndjson
+from services.display import format_cpf_cnpj, format_phone, format_date, format_currency
+from services.services_dashboard import (parse_service_filters, has_active_filters, load_filtered_orders,
+                                         build_pagination, build_stats, build_period_stats, filter_labels,
+                                         load_filter_options)
 from utils.auth_decorators import login_required, logout_required
+from utils.json_stream import stream_json_response, wants_stream, JsonArray, JsonObject, Counter, paginate_iter
+from utils.http_cache import snapshot_etag
+from utils.fragment_cache import fragment_cache
+from utils.session_store import configure_sessions
+from utils.json_provider import FastJSONProvider
+from utils.compression import configure_compression, response_compressor
 import json
 import os
-import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -18,71 +33,43 @@ from dotenv import load_dotenv
 load_dotenv()
 
 app = Flask(__name__)
-app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')  # Em produção, use uma chave mais segura
-
-# Configurar sessões
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_PERMANENT'] = False
-Session(app)
+app.json = FastJSONProvider(app)
+app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')  # Sem SECRET_KEY real, as sessões não usam cookie (ver configure_sessions)
 
-# Inicializar serviços otimizados
-print("🚀 Inicializando serviços otimizados...")
+# Configurar sessões (SESSION_BACKEND: cookie, sqlite ou filesystem)
+print(f"🔐 Sessões usando: {configure_sessions(app)}")
 
-# Inicializar cache inteligente
-cache_service = None
-try:
-    cache_service = SupabaseCacheService()
-    print("✅ Cache inteligente inicializado com sucesso")
-except Exception as e:
-    print(f"⚠️  Aviso: Cache inteligente não disponível: {e}")
-    print("   A aplicação continuará funcionando com cache local apenas.")
+# Comprimir respostas (gzip/brotli conforme Accept-Encoding)
+print(f"🗜️  Compressão de respostas: {configure_compression(app)}")
 
-# Inicializar serviço Omie
-omie_service = OmieService()
+# Serviços criados no primeiro uso (importar o app não abre conexões nem inicia threads)
+cache_service = LocalProxy(lambda: service_registry.cache_service)
+omie_service = LocalProxy(lambda: service_registry.omie_service)
+progressive_loader = LocalProxy(lambda: service_registry.progressive_loader)
+startup_service = LocalProxy(lambda: service_registry.startup_service)
+auth_service = LocalProxy(lambda: service_registry.auth_service)
 
-# Configurar cache inteligente no OmieService se disponível
-if cache_service:
-    try:
-        # Adicionar método para integração com cache inteligente
-        omie_service.intelligent_cache = cache_service
-        print("✅ Cache inteligente integrado ao OmieService")
-    except Exception as e:
-        print(f"⚠️  Erro ao integrar cache: {e}")
+# Endpoints otimizados (/api/v2): os serviços são ligados quando o OmieService é criado
+app.register_blueprint(optimized_api)
 
-# Inicializar carregador progressivo
-progressive_loader = None
-if cache_service:
-    try:
-        progressive_loader = ProgressiveDataLoader(omie_service, cache_service)
-        print("✅ Carregador progressivo inicializado")
-    except Exception as e:
-        print(f"⚠️  Erro ao inicializar carregador progressivo: {e}")
+# Sondas de saúde respondem só com estado em memória (sem E/S nem autenticação)
+HEALTH_ENDPOINTS = frozenset({'healthz', 'readyz'})
 
-# Inicializar endpoints otimizados
-if cache_service:
+@app.before_request
+def poll_cache_invalidations():
+    """Aplica invalidações de cache publicadas por outros workers (no máximo uma verificação por intervalo)"""
+    if request.endpoint in HEALTH_ENDPOINTS:
+        return
     try:
-        initialize_services(omie_service, cache_service)
-        app.register_blueprint(optimized_api)
-        print("✅ Endpoints otimizados registrados")
+        invalidation_bus.poll()
     except Exception as e:
-        print(f"⚠️  Erro ao registrar endpoints otimizados: {e}")
-
-# Inicializar serviço de startup para pré-carregamento
-startup_service = initialize_startup_service(omie_service)
-
-# Inicializar serviço de autenticação com tratamento de erro
-auth_service = None
-try:
-    auth_service = AuthService()
-    print("✅ Serviço de autenticação inicializado com sucesso")
-except Exception as e:
-    print(f"⚠️  Aviso: Não foi possível inicializar o serviço de autenticação: {e}")
-    print("   Verifique se as variáveis SUPABASE_URL e SUPABASE_KEY estão configuradas corretamente no arquivo .env")
-    print("   A aplicação continuará funcionando, mas sem autenticação.")
+        print(f"⚠️  Erro ao verificar invalidações de cache: {e}")
 
-# Iniciar pré-carregamento de dados
-print("🚀 Iniciando pré-carregamento de dados...")
-startup_service.start_preload()
+@app.before_request
+def resume_background_work():
+    """Retoma o pré-carregamento e o agendador em workers criados por fork (gunicorn --preload)"""
+    if service_registry.is_initialized('startup_service'):
+        startup_service.ensure_running()
 
 @app.context_processor
 def inject_current_year():
@@ -150,6 +137,8 @@ def login():
 def logout():
     """Logout do usuário"""
     user_name = session.get('user_name', 'Usuário')
+    if auth_service and 'user_id' in session:
+        auth_service.invalidate_user(session['user_id'])
     session.clear()
     flash(f'Até logo, {user_name}!', 'success')
     return redirect(url_for('login'))
@@ -162,21 +151,19 @@ def index():
         # Carregar estatísticas básicas do cache primeiro
         stats = None
         
-        # Tentar carregar do cache inteligente se disponível
+        # Tentar carregar do cache inteligente se disponível (uma única ida ao cache)
         if cache_service:
             try:
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    cache_key = "dashboard_basic_stats"
-                    stats = loop.run_until_complete(
-                        cache_service.get(cache_key, "dashboard")
-                    )
-                    if stats:
-                        print(f"Dashboard stats carregadas do cache inteligente")
-                finally:
-                    loop.close()
+                cache_key = "dashboard_basic_stats"
+                clients_stats_key = omie_service._get_cache_key("get_clients_stats")
+                cached = cache_service.get_many_sync([cache_key, clients_stats_key], "dashboard")
+                stats = cached.get(cache_key)
+                if stats:
+                    print(f"Dashboard stats carregadas do cache inteligente")
+                elif cached.get(clients_stats_key):
+                    stats = cached[clients_stats_key]
+                    cache_service.set_sync(cache_key, stats, "dashboard", 0.5)  # 30 minutos
+                    print(f"Dashboard stats reconstruídas a partir das estatísticas de clientes em cache")
             except Exception as cache_error:
                 print(f"Erro ao acessar cache para dashboard: {cache_error}")
         
@@ -190,17 +177,8 @@ def index():
                 # Salvar no cache inteligente para próximas consultas
                 if cache_service and stats:
                     try:
-                        import asyncio
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-                        try:
-                            cache_key = "dashboard_basic_stats"
-                            loop.run_until_complete(
-                                cache_service.set(cache_key, stats, "dashboard", 0.5)  # 30 minutos
-                            )
-                            print("Dashboard stats salvas no cache inteligente")
-                        finally:
-                            loop.close()
+                        cache_service.set_sync("dashboard_basic_stats", stats, "dashboard", 0.5)  # 30 minutos
+                        print("Dashboard stats salvas no cache inteligente")
                     except Exception as cache_error:
                         print(f"Erro ao salvar stats no cache: {cache_error}")
                         
@@ -287,319 +265,148 @@ def notaz():
 
 @app.route('/services')
 @login_required
+@snapshot_etag()
 def services():
-    """Dashboard de Serviços"""
+    """
+    Dashboard de Serviços (shell)
+    
+    A página é renderizada apenas com os filtros da URL; opções de filtro,
+    estatísticas e ordens chegam em paralelo pelos fragmentos em
+    /services/fragments/*, cada um com seu próprio ETag.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
-        search = request.args.get('search', '', type=str)
-        service_filter = request.args.get('service', '', type=str)
-        month_filter = request.args.get('month', '', type=str)
-        week_filter = request.args.get('week', '', type=str)
-        year_filter = request.args.get('year', '', type=str)
-        per_page = 20
-        
-        # Se não há nenhum filtro aplicado, usar o ano atual como padrão
-        current_year = str(datetime.now().year)
-        if not search and not month_filter and not week_filter and not year_filter:
-            year_filter = current_year
-            print(f"Aplicando filtro padrão para o ano atual: {year_filter}")
-        
-        # Verificar se há dados em cache primeiro
-        print(f"Buscando ordens de serviço - página {page}, busca: '{search}', ano: '{year_filter}', mês: '{month_filter}', semana: '{week_filter}'")
-        
-        # Tentar buscar do cache primeiro (com tempo de vida estendido para serviços)
-        cache_key = omie_service._get_cache_key("get_all_service_orders", max_pages=None)
-        cached_orders = omie_service._get_from_cache(cache_key, use_service_expiry=True)
-        
-        if cached_orders is not None:
-            print(f"Dados carregados do cache: {len(cached_orders)} ordens")
-            all_orders = cached_orders
-        else:
-            print("Cache vazio, carregando dados da API...")
-            # Se não há cache, carregar com estratégia otimizada
-            all_orders = omie_service.get_all_service_orders()
-            print(f"Total de ordens carregadas da API: {len(all_orders)}")
-        
-        # Manter apenas ordens de serviço faturadas
-        all_orders = [o for o in all_orders if o.get('Cabecalho', {}).get('cEtapa') == '60']
-
-        # Buscar mapeamento de clientes (código -> nome)
-        print("Buscando mapeamento de nomes de clientes...")
-        try:
-            client_name_mapping = omie_service.get_client_name_mapping()
-        except Exception as e:
-            print(f"Erro ao carregar mapeamento de clientes: {str(e)}")
-            client_name_mapping = {}
-        
-        # Buscar mapeamento de vendedores (código -> nome)
-        print("Buscando mapeamento de nomes de vendedores...")
-        try:
-            seller_name_mapping = omie_service.get_seller_name_mapping()
-        except Exception as e:
-            print(f"Erro ao carregar mapeamento de vendedores: {str(e)}")
-            seller_name_mapping = {}
+        filters = parse_service_filters(request.args)
+        return render_template('services.html',
+                             filters_active=has_active_filters(filters),
+                             search=filters['search'],
+                             service_filter=filters['service_filter'],
+                             year_filter=filters['year_filter'],
+                             month_filter=filters['month_filter'],
+                             week_filter=filters['week_filter'])
+    except Exception as e:
+        return render_template('error.html', error=str(e))
 
-        # Lista dinâmica de serviços disponíveis
-        print("Buscando lista de serviços disponíveis...")
-        try:
-            service_name_mapping = omie_service.get_service_name_mapping()
-            available_services = sorted(service_name_mapping.values())
-        except Exception as e:
-            print(f"Erro ao carregar serviços disponíveis: {str(e)}")
-            available_services = []
-        
-        # Filtrar por ano se especificado (tem prioridade sobre semana e mês)
-        if year_filter:
-            filtered_orders = []
-            for order in all_orders:
-                cabecalho = order.get('Cabecalho', {})
-                date_str = cabecalho.get('dDtPrevisao', '')
-                if date_str:
-                    try:
-                        # Extrair ano da data (formato dd/mm/yyyy)
-                        year = date_str.split("/")[2]  # yyyy
-                        if year == year_filter:
-                            filtered_orders.append(order)
-                    except:
-                        pass
-            all_orders = filtered_orders
-        # Filtrar por semana se especificado (tem prioridade sobre mês, mas não sobre ano)
-        elif week_filter:
-            try:
-                # Extrair datas de início e fim da semana
-                start_date_str, end_date_str = week_filter.split("_")
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-                
-                filtered_orders = []
-                for order in all_orders:
-                    cabecalho = order.get('Cabecalho', {})
-                    date_str = cabecalho.get('dDtPrevisao', '')
-                    if date_str:
-                        try:
-                            # Converter data dd/mm/yyyy para datetime
-                            day, month, year = date_str.split("/")
-                            order_date = datetime(int(year), int(month), int(day))
-                            
-                            # Verificar se a data está dentro da semana
-                            if start_date <= order_date <= end_date:
-                                filtered_orders.append(order)
-                        except:
-                            pass
-                all_orders = filtered_orders
-            except Exception as e:
-                print(f"Erro ao filtrar por semana: {str(e)}")
-        # Filtrar por mês se especificado (apenas se não há filtro de ano ou semana)
-        elif month_filter:
-            filtered_orders = []
-            for order in all_orders:
-                cabecalho = order.get('Cabecalho', {})
-                date_str = cabecalho.get('dDtPrevisao', '')
-                if date_str:
-                    try:
-                        # Extrair mês/ano da data (formato dd/mm/yyyy)
-                        month_year = "/".join(date_str.split("/")[1:])  # mm/yyyy
-                        if month_year == month_filter:
-                            filtered_orders.append(order)
-                    except:
-                        pass
-            all_orders = filtered_orders
-        
-        # Filtrar por tipo de serviço se necessário (antes de busca para reduzir dataset)
-        if service_filter:
-            filtered_orders = []
-            for order in all_orders:
-                servicos = order.get('ServicosPrestados', [])
-                if any(s.get('cDescServ', '').strip() == service_filter for s in servicos):
-                    filtered_orders.append(order)
-            all_orders = filtered_orders
+def _fragment_response(html: dict, data: dict):
+    """Resposta JSON de um fragmento do dashboard (HTML por região + dados)"""
+    return jsonify({
+        'status': 'success',
+        'html': html,
+        'data': data
+    })
 
-        # Filtrar por busca se necessário
-        if search:
-            search_lower = search.lower()
-            filtered_orders = []
-            for order in all_orders:
-                cabecalho = order.get('Cabecalho', {})
-                observacoes = order.get('Observacoes', {})
-                
-                # Buscar nome do cliente
-                client_code = cabecalho.get('nCodCli', '')
-                client_name = client_name_mapping.get(client_code, '').lower()
-                
-                # Buscar nome do vendedor
-                seller_code = cabecalho.get('nCodVend', '')
-                seller_name = seller_name_mapping.get(seller_code, '').lower()
-                
-                # Buscar nos campos corretos da estrutura da API, incluindo nome do cliente e vendedor
-                if (search_lower in str(client_code).lower() or
-                    search_lower in client_name or
-                    search_lower in str(cabecalho.get('cNumOS', '')).lower() or
-                    search_lower in str(cabecalho.get('nCodOS', '')).lower() or
-                    search_lower in str(cabecalho.get('nCodVend', '')).lower() or
-                    search_lower in seller_name or
-                    search_lower in observacoes.get('cObsOS', '').lower()):
-                    filtered_orders.append(order)
-            all_orders = filtered_orders
-        
-        # Ordenar por data de previsão (mais recentes primeiro)
-        def parse_date(date_str):
-            """Converte data dd/mm/yyyy para objeto datetime para ordenação"""
-            try:
-                if date_str:
-                    day, month, year = date_str.split('/')
-                    return datetime(int(year), int(month), int(day))
-                return datetime.min  # Data mínima para ordens sem data
-            except:
-                return datetime.min
-        
-        all_orders.sort(key=lambda order: parse_date(order.get('Cabecalho', {}).get('dDtPrevisao', '')), reverse=True)
-        
-        # Paginação manual
-        total = len(all_orders)
-        start = (page - 1) * per_page
-        end = start + per_page
-        orders_page = all_orders[start:end]
-        
-        # Calcular informações de paginação
-        total_pages = (total + per_page - 1) // per_page
-        has_prev = page > 1
-        has_next = page < total_pages
-        
-        pagination = {
-            'page': page,
-            'per_page': per_page,
-            'total': total,
-            'total_pages': total_pages,
-            'has_prev': has_prev,
-            'has_next': has_next,
-            'prev_num': page - 1 if has_prev else None,
-            'next_num': page + 1 if has_next else None
-        }
+@app.route('/services/fragments/filters')
+@login_required
+@snapshot_etag('service_orders', 'mappings')
+def services_fragment_filters():
+    """Fragmento com as opções dos filtros (serviços, anos, semanas e meses)"""
+    try:
+        filters = parse_service_filters(request.args)
         
-        # Buscar estatísticas adaptáveis aos filtros aplicados
-        print("Buscando estatísticas de ordens de serviço...")
-        try:
-            # Gerar estatísticas utilizando o mesmo conjunto filtrado de ordens para manter consistência
-            # Isso garante que as estatísticas reflitam exatamente os dados filtrados
-            stats = omie_service.get_service_orders_stats(
-                faturada_only=False, 
-                orders=all_orders, 
-                service_filter=service_filter,
-                year_filter=year_filter,
-                month_filter=month_filter,
-                week_filter=week_filter
-            )
-            
-            # Adicionar informações sobre os filtros aplicados para contexto
-            stats['applied_filters'] = {
-                'search': search,
-                'service_filter': service_filter,
-                'year_filter': year_filter,
-                'month_filter': month_filter,
-                'week_filter': week_filter,
-                'total_filtered_orders': len(all_orders)
-            }
+        def render_filters():
+            options = load_filter_options(omie_service)
             
-            print(f"Estatísticas calculadas para {len(all_orders)} ordens filtradas")
+            def render_options(macro_name, *args):
+                return get_template_attribute('services/_filter_options.html', macro_name)(*args)
             
-        except Exception as e:
-            print(f"Erro ao carregar estatísticas: {str(e)}")
-            stats = {
-                "total_orders": len(all_orders),
-                "total_value": 0,
-                "average_value": 0,
-                "by_client": {},
-                "top_clients": [],
-                "by_status": {},
-                "by_service_type": {},
-                "top_services": [],
-                "by_technician": {},
-                "monthly_stats": {},
-                "monthly_values": {},
-                "applied_filters": {
-                    'search': search,
-                    'service_filter': service_filter,
-                    'year_filter': year_filter,
-                    'month_filter': month_filter,
-                    'week_filter': week_filter,
-                    'total_filtered_orders': len(all_orders)
+            html = {
+                'service-options': render_options('service_options', options['available_services'], filters['service_filter']),
+                'year-options': render_options('year_options', options['available_years'], filters['year_filter']),
+                'week-options': render_options('week_options', options['available_weeks'], filters['week_filter']),
+                'month-options': render_options('month_options', options['available_months'], filters['month_filter'])
+            }
+            return html, {
+                'labels': filter_labels(options, filters),
+                'counts': {
+                    'years': len(options['available_years']),
+                    'weeks': len(options['available_weeks']),
+                    'months': len(options['available_months'])
                 }
             }
         
-        # Se há filtro de ano, calcular estatísticas específicas do ano
-        yearly_stats = None
-        if year_filter:
-            print(f"Buscando estatísticas anuais para {year_filter}...")
-            try:
-                yearly_stats = omie_service.get_yearly_service_stats(year_filter)
-            except Exception as e:
-                print(f"Erro ao carregar estatísticas anuais: {str(e)}")
-                yearly_stats = None
-        
-        # Se há filtro de semana (e não de ano), calcular estatísticas específicas da semana
-        weekly_stats = None
-        if week_filter and not year_filter:
-            print(f"Buscando estatísticas semanais para {week_filter}...")
-            try:
-                weekly_stats = omie_service.get_weekly_service_stats(week_filter)
-            except Exception as e:
-                print(f"Erro ao carregar estatísticas semanais: {str(e)}")
-                weekly_stats = None
-        
-        # Se há filtro de mês (e não de ano ou semana), calcular estatísticas específicas do mês
-        monthly_stats = None
-        if month_filter and not year_filter and not week_filter:
-            print(f"Buscando estatísticas mensais para {month_filter}...")
-            try:
-                monthly_stats = omie_service.get_monthly_service_stats(month_filter)
-            except Exception as e:
-                print(f"Erro ao carregar estatísticas mensais: {str(e)}")
-                monthly_stats = None
-        
-        # Buscar lista de anos disponíveis para o filtro
-        print("Buscando anos disponíveis...")
-        try:
-            available_years = omie_service.get_available_years_for_services()
-        except Exception as e:
-            print(f"Erro ao carregar anos disponíveis: {str(e)}")
-            available_years = []
-        
-        # Buscar lista de meses disponíveis para o filtro
-        print("Buscando meses disponíveis...")
-        try:
-            available_months = omie_service.get_available_months_for_services()
-        except Exception as e:
-            print(f"Erro ao carregar meses disponíveis: {str(e)}")
-            available_months = []
+        # As opções só dependem dos valores selecionados (busca e página não alteram
+        # os selects) e do dia atual; o cache 'filters' é derivado das ordens e não
+        # entra na versão, senão a própria renderização a alteraria
+        fragment_filters = {name: filters[name] for name in ('service_filter', 'year_filter', 'month_filter', 'week_filter')}
+        fragment_filters['today'] = datetime.now().date().isoformat()
+        html, data = fragment_cache.get_or_render(
+            'services.filters', ('service_orders', 'mappings'), fragment_filters, render_filters)
+        return _fragment_response(html, data)
+    except Exception as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 500
+
+@app.route('/services/fragments/stats')
+@login_required
+@snapshot_etag('service_orders', 'mappings', 'stats')
+def services_fragment_stats():
+    """Fragmento com estatísticas, breakdown por serviço, destaques e dados do gráfico"""
+    try:
+        filters = parse_service_filters(request.args)
         
-        # Buscar lista de semanas disponíveis para o filtro (com preenchimento de lacunas)
-        print("Buscando semanas disponíveis...")
-        try:
-            available_weeks = omie_service.get_available_weeks_for_services(fill_gaps=True)
-        except Exception as e:
-            print(f"Erro ao carregar semanas disponíveis: {str(e)}")
-            available_weeks = []
+        def render_stats():
+            services_data, orders = load_filtered_orders(omie_service, filters, datasets=('client_name_mapping',))
+            stats = build_stats(omie_service, orders, filters)
+            period_stats = build_period_stats(omie_service, filters)
+            
+            context = {
+                'stats': stats,
+                **period_stats,
+                'service_filter': filters['service_filter'],
+                'client_name_mapping': services_data.get('client_name_mapping')
+            }
+            html = {
+                'summary': render_template('services/_summary.html', **context),
+                'breakdown': render_template('services/_breakdown.html', **context),
+                'highlights': render_template('services/_highlights.html', **context)
+            }
+            return html, {
+                'monthly_stats': stats.get('monthly_stats', {}),
+                'monthly_values': stats.get('monthly_values', {}),
+                # Estatísticas do período selecionado (a chave monthly_stats acima é a série do gráfico)
+                'period_stats': period_stats
+            }
         
-        return render_template('services.html', 
-                             orders=orders_page, 
-                             pagination=pagination,
-                             stats=stats,
-                             yearly_stats=yearly_stats,
-                             monthly_stats=monthly_stats,
-                             weekly_stats=weekly_stats,
-                             search=search,
-                             service_filter=service_filter,
-                             year_filter=year_filter,
-                             month_filter=month_filter,
-                             week_filter=week_filter,
-                             available_years=available_years,
-                             available_months=available_months,
-                             available_weeks=available_weeks,
-                             available_services=available_services,
-                             client_name_mapping=client_name_mapping,
-                             seller_name_mapping=seller_name_mapping)
+        # A página da tabela não altera as estatísticas: paginação reaproveita o fragmento
+        html, data = fragment_cache.get_or_render(
+            'services.stats', ('service_orders', 'mappings', 'stats'),
+            {name: value for name, value in filters.items() if name != 'page'},
+            render_stats)
+        return _fragment_response(html, data)
     except Exception as e:
-        return render_template('error.html', error=str(e))
+        return jsonify({'status': 'error', 'error': str(e)}), 500
+
+@app.route('/services/fragments/orders')
+@login_required
+@snapshot_etag('service_orders', 'mappings')
+def services_fragment_orders():
+    """Fragmento com a página atual da tabela de ordens de serviço"""
+    try:
+        filters = parse_service_filters(request.args)
+        services_data, orders = load_filtered_orders(
+            omie_service, filters, datasets=('client_name_mapping', 'seller_name_mapping'))
+        
+        pagination = build_pagination(len(orders), filters['page'])
+        start = (pagination['page'] - 1) * pagination['per_page']
+        orders_page = orders[start:start + pagination['per_page']]
+        
+        html = {
+            'orders': render_template('services/_orders.html',
+                                      orders=orders_page,
+                                      pagination=pagination,
+                                      search=filters['search'],
+                                      service_filter=filters['service_filter'],
+                                      year_filter=filters['year_filter'],
+                                      month_filter=filters['month_filter'],
+                                      week_filter=filters['week_filter'],
+                                      client_name_mapping=services_data.get('client_name_mapping'),
+                                      seller_name_mapping=services_data.get('seller_name_mapping'))
+        }
+        return _fragment_response(html, {
+            'total': pagination['total'],
+            'page': pagination['page'],
+            'total_pages': pagination['total_pages']
+        })
+    except Exception as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 500
 
 @app.route('/api/clients')
 @login_required
@@ -608,8 +415,20 @@ def api_clients():
     try:
         search = request.args.get('search', '', type=str)
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         
+        if wants_stream():
+            # Streaming: todos os clientes (per_page=0) ou a página pedida, escritos incrementalmente
+            per_page = request.args.get('per_page', 0, type=int)
+            matched = Counter(omie_service.iter_clients(search))
+            return stream_json_response({
+                'clients': JsonArray(paginate_iter(matched, page, per_page)),
+                'total': matched,
+                'page': page,
+                'per_page': per_page,
+                'total_pages': lambda: (matched.count + per_page - 1) // per_page if per_page > 0 else 1
+            })
+        
+        per_page = request.args.get('per_page', 20, type=int)
         if search:
             clients = omie_service.search_clients(search)
         else:
@@ -646,6 +465,7 @@ def api_client_detail(client_id):
 
 @app.route('/api/stats')
 @login_required
+@snapshot_etag('stats')
 def api_stats():
     """API endpoint para estatísticas"""
     try:
@@ -656,6 +476,7 @@ def api_stats():
 
 @app.route('/api/dashboard/stats')
 @login_required
+@snapshot_etag('stats', 'dashboard')
 def api_dashboard_stats():
     """API endpoint otimizado para estatísticas do dashboard"""
     try:
@@ -664,23 +485,14 @@ def api_dashboard_stats():
         
         if cache_service:
             try:
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    cache_key = "dashboard_basic_stats"
-                    stats = loop.run_until_complete(
-                        cache_service.get(cache_key, "dashboard")
-                    )
-                    if stats:
-                        return jsonify({
-                            'status': 'success',
-                            'data': stats,
-                            'from_cache': True,
-                            'timestamp': datetime.now().isoformat()
-                        })
-                finally:
-                    loop.close()
+                stats = cache_service.get_sync("dashboard_basic_stats", "dashboard")
+                if stats:
+                    return jsonify({
+                        'status': 'success',
+                        'data': stats,
+                        'from_cache': True,
+                        'timestamp': datetime.now().isoformat()
+                    })
             except Exception as cache_error:
                 print(f"Erro ao acessar cache: {cache_error}")
         
@@ -691,16 +503,7 @@ def api_dashboard_stats():
         # Salvar no cache para próximas consultas
         if cache_service and stats:
             try:
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    cache_key = "dashboard_basic_stats"
-                    loop.run_until_complete(
-                        cache_service.set(cache_key, stats, "dashboard", 0.5)  # 30 minutos
-                    )
-                finally:
-                    loop.close()
+                cache_service.set_sync("dashboard_basic_stats", stats, "dashboard", 0.5)  # 30 minutos
             except Exception as cache_error:
                 print(f"Erro ao salvar no cache: {cache_error}")
         
@@ -720,6 +523,7 @@ def api_dashboard_stats():
 
 @app.route('/api/dashboard/quick-stats')
 @login_required
+@snapshot_etag('dashboard')
 def api_dashboard_quick_stats():
     """API endpoint para estatísticas rápidas do dashboard (apenas cache)"""
     try:
@@ -729,29 +533,20 @@ def api_dashboard_quick_stats():
                 'message': 'Cache não disponível'
             }), 503
         
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            cache_key = "dashboard_basic_stats"
-            stats = loop.run_until_complete(
-                cache_service.get(cache_key, "dashboard")
-            )
-            
-            if stats:
-                return jsonify({
-                    'status': 'success',
-                    'data': stats,
-                    'from_cache': True,
-                    'timestamp': datetime.now().isoformat()
-                })
-            else:
-                return jsonify({
-                    'status': 'no_cache',
-                    'message': 'Dados não disponíveis em cache'
-                })
-        finally:
-            loop.close()
+        stats = cache_service.get_sync("dashboard_basic_stats", "dashboard")
+        
+        if stats:
+            return jsonify({
+                'status': 'success',
+                'data': stats,
+                'from_cache': True,
+                'timestamp': datetime.now().isoformat()
+            })
+        else:
+            return jsonify({
+                'status': 'no_cache',
+                'message': 'Dados não disponíveis em cache'
+            })
             
     except Exception as e:
         return jsonify({
@@ -763,6 +558,7 @@ def api_dashboard_quick_stats():
 
 @app.route('/api/services')
 @login_required
+@snapshot_etag('service_orders', 'mappings')
 def api_services():
     """API endpoint para ordens de serviço"""
     try:
@@ -778,124 +574,42 @@ def api_services():
         if not search and not month_filter and not week_filter and not year_filter:
             year_filter = current_year
         
-        # Buscar todas as ordens de serviço
-        orders = omie_service.get_all_service_orders()
-        # Manter apenas ordens de serviço faturadas
-        orders = [o for o in orders if o.get('Cabecalho', {}).get('cEtapa') == '60']
-        
-        # Buscar mapeamento de clientes
-        try:
-            client_name_mapping = omie_service.get_client_name_mapping()
-        except Exception as e:
-            print(f"Erro ao carregar mapeamento de clientes na API: {str(e)}")
-            client_name_mapping = {}
-        
-        # Buscar mapeamento de vendedores
-        try:
-            seller_name_mapping = omie_service.get_seller_name_mapping()
-        except Exception as e:
-            print(f"Erro ao carregar mapeamento de vendedores na API: {str(e)}")
-            seller_name_mapping = {}
-        
-        # Filtrar por ano se especificado (tem prioridade sobre semana e mês)
-        if year_filter:
-            filtered_orders = []
-            for order in orders:
-                cabecalho = order.get('Cabecalho', {})
-                date_str = cabecalho.get('dDtPrevisao', '')
-                if date_str:
-                    try:
-                        # Extrair ano da data (formato dd/mm/yyyy)
-                        year = date_str.split("/")[2]  # yyyy
-                        if year == year_filter:
-                            filtered_orders.append(order)
-                    except:
-                        pass
-            orders = filtered_orders
-        # Filtrar por semana se especificado (tem prioridade sobre mês, mas não sobre ano)
-        elif week_filter:
-            try:
-                # Extrair datas de início e fim da semana
-                start_date_str, end_date_str = week_filter.split("_")
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-                
-                filtered_orders = []
-                for order in orders:
-                    cabecalho = order.get('Cabecalho', {})
-                    date_str = cabecalho.get('dDtPrevisao', '')
-                    if date_str:
-                        try:
-                            # Converter data dd/mm/yyyy para datetime
-                            day, month, year = date_str.split("/")
-                            order_date = datetime(int(year), int(month), int(day))
-                            
-                            # Verificar se a data está dentro da semana
-                            if start_date <= order_date <= end_date:
-                                filtered_orders.append(order)
-                        except:
-                            pass
-                orders = filtered_orders
-            except Exception as e:
-                print(f"Erro ao filtrar por semana na API: {str(e)}")
-        # Filtrar por mês se especificado (apenas se não há filtro de ano ou semana)
-        elif month_filter:
-            filtered_orders = []
-            for order in orders:
-                cabecalho = order.get('Cabecalho', {})
-                date_str = cabecalho.get('dDtPrevisao', '')
-                if date_str:
-                    try:
-                        # Extrair mês/ano da data (formato dd/mm/yyyy)
-                        month_year = "/".join(date_str.split("/")[1:])  # mm/yyyy
-                        if month_year == month_filter:
-                            filtered_orders.append(order)
-                    except:
-                        pass
-            orders = filtered_orders
-        
-        # Filtrar por busca se necessário
-        if search:
-            search_lower = search.lower()
-            filtered_orders = []
-            for order in orders:
-                cabecalho = order.get('Cabecalho', {})
-                observacoes = order.get('Observacoes', {})
-                
-                # Buscar nome do cliente
-                client_code = cabecalho.get('nCodCli', '')
-                client_name = client_name_mapping.get(client_code, '').lower()
-                
-                # Buscar nome do vendedor
-                seller_code = cabecalho.get('nCodVend', '')
-                seller_name = seller_name_mapping.get(seller_code, '').lower()
-                
-                # Buscar nos campos corretos da estrutura da API, incluindo nome do cliente e vendedor
-                if (search_lower in str(client_code).lower() or
-                    search_lower in client_name or
-                    search_lower in str(cabecalho.get('cNumOS', '')).lower() or
-                    search_lower in str(cabecalho.get('nCodOS', '')).lower() or
-                    search_lower in str(cabecalho.get('nCodVend', '')).lower() or
-                    search_lower in seller_name or
-                    search_lower in observacoes.get('cObsOS', '').lower()):
-                    filtered_orders.append(order)
-            orders = filtered_orders
+        # Ordens faturadas e mapeamentos carregados em paralelo
+        services_data = omie_service.services_data_graph().start(
+            ['invoiced_orders', 'client_name_mapping', 'seller_name_mapping'])
+        orders = services_data.get('invoiced_orders')
+        client_name_mapping = services_data.get('client_name_mapping')
+        seller_name_mapping = services_data.get('seller_name_mapping')
+        
+        # Filtros de período (ano > semana > mês) e busca em uma única passagem
+        orders = filter_orders(
+            orders,
+            year_filter=year_filter,
+            month_filter=month_filter,
+            week_filter=week_filter,
+            search=search,
+            client_name_mapping=client_name_mapping,
+            seller_name_mapping=seller_name_mapping
+        )
         
         # Ordenar por data de previsão (mais recentes primeiro)
-        def parse_date(date_str):
-            """Converte data dd/mm/yyyy para objeto datetime para ordenação"""
-            try:
-                if date_str:
-                    day, month, year = date_str.split('/')
-                    return datetime(int(year), int(month), int(day))
-                return datetime.min  # Data mínima para ordens sem data
-            except:
-                return datetime.min
-        
-        orders.sort(key=lambda order: parse_date(order.get('Cabecalho', {}).get('dDtPrevisao', '')), reverse=True)
+        sort_orders_by_date(orders)
         
         # Paginação
         total = len(orders)
+        
+        if wants_stream():
+            # Streaming: ordens (página ou todas com per_page=0) escritas incrementalmente
+            return stream_json_response({
+                'orders': JsonArray(paginate_iter(orders, page, per_page)),
+                'total': total,
+                'page': page,
+                'per_page': per_page,
+                'total_pages': (total + per_page - 1) // per_page if per_page > 0 else 1,
+                'client_name_mapping': JsonObject(client_name_mapping.items()),
+                'seller_name_mapping': JsonObject(seller_name_mapping.items())
+            })
+        
         start = (page - 1) * per_page
         end = start + per_page
         orders_page = orders[start:end]
@@ -912,8 +626,74 @@ def api_services():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/services/export')
+@login_required
+@snapshot_etag('service_orders', 'mappings')
+def api_services_export():
+    """
+    Exporta as ordens de serviço faturadas filtradas em CSV ou NDJSON (streaming)
+    
+    Aceita os mesmos filtros de /services (year, month, week, service, search);
+    year=all exporta todos os anos. Ordens e mapeamentos são obtidos uma única
+    vez e as linhas são geradas em uma passagem, sem acumular a resposta.
+    """
+    try:
+        export_format = request.args.get('format', 'csv', type=str).lower()
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({'error': "Formato inválido: use 'csv' ou 'ndjson'"}), 400
+        
+        search = request.args.get('search', '', type=str)
+        service_filter = request.args.get('service', '', type=str)
+        month_filter = request.args.get('month', '', type=str)
+        week_filter = request.args.get('week', '', type=str)
+        year_filter = request.args.get('year', '', type=str)
+        
+        # Mesmo padrão de /services: sem filtros, apenas o ano atual
+        if not search and not month_filter and not week_filter and not year_filter:
+            year_filter = str(datetime.now().year)
+        elif year_filter == 'all':
+            year_filter = ''
+        
+        # Snapshot único das ordens e dos mapeamentos (sem idas ao cache/API por linha)
+        services_data = omie_service.services_data_graph().resolve(
+            ['invoiced_orders', 'client_name_mapping', 'seller_name_mapping', 'service_name_mapping'])
+        client_name_mapping = services_data['client_name_mapping']
+        seller_name_mapping = services_data['seller_name_mapping']
+        service_name_mapping = services_data['service_name_mapping']
+        
+        matching_orders = iter_filtered_orders(
+            services_data['invoiced_orders'],
+            year_filter=year_filter,
+            month_filter=month_filter,
+            week_filter=week_filter,
+            service_filter=service_filter,
+            search=search,
+            client_name_mapping=client_name_mapping,
+            seller_name_mapping=seller_name_mapping
+        )
+        rows = (export_row(order, client_name_mapping, seller_name_mapping, service_name_mapping)
+                for order in matching_orders)
+        
+        filename = f"ordens_servico_{datetime.now().strftime('%Y%m%d_%H%M')}.{export_format}"
+        if export_format == 'csv':
+            body, mimetype = iter_csv(rows), 'text/csv'
+        else:
+            body, mimetype = iter_ndjson(rows), 'application/x-ndjson'
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'X-Accel-Buffering': 'no'
+            }
+        )
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/services/stats')
 @login_required
+@snapshot_etag('service_orders', 'mappings', 'stats')
 def api_services_stats():
     """API endpoint para estatísticas de serviços"""
     try:
@@ -938,10 +718,11 @@ def api_start_background_loading():
                 'message': 'Carregamento já está em andamento'
             })
         
-        # Iniciar nova tarefa
+        # Enfileirar nova tarefa (cargas do usuário têm prioridade sobre manutenção)
         background_service.start_task(
             task_id,
-            omie_service.load_full_data_background
+            omie_service.load_full_data_background,
+            priority=PRIORITY_USER
         )
         
         return jsonify({
@@ -968,6 +749,32 @@ def api_background_task_status(task_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/background/cancel/<task_id>', methods=['POST'])
+@login_required
+def api_background_task_cancel(task_id):
+    """Solicita o cancelamento de uma tarefa em background"""
+    try:
+        if not background_service.cancel_task(task_id):
+            return jsonify({'error': 'Tarefa não encontrada ou já finalizada'}), 404
+        
+        return jsonify({
+            'status': 'cancel_requested',
+            'task_id': task_id,
+            'message': 'Cancelamento solicitado'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/background/metrics')
+@login_required
+def api_background_metrics():
+    """Métricas do pool de tarefas em background (fila, latências e contadores)"""
+    try:
+        return jsonify(background_service.get_metrics())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/cache/clear', methods=['POST'])
 @login_required
 def api_clear_cache():
@@ -987,10 +794,8 @@ def api_clear_cache():
 def api_clear_services_cache():
     """Limpa especificamente o cache de serviços"""
     try:
-        # Limpar cache específico de serviços
-        omie_service.clear_cache_by_pattern("get_service_name_mapping")
-        omie_service.clear_cache_by_pattern("get_all_services")
-        omie_service.clear_cache_by_pattern("get_service_orders_stats")
+        # Evento "catálogo de serviços mudou": invalida todas as chaves dependentes de uma vez
+        omie_service.invalidate_services_catalogue()
         print("Cache de serviços limpo - mapeamento será recarregado")
         return jsonify({
             'status': 'success',
@@ -1012,12 +817,35 @@ def api_clear_weeks_cache():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/healthz')
+def healthz():
+    """Liveness: o processo está de pé e atendendo (nenhuma E/S)"""
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+@app.route('/readyz')
+def readyz():
+    """
+    Readiness: ordens de serviço carregadas neste worker
+    
+    Responde 503 até a primeira carga bem-sucedida das ordens (herdada do
+    master com --preload ou feita pelo próprio worker; a sonda também retoma
+    o pré-carregamento no worker recém-criado). Serve para o balanceador
+    escolher workers aquecidos; o health check de deploy usa /healthz, pois
+    a primeira carga do Omie pode passar do tempo limite da plataforma.
+    """
+    if not service_registry.is_initialized('startup_service'):
+        return jsonify({'ready': False, 'reason': 'pré-carregamento não iniciado', 'pid': os.getpid()}), 503
+    readiness = startup_service.get_readiness()
+    readiness['pid'] = os.getpid()
+    return jsonify(readiness), 200 if readiness['ready'] else 503
+
 @app.route('/api/startup/status')
 @login_required
 def api_startup_status():
     """Verifica o status do pré-carregamento de dados"""
     try:
         status = startup_service.get_status()
+        status['boot'] = boot_report.as_dict()
         return jsonify(status)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1037,6 +865,7 @@ def api_restart_preload():
 
 @app.route('/api/progressive/dashboard', methods=['GET'])
 @login_required
+@snapshot_etag('service_orders', 'mappings', 'stats', 'dashboard')
 def api_progressive_dashboard():
     """Endpoint para carregamento progressivo do dashboard"""
     try:
@@ -1051,20 +880,14 @@ def api_progressive_dashboard():
                 'timestamp': datetime.now().isoformat()
             })
         
-        # Executar carregamento progressivo
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            data = loop.run_until_complete(progressive_loader.load_dashboard_data())
-            return jsonify({
-                'status': 'success',
-                'data': data,
-                'progressive': True,
-                'timestamp': datetime.now().isoformat()
-            })
-        finally:
-            loop.close()
+        # Executar carregamento progressivo no loop compartilhado
+        data = run_sync(progressive_loader.load_dashboard_data())
+        return jsonify({
+            'status': 'success',
+            'data': data,
+            'progressive': True,
+            'timestamp': datetime.now().isoformat()
+        })
             
     except Exception as e:
         return jsonify({
@@ -1090,6 +913,56 @@ def api_progressive_status():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _run_progressive_dashboard():
+    """Carregamento progressivo do dashboard executado no pool de tarefas"""
+    return run_sync(progressive_loader.load_dashboard_data())
+
+@app.route('/api/progressive/stream', methods=['GET'])
+@login_required
+def api_progressive_stream():
+    """
+    Stream SSE com o progresso do carregamento (etapas, páginas e registros)
+    
+    Inicia o carregamento progressivo no pool de tarefas (se ainda não estiver
+    em andamento) e envia os eventos à medida que acontecem; a conexão é
+    encerrada no evento 'done' ou antes do timeout do worker (o navegador
+    reconecta com Last-Event-ID).
+    """
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    raw_last_event_id = request.headers.get('Last-Event-ID')
+    last_event_id = progress_events.parse_event_id(raw_last_event_id)
+    start = request.args.get('start', '1') != '0'
+    if raw_last_event_id and last_event_id is None:
+        # Reconexão atendida por outro worker: o histórico de eventos não é
+        # deste processo e o carregamento não é reiniciado aqui
+        start = False
+    
+    if not progressive_loader or (not start and not progressive_loader.is_loading and last_event_id is None):
+        # Nada a acompanhar: responder com um único evento final
+        status = 'idle' if progressive_loader else 'unavailable'
+        event = {'id': progress_events.last_id, 'event': 'done', 'data': {'status': status, 'message': ''}}
+        return Response(progress_events.format_sse(event), mimetype='text/event-stream', headers=headers)
+    
+    if last_event_id is None:
+        # Nova conexão: apenas eventos a partir de agora (mais o estado atual)
+        last_event_id = progress_events.last_id
+        if start:
+            background_service.start_task(
+                'progressive_dashboard',
+                _run_progressive_dashboard,
+                priority=PRIORITY_USER
+            )
+    
+    # Abaixo do --timeout padrão do gunicorn (30s): um worker síncrono preso
+    # no stream além disso é encerrado pelo master
+    max_duration = float(os.getenv('PROGRESS_STREAM_MAX_SECONDS', '25'))
+    return Response(
+        stream_with_context(progress_events.stream(last_event_id, max_duration=max_duration,
+                                                 snapshot=progressive_loader.is_loading)),
+        mimetype='text/event-stream',
+        headers=headers
+    )
+
 @app.route('/api/cache/intelligent/stats', methods=['GET'])
 @login_required
 def api_intelligent_cache_stats():
@@ -1118,6 +991,27 @@ def api_intelligent_cache_stats():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+@app.route('/api/cache/memory/stats', methods=['GET'])
+@login_required
+def api_memory_cache_stats():
+    """Endpoint para métricas do cache em memória (tamanho, hits, misses e remoções por tipo)"""
+    try:
+        return jsonify({
+            'status': 'success',
+            'memory_cache': memory_cache.get_stats(),
+            'fragment_cache': fragment_cache.get_stats(),
+            'compression': response_compressor.get_stats(),
+            'invalidation': invalidation_bus.get_stats(),
+            'refresh_locks': refresh_coordinator.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'error': str(e),
+            'timestamp': datetime.now().isoformat()
+        }), 500
+
 @app.route('/api/cache/intelligent/clear', methods=['POST'])
 @login_required
 def api_intelligent_cache_clear():
@@ -1132,14 +1026,19 @@ def api_intelligent_cache_clear():
         data = request.get_json() or {}
         pattern = data.get('pattern')
         data_type = data.get('data_type')
+        tags = data.get('tags')
         
-        cache_service.clear_cache(pattern=pattern, data_type=data_type)
+        if tags:
+            cache_service.invalidate_tags(tags)
+        else:
+            cache_service.clear_cache(pattern=pattern, data_type=data_type)
         
         return jsonify({
             'status': 'success',
             'message': 'Cache inteligente limpo com sucesso',
             'pattern': pattern,
             'data_type': data_type,
+            'tags': tags,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -1150,69 +1049,11 @@ def api_intelligent_cache_clear():
             'timestamp': datetime.now().isoformat()
         }), 500
 
-@app.template_filter('format_cpf_cnpj')
-def format_cpf_cnpj(value):
-    """Filtro para formatar CPF/CNPJ"""
-    if not value:
-        return ''
-    
-    # Remove caracteres não numéricos
-    numbers = ''.join(filter(str.isdigit, value))
-    
-    if len(numbers) == 11:  # CPF
-        return f"{numbers[:3]}.{numbers[3:6]}.{numbers[6:9]}-{numbers[9:]}"
-    elif len(numbers) == 14:  # CNPJ
-        return f"{numbers[:2]}.{numbers[2:5]}.{numbers[5:8]}/{numbers[8:12]}-{numbers[12:]}"
-    else:
-        return value
-
-@app.template_filter('format_phone')
-def format_phone(ddd, number):
-    """Filtro para formatar telefone"""
-    if not ddd or not number:
-        return ''
-    
-    # Remove caracteres não numéricos
-    ddd_clean = ''.join(filter(str.isdigit, ddd))
-    number_clean = ''.join(filter(str.isdigit, number))
-    
-    if len(number_clean) == 9:  # Celular
-        return f"({ddd_clean}) {number_clean[:5]}-{number_clean[5:]}"
-    elif len(number_clean) == 8:  # Fixo
-        return f"({ddd_clean}) {number_clean[:4]}-{number_clean[4:]}"
-    else:
-        return f"({ddd_clean}) {number_clean}"
-
-@app.template_filter('format_date')
-def format_date(value):
-    """Filtro para formatar data"""
-    if not value:
-        return ''
-    
-    try:
-        # Assumindo formato dd/mm/yyyy
-        if '/' in value:
-            day, month, year = value.split('/')
-            return f"{day}/{month}/{year}"
-        return value
-    except:
-        return value
-
-@app.template_filter('format_currency')
-def format_currency(value):
-    """Filtro para formatar valores monetários"""
-    if not value:
-        return 'R$ 0,00'
-    
-    try:
-        # Converte para float se for string
-        if isinstance(value, str):
-            value = float(value.replace(',', '.'))
-        
-        # Formata como moeda brasileira
-        return f"R$ {value:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-    except:
-        return f"R$ {value}"
+# Filtros de formatação (os registros do cache já trazem os valores prontos em 'display')
+app.add_template_filter(format_cpf_cnpj)
+app.add_template_filter(format_phone)
+app.add_template_filter(format_date)
+app.add_template_filter(format_currency)
 
 @app.errorhandler(404)
 def not_found_error(error):
@@ -1229,7 +1070,28 @@ def cleanup_background_tasks():
     except Exception as e:
         print(f"Erro ao limpar tarefas antigas: {e}")
 
+boot_report.record('import', time.perf_counter() - _import_started)
+
+def create_app(start_preload: bool = True) -> Flask:
+    """
+    Ponto de entrada da aplicação (gunicorn: "app:create_app()")
+    
+    Importar este módulo só registra as rotas; os serviços são criados no
+    primeiro uso. Aqui o pré-carregamento é iniciado (o que constrói o
+    OmieService e o cache inteligente) e o relatório de inicialização é exibido.
+    
+    Args:
+        start_preload: Iniciar o pré-carregamento e a atualização antecipada dos dados
+    """
+    if start_preload:
+        print("🚀 Iniciando pré-carregamento de dados...")
+        startup_service.start_preload()
+    print(boot_report.summary())
+    return app
+
 if __name__ == '__main__':
+    create_app()
+    
     # Limpar tarefas antigas na inicialização
     cleanup_background_tasks()
     
@@ -5,14 +5,20 @@ Implementa endpoints específicos para diferentes tipos de carregamento
 
 from flask import Blueprint, jsonify, request, session
 from typing import Dict, Any, Optional
-import asyncio
 import time
 from datetime import datetime
+from itertools import islice
 
 from .omie_service import OmieService
 from .cache_service import SupabaseCacheService
 from .progressive_loader import ProgressiveDataLoader, LoadingStageManager
-from utils.auth_decorators import login_required
+from .async_runtime import run_sync
+from .memory_cache import memory_cache
+from .order_index import order_index_cache, date_bounds, encode_cursor, decode_cursor, InvalidCursor
+from utils.auth_decorators import login_required, is_authorized
+from utils.json_stream import stream_json_response, wants_stream, JsonObject
+from utils.http_cache import snapshot_etag
+from utils.json_provider import preserialized, json_response
 
 # Blueprint para endpoints otimizados
 optimized_api = Blueprint('optimized_api', __name__, url_prefix='/api/v2')
@@ -35,27 +41,33 @@ def initialize_services(omie_svc: OmieService, cache_svc: SupabaseCacheService):
     
     print("✅ Serviços otimizados inicializados")
 
+@optimized_api.before_request
+def ensure_services():
+    """
+    Constrói os serviços no primeiro acesso (o registro chama initialize_services)
+
+    Requisições sem login não constroem nada: o login_required da rota as redireciona.
+    """
+    if omie_service is None and is_authorized():
+        from .service_registry import service_registry
+        service_registry.omie_service
+
 @optimized_api.route('/dashboard/progressive', methods=['GET'])
 @login_required
+@snapshot_etag('service_orders', 'mappings', 'stats', 'dashboard')
 def api_dashboard_progressive():
     """Endpoint para carregamento progressivo do dashboard"""
     try:
         if not progressive_loader:
             return jsonify({'error': 'Serviços não inicializados'}), 500
         
-        # Executar carregamento progressivo
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        try:
-            data = loop.run_until_complete(progressive_loader.load_dashboard_data())
-            return jsonify({
-                'status': 'success',
-                'data': data,
-                'loaded_at': datetime.now().isoformat()
-            })
-        finally:
-            loop.close()
+        # Executar carregamento progressivo no loop compartilhado
+        data = run_sync(progressive_loader.load_dashboard_data())
+        return jsonify({
+            'status': 'success',
+            'data': data,
+            'loaded_at': datetime.now().isoformat()
+        })
             
     except Exception as e:
         return jsonify({
@@ -80,6 +92,7 @@ def api_dashboard_status():
 
 @optimized_api.route('/services/summary', methods=['GET'])
 @login_required
+@snapshot_etag('service_orders', 'stats')
 def api_services_summary():
     """Endpoint otimizado para resumo de serviços"""
     try:
@@ -89,39 +102,28 @@ def api_services_summary():
         # Buscar dados resumidos do cache
         cache_key = "services_summary_v2"
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        cached_data = cache_service.get_sync(cache_key, "stats")
         
-        try:
-            cached_data = loop.run_until_complete(
-                cache_service.get(cache_key, "stats")
-            )
-            
-            if cached_data:
-                return jsonify({
-                    'status': 'success',
-                    'data': cached_data,
-                    'from_cache': True,
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-            # Calcular resumo otimizado
-            summary = loop.run_until_complete(_calculate_services_summary())
-            
-            # Cache por 30 minutos
-            loop.run_until_complete(
-                cache_service.set(cache_key, summary, "stats", 0.5)
-            )
-            
+        if cached_data:
             return jsonify({
                 'status': 'success',
-                'data': summary,
-                'from_cache': False,
+                'data': cached_data,
+                'from_cache': True,
                 'timestamp': datetime.now().isoformat()
             })
-            
-        finally:
-            loop.close()
+        
+        # Calcular resumo otimizado
+        summary = _calculate_services_summary()
+        
+        # Cache por 30 minutos
+        cache_service.set_sync(cache_key, summary, "stats", 0.5)
+        
+        return jsonify({
+            'status': 'success',
+            'data': summary,
+            'from_cache': False,
+            'timestamp': datetime.now().isoformat()
+        })
             
     except Exception as e:
         return jsonify({
@@ -130,8 +132,33 @@ def api_services_summary():
             'timestamp': datetime.now().isoformat()
         }), 500
 
+def _stream_mapping(mapping: Dict, from_cache: bool):
+    """Resposta do mapeamento de clientes escrita em streaming (par a par)"""
+    return stream_json_response({
+        'status': 'success',
+        'from_cache': from_cache,
+        'count': len(mapping),
+        'timestamp': datetime.now().isoformat(),
+        'mapping': JsonObject(mapping.items())
+    })
+
+def _mapping_response(name: str, mapping: Dict, from_cache: bool, version: str):
+    """
+    Resposta do mapeamento com o JSON do mapeamento codificado uma vez por versão dos dados
+
+    Args:
+        version: Versão de 'mappings' lida antes de carregar o mapeamento
+    """
+    return json_response({
+        'status': 'success',
+        'from_cache': from_cache,
+        'count': len(mapping),
+        'timestamp': datetime.now().isoformat()
+    }, {'mapping': preserialized(name, ('mappings',), lambda: mapping, version=version)})
+
 @optimized_api.route('/clients/mapping', methods=['GET'])
 @login_required
+@snapshot_etag('mappings')
 def api_clients_mapping():
     """Endpoint otimizado para mapeamento de clientes"""
     try:
@@ -139,43 +166,28 @@ def api_clients_mapping():
             return jsonify({'error': 'Serviços não disponíveis'}), 500
         
         cache_key = "client_mapping_optimized"
+        # Versão lida antes do mapeamento: se ele mudar no meio, os bytes ficam sob a versão antiga
+        version, _ = memory_cache.snapshot(('mappings',))
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Tentar cache primeiro
+        cached_mapping = cache_service.get_sync(cache_key, "mappings")
         
-        try:
-            # Tentar cache primeiro
-            cached_mapping = loop.run_until_complete(
-                cache_service.get(cache_key, "mappings")
-            )
-            
-            if cached_mapping:
-                return jsonify({
-                    'status': 'success',
-                    'mapping': cached_mapping,
-                    'from_cache': True,
-                    'count': len(cached_mapping),
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-            # Carregar da API
-            mapping = omie_service.get_client_name_mapping()
-            
-            # Salvar no cache
-            loop.run_until_complete(
-                cache_service.set(cache_key, mapping, "mappings")
-            )
-            
-            return jsonify({
-                'status': 'success',
-                'mapping': mapping,
-                'from_cache': False,
-                'count': len(mapping),
-                'timestamp': datetime.now().isoformat()
-            })
-            
-        finally:
-            loop.close()
+        if cached_mapping and wants_stream():
+            return _stream_mapping(cached_mapping, from_cache=True)
+        
+        if cached_mapping:
+            return _mapping_response('client_mapping', cached_mapping, from_cache=True, version=version)
+        
+        # Carregar da API
+        mapping = omie_service.get_client_name_mapping()
+        
+        # Salvar no cache
+        cache_service.set_sync(cache_key, mapping, "mappings")
+        
+        if wants_stream():
+            return _stream_mapping(mapping, from_cache=False)
+        
+        return _mapping_response('client_mapping', mapping, from_cache=False, version=version)
             
     except Exception as e:
         return jsonify({
@@ -186,6 +198,7 @@ def api_clients_mapping():
 
 @optimized_api.route('/sellers/mapping', methods=['GET'])
 @login_required
+@snapshot_etag('mappings')
 def api_sellers_mapping():
     """Endpoint otimizado para mapeamento de vendedores"""
     try:
@@ -193,43 +206,28 @@ def api_sellers_mapping():
             return jsonify({'error': 'Serviços não disponíveis'}), 500
         
         cache_key = "seller_mapping_optimized"
+        # Versão lida antes do mapeamento: se ele mudar no meio, os bytes ficam sob a versão antiga
+        version, _ = memory_cache.snapshot(('mappings',))
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Tentar cache primeiro
+        cached_mapping = cache_service.get_sync(cache_key, "mappings")
         
-        try:
-            # Tentar cache primeiro
-            cached_mapping = loop.run_until_complete(
-                cache_service.get(cache_key, "mappings")
-            )
-            
-            if cached_mapping:
-                return jsonify({
-                    'status': 'success',
-                    'mapping': cached_mapping,
-                    'from_cache': True,
-                    'count': len(cached_mapping),
-                    'timestamp': datetime.now().isoformat()
-                })
-            
-            # Carregar da API
-            mapping = omie_service.get_seller_name_mapping()
-            
-            # Salvar no cache
-            loop.run_until_complete(
-                cache_service.set(cache_key, mapping, "mappings")
-            )
-            
-            return jsonify({
-                'status': 'success',
-                'mapping': mapping,
-                'from_cache': False,
-                'count': len(mapping),
-                'timestamp': datetime.now().isoformat()
-            })
-            
-        finally:
-            loop.close()
+        if cached_mapping and wants_stream():
+            return _stream_mapping(cached_mapping, from_cache=True)
+        
+        if cached_mapping:
+            return _mapping_response('seller_mapping', cached_mapping, from_cache=True, version=version)
+        
+        # Carregar da API
+        mapping = omie_service.get_seller_name_mapping()
+        
+        # Salvar no cache
+        cache_service.set_sync(cache_key, mapping, "mappings")
+        
+        if wants_stream():
+            return _stream_mapping(mapping, from_cache=False)
+        
+        return _mapping_response('seller_mapping', mapping, from_cache=False, version=version)
             
     except Exception as e:
         return jsonify({
@@ -240,81 +238,88 @@ def api_sellers_mapping():
 
 @optimized_api.route('/services/paginated', methods=['GET'])
 @login_required
+@snapshot_etag('service_orders', 'mappings')
 def api_services_paginated():
-    """Endpoint para carregamento paginado inteligente de serviços"""
+    """
+    Endpoint paginado de serviços com cursor (keyset)
+
+    As ordens vêm do índice do snapshot atual, ordenadas por data de previsão
+    e nCodOS (mais recentes primeiro). O cursor opaco de next_cursor guarda a
+    última ordem entregue e a versão do snapshot: a próxima página começa logo
+    depois dela por busca binária, então páginas profundas custam o mesmo que
+    a primeira. 'page' continua aceito quando não há cursor.
+
+    Com 'search', total e total_pages vêm como null (contar exigiria
+    percorrer todas as ordens); use has_next/next_cursor para navegar. Um
+    cursor de outra versão continua válido e a resposta traz
+    snapshot_changed=true; cursor malformado responde 400.
+    """
     try:
-        page = request.args.get('page', 1, type=int)
+        cursor = request.args.get('cursor', '', type=str)
+        page = max(request.args.get('page', 1, type=int), 1)
         per_page = request.args.get('per_page', 20, type=int)
-        search = request.args.get('search', '', type=str)
+        search = request.args.get('search', '', type=str).lower()
+        service_filter = request.args.get('service', '', type=str)
+        year_filter = request.args.get('year', '', type=str)
         month_filter = request.args.get('month', '', type=str)
         week_filter = request.args.get('week', '', type=str)
         
         # Limitar per_page para evitar sobrecarga
-        per_page = min(per_page, 100)
+        per_page = max(min(per_page, 100), 1)
         
         if not omie_service:
             return jsonify({'error': 'Serviço não disponível'}), 500
         
-        # Buscar dados com cache inteligente
-        cache_key = f"services_paginated_{page}_{per_page}_{search}_{month_filter}_{week_filter}"
-        
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
         try:
-            # Verificar cache primeiro
-            if cache_service:
-                cached_data = loop.run_until_complete(
-                    cache_service.get(cache_key, "service_orders")
-                )
-                
-                if cached_data:
-                    return jsonify({
-                        'status': 'success',
-                        'data': cached_data,
-                        'from_cache': True,
-                        'timestamp': datetime.now().isoformat()
-                    })
-            
-            # Carregar dados da API (usar lógica existente otimizada)
-            orders = omie_service.get_all_service_orders()
-            
-            # Aplicar filtros (lógica simplificada para exemplo)
-            filtered_orders = orders
-            
-            # Paginação
-            total = len(filtered_orders)
-            start = (page - 1) * per_page
-            end = start + per_page
-            orders_page = filtered_orders[start:end]
-            
-            result = {
-                'orders': orders_page,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'total_pages': (total + per_page - 1) // per_page,
-                    'has_prev': page > 1,
-                    'has_next': page < (total + per_page - 1) // per_page
-                }
-            }
-            
-            # Salvar no cache por tempo curto
-            if cache_service:
-                loop.run_until_complete(
-                    cache_service.set(cache_key, result, "service_orders", 0.25)  # 15 minutos
-                )
-            
-            return jsonify({
-                'status': 'success',
-                'data': result,
-                'from_cache': False,
-                'timestamp': datetime.now().isoformat()
+            cursor_key, cursor_version = decode_cursor(cursor) if cursor else (None, None)
+        except InvalidCursor as e:
+            return jsonify({'status': 'error', 'error': str(e)}), 400
+        
+        index = order_index_cache.get(omie_service.get_all_service_orders)
+        period_start, end = index.date_range(date_bounds(year_filter, month_filter, week_filter))
+        start = period_start
+        if cursor_key is not None:
+            start = max(start, index.position_after(cursor_key))
+        
+        positions = index.candidates(start, end, service_filter)
+        if search:
+            mappings_version, _ = memory_cache.snapshot(('mappings',))
+            texts = index.search_texts(mappings_version, omie_service.get_client_name_mapping(),
+                                       omie_service.get_seller_name_mapping())
+            positions = (position for position in positions if search in texts[position])
+        if cursor_key is None and page > 1:
+            positions = islice(positions, (page - 1) * per_page, None)
+        
+        # Uma posição a mais indica se existe próxima página
+        page_positions = list(islice(positions, per_page + 1))
+        has_next = len(page_positions) > per_page
+        page_positions = page_positions[:per_page]
+        
+        # O total só é informado quando sai dos índices (a busca exigiria percorrer tudo)
+        total = None if search else index.count(period_start, end, service_filter)
+        pagination = {
+            'per_page': per_page,
+            'total': total,
+            'has_next': has_next,
+            'next_cursor': encode_cursor(index.keys[page_positions[-1]], index.version) if has_next else None,
+            'snapshot_version': index.version,
+            'snapshot_changed': cursor_version is not None and cursor_version != index.version
+        }
+        if cursor_key is None:
+            pagination.update({
+                'page': page,
+                'total_pages': (total + per_page - 1) // per_page if total is not None else None,
+                'has_prev': page > 1
             })
-            
-        finally:
-            loop.close()
+        
+        return jsonify({
+            'status': 'success',
+            'data': {
+                'orders': [index.orders[position] for position in page_positions],
+                'pagination': pagination
+            },
+            'timestamp': datetime.now().isoformat()
+        })
             
     except Exception as e:
         return jsonify({
@@ -357,14 +362,19 @@ def api_cache_clear():
         data = request.get_json() or {}
         pattern = data.get('pattern')
         data_type = data.get('data_type')
+        tags = data.get('tags')
         
-        cache_service.clear_cache(pattern=pattern, data_type=data_type)
+        if tags:
+            cache_service.invalidate_tags(tags)
+        else:
+            cache_service.clear_cache(pattern=pattern, data_type=data_type)
         
         return jsonify({
             'status': 'success',
             'message': 'Cache limpo com sucesso',
             'pattern': pattern,
             'data_type': data_type,
+            'tags': tags,
             'timestamp': datetime.now().isoformat()
         })
         
@@ -399,7 +409,7 @@ def api_sync_status():
             'timestamp': datetime.now().isoformat()
         }), 500
 
-async def _calculate_services_summary() -> Dict[str, Any]:
+def _calculate_services_summary() -> Dict[str, Any]:
     """Calcula resumo otimizado de serviços"""
     try:
         if not omie_service:
@@ -0,0 +1,103 @@
+"""
+Loop de Eventos Compartilhado
+Mantém um único event loop de longa duração em uma thread de background
+e expõe uma fachada síncrona thread-safe para executar corrotinas
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Optional
+
+
+class BackgroundEventLoop:
+    """Event loop único executado em uma thread daemon dedicada"""
+
+    def __init__(self, name: str = "async-runtime"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _is_alive(self) -> bool:
+        """Verifica se o loop atual pertence a este processo e está rodando"""
+        return (
+            self._loop is not None
+            and self._thread is not None
+            and self._thread.is_alive()
+            and self._pid == os.getpid()
+        )
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        """Inicia o loop sob demanda (também após fork de workers do gunicorn)"""
+        if self._is_alive():
+            return self._loop
+
+        with self._lock:
+            if self._is_alive():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run_loop, name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop = loop
+            self._thread = thread
+            self._pid = os.getpid()
+            return loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Retorna o event loop compartilhado, iniciando-o se necessário"""
+        return self._ensure_started()
+
+    def submit(self, coro: Awaitable[Any]) -> Future:
+        """Agenda uma corrotina no loop compartilhado e retorna um Future thread-safe"""
+        loop = self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Executa uma corrotina no loop compartilhado e aguarda o resultado
+
+        Args:
+            coro: Corrotina a executar
+            timeout: Tempo máximo de espera em segundos (opcional)
+
+        Returns:
+            Resultado da corrotina
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run() não pode ser chamado de dentro do loop compartilhado; use await")
+
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        """Encerra o loop compartilhado"""
+        with self._lock:
+            if self._is_alive():
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+            self._loop = None
+            self._thread = None
+            self._pid = None
+
+
+# Instância global do loop compartilhado
+async_runtime = BackgroundEventLoop()
+
+
+def run_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """Executa uma corrotina no loop compartilhado a partir de código síncrono"""
+    return async_runtime.run(coro, timeout)
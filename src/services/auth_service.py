@@ -1,8 +1,9 @@
 import os
-from supabase import create_client, Client
 from typing import Optional, Dict, Any
 import hashlib
 import secrets
+from .memory_cache import memory_cache
+from .invalidation import invalidation_bus
 
 class AuthService:
     def __init__(self):
@@ -13,7 +14,29 @@ class AuthService:
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("SUPABASE_URL e SUPABASE_KEY devem estar definidas no arquivo .env")
         
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
+        # Importado sob demanda: o cliente do Supabase é pesado e só é usado aqui
+        from supabase import create_client
+        self.supabase = create_client(self.supabase_url, self.supabase_key)
+        
+        # Usuários consultados recentemente (TTL curto, invalidado no logout e em alterações)
+        self._users = memory_cache.namespace('auth')
+        self.user_cache_ttl = float(os.getenv('USER_CACHE_TTL', '300'))
+    
+    @staticmethod
+    def _user_tag(user_id) -> str:
+        return f"user:{user_id}"
+    
+    def cache_user(self, user: Dict[str, Any]):
+        """Guarda os dados (sem senha) de um usuário no cache em memória do processo"""
+        if user and user.get('id') is not None:
+            tag = self._user_tag(user['id'])
+            self._users.set(tag, user, 'users', ttl=self.user_cache_ttl, tags=[tag])
+    
+    def invalidate_user(self, user_id):
+        """Descarta o usuário do cache deste processo e dos demais workers"""
+        tag = self._user_tag(user_id)
+        self._users.invalidate_tags([tag])
+        invalidation_bus.publish(namespace=self._users.name, tags=[tag])
     
     def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
         """
@@ -43,6 +66,7 @@ class AuthService:
             if user.get('password_hash') == password_hash or user.get('password') == password:
                 # Remove a senha dos dados retornados por segurança
                 user_data = {k: v for k, v in user.items() if k not in ['password', 'password_hash']}
+                self.cache_user(user_data)
                 return user_data
             
             return None
@@ -51,16 +75,22 @@ class AuthService:
             print(f"Erro na autenticação: {e}")
             return None
     
-    def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
+    def get_user_by_id(self, user_id: int, use_cache: bool = True) -> Optional[Dict[str, Any]]:
         """
         Busca um usuário pelo ID
         
         Args:
             user_id: ID do usuário
+            use_cache: Consultar primeiro o cache em memória (False força a ida ao Supabase)
             
         Returns:
             Dict com dados do usuário se encontrado, None caso contrário
         """
+        if use_cache:
+            cached_user = self._users.get(self._user_tag(user_id), 'users')
+            if cached_user is not None:
+                return cached_user
+        
         try:
             response = self.supabase.table('users').select('*').eq('id', user_id).execute()
             
@@ -68,6 +98,7 @@ class AuthService:
                 user = response.data[0]
                 # Remove a senha dos dados retornados por segurança
                 user_data = {k: v for k, v in user.items() if k not in ['password', 'password_hash']}
+                self.cache_user(user_data)
                 return user_data
             
             return None
@@ -1,70 +1,237 @@
+import heapq
+import itertools
+import os
 import threading
 import time
 from typing import Dict, Any, Optional
 from datetime import datetime, timedelta
 
+# Prioridades (menor = executa primeiro)
+PRIORITY_USER = 0          # Cargas disparadas pelo usuário
+PRIORITY_NORMAL = 5
+PRIORITY_MAINTENANCE = 10  # Limpezas e manutenção
+
+
+class TaskCancelled(Exception):
+    """Levantada dentro da tarefa quando o cancelamento foi solicitado"""
+
+
 class BackgroundTaskService:
-    """Serviço para executar tarefas em background"""
-    
-    def __init__(self):
-        self.tasks = {}
+    """
+    Serviço para executar tarefas em background
+
+    Pool limitado de workers consumindo uma fila de prioridades. Tarefas
+    idênticas já pendentes são deduplicadas, o cancelamento é cooperativo
+    (a tarefa chama raise_if_cancelled entre etapas) e os resultados expiram
+    após result_ttl segundos.
+    """
+
+    def __init__(self, max_workers: int = 2, result_ttl: int = 3600):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
         self.results = {}
         self.lock = threading.Lock()
-    
-    def start_task(self, task_id: str, target_function, *args, **kwargs) -> str:
-        """Inicia uma tarefa em background"""
+
+        self._queue = []  # heap de (prioridade, sequência, task_id)
+        self._sequence = itertools.count()
+        self._pending_keys: Dict[tuple, str] = {}
+        self._available = threading.Condition(self.lock)
+        self._workers = []
+        self._pid: Optional[int] = None
+        self._current = threading.local()
+        self._metrics = {
+            'submitted': 0,
+            'deduplicated': 0,
+            'started': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'evicted': 0,
+            'total_wait_ms': 0.0,
+            'max_wait_ms': 0.0,
+            'total_run_ms': 0.0,
+            'max_run_ms': 0.0
+        }
+
+    def _ensure_workers(self):
+        """Inicia os workers sob demanda (também após fork de workers do gunicorn)"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._workers = []
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._worker_loop, name=f"background-task-{len(self._workers)}",
+                                      daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    @staticmethod
+    def _task_key(target_function, args, kwargs) -> tuple:
+        """Identidade de uma tarefa para deduplicação (função + argumentos)"""
+        name = getattr(target_function, '__qualname__', repr(target_function))
+        owner = id(getattr(target_function, '__self__', None))
+        return (name, owner, repr(args), repr(sorted(kwargs.items())))
+
+    def start_task(self, task_id: str, target_function, *args, priority: int = PRIORITY_NORMAL, **kwargs) -> str:
+        """
+        Enfileira uma tarefa em background
+
+        Returns:
+            ID da tarefa (o da tarefa idêntica já pendente, se houver)
+        """
+        key = self._task_key(target_function, args, kwargs)
         with self.lock:
-            if task_id in self.tasks and self.tasks[task_id].is_alive():
-                return task_id  # Tarefa já está rodando
-            
-            # Criar e iniciar thread
-            thread = threading.Thread(
-                target=self._run_task,
-                args=(task_id, target_function, args, kwargs)
-            )
-            thread.daemon = True
-            thread.start()
-            
-            self.tasks[task_id] = thread
+            self._evict_expired()
+
+            task_info = self.results.get(task_id)
+            if task_info and task_info['status'] in ('queued', 'running'):
+                self._metrics['deduplicated'] += 1
+                self._promote(task_id, task_info, priority)
+                return task_id  # Tarefa já está na fila ou rodando
+
+            existing_id = self._pending_keys.get(key)
+            if existing_id and self.results.get(existing_id, {}).get('status') in ('queued', 'running'):
+                self._metrics['deduplicated'] += 1
+                self._promote(existing_id, self.results[existing_id], priority)
+                return existing_id
+
             self.results[task_id] = {
-                'status': 'running',
-                'started_at': datetime.now(),
+                'status': 'queued',
+                'priority': priority,
+                'queued_at': datetime.now(),
+                'started_at': None,
                 'result': None,
-                'error': None
+                'error': None,
+                'cancel_requested': False,
+                '_function': (target_function, args, kwargs),
+                '_key': key,
+                '_cancel': threading.Event(),
+                '_queued_ts': time.time()
             }
-            
+            self._pending_keys[key] = task_id
+            heapq.heappush(self._queue, (priority, next(self._sequence), task_id))
+            self._metrics['submitted'] += 1
+
+            self._ensure_workers()
+            self._available.notify()
             return task_id
-    
-    def _run_task(self, task_id: str, target_function, args, kwargs):
+
+    def _promote(self, task_id: str, task_info: dict, priority: int):
+        """Reenfileira uma tarefa pendente com prioridade mais alta (a entrada antiga é ignorada)"""
+        if task_info['status'] == 'queued' and priority < task_info['priority']:
+            task_info['priority'] = priority
+            heapq.heappush(self._queue, (priority, next(self._sequence), task_id))
+
+    def _worker_loop(self):
+        """Consome a fila de prioridades"""
+        while True:
+            with self.lock:
+                task_id, task_info = self._next_task()
+                while task_id is None:
+                    self._available.wait()
+                    task_id, task_info = self._next_task()
+
+                wait_ms = (time.time() - task_info['_queued_ts']) * 1000
+                self._metrics['total_wait_ms'] += wait_ms
+                self._metrics['max_wait_ms'] = max(self._metrics['max_wait_ms'], wait_ms)
+                self._metrics['started'] += 1
+                task_info['status'] = 'running'
+                task_info['started_at'] = datetime.now()
+
+            self._run_task(task_id, task_info)
+
+    def _next_task(self):
+        """Retira a próxima tarefa válida da fila (chamado com o lock)"""
+        while self._queue:
+            priority, _, task_id = heapq.heappop(self._queue)
+            task_info = self.results.get(task_id)
+            if task_info and task_info['status'] == 'queued' and task_info['priority'] == priority:
+                return task_id, task_info
+        return None, None
+
+    def _run_task(self, task_id: str, task_info: dict):
         """Executa a tarefa e armazena o resultado"""
+        target_function, args, kwargs = task_info['_function']
+        self._current.task = task_info
+        started = time.time()
         try:
             print(f"Iniciando tarefa em background: {task_id}")
+            self.raise_if_cancelled()
             result = target_function(*args, **kwargs)
-            
-            with self.lock:
-                self.results[task_id].update({
-                    'status': 'completed',
-                    'completed_at': datetime.now(),
-                    'result': result,
-                    'error': None
-                })
+            status, error = 'completed', None
             print(f"Tarefa concluída: {task_id}")
-            
+
+        except TaskCancelled:
+            result, status, error = None, 'cancelled', None
+            print(f"Tarefa cancelada: {task_id}")
+
         except Exception as e:
+            result, status, error = None, 'error', str(e)
             print(f"Erro na tarefa {task_id}: {str(e)}")
-            with self.lock:
-                self.results[task_id].update({
-                    'status': 'error',
-                    'completed_at': datetime.now(),
-                    'result': None,
-                    'error': str(e)
-                })
-    
+
+        finally:
+            self._current.task = None
+
+        run_ms = (time.time() - started) * 1000
+        with self.lock:
+            task_info.update({
+                'status': status,
+                'completed_at': datetime.now(),
+                'duration_ms': round(run_ms, 1),
+                'result': result,
+                'error': error,
+                '_function': None
+            })
+            if self._pending_keys.get(task_info['_key']) == task_id:
+                del self._pending_keys[task_info['_key']]
+
+            self._metrics[{'completed': 'completed', 'error': 'failed', 'cancelled': 'cancelled'}[status]] += 1
+            self._metrics['total_run_ms'] += run_ms
+            self._metrics['max_run_ms'] = max(self._metrics['max_run_ms'], run_ms)
+
+    def cancel_task(self, task_id: str) -> bool:
+        """
+        Solicita o cancelamento de uma tarefa
+
+        Tarefas na fila são canceladas imediatamente; tarefas em execução
+        param no próximo raise_if_cancelled.
+        """
+        with self.lock:
+            task_info = self.results.get(task_id)
+            if not task_info or task_info['status'] not in ('queued', 'running'):
+                return False
+
+            task_info['cancel_requested'] = True
+            task_info['_cancel'].set()
+            if task_info['status'] == 'queued':
+                task_info.update({'status': 'cancelled', 'completed_at': datetime.now(), '_function': None})
+                if self._pending_keys.get(task_info['_key']) == task_id:
+                    del self._pending_keys[task_info['_key']]
+                self._metrics['cancelled'] += 1
+            return True
+
+    def is_cancelled(self) -> bool:
+        """Verifica se a tarefa em execução na thread atual foi cancelada"""
+        task_info = getattr(self._current, 'task', None)
+        return bool(task_info and task_info['_cancel'].is_set())
+
+    def raise_if_cancelled(self):
+        """Ponto de cancelamento cooperativo para as tarefas (no-op fora do pool)"""
+        if self.is_cancelled():
+            raise TaskCancelled()
+
+    @staticmethod
+    def _public(task_info: dict) -> Dict[str, Any]:
+        """Status da tarefa sem os campos internos"""
+        return {key: value for key, value in task_info.items() if not key.startswith('_')}
+
     def get_task_status(self, task_id: str) -> Optional[Dict[str, Any]]:
         """Retorna o status de uma tarefa"""
         with self.lock:
-            return self.results.get(task_id)
-    
+            self._evict_expired()
+            task_info = self.results.get(task_id)
+            return self._public(task_info) if task_info else None
+
     def get_task_result(self, task_id: str) -> Optional[Any]:
         """Retorna o resultado de uma tarefa se estiver concluída"""
         with self.lock:
@@ -72,31 +239,65 @@ class BackgroundTaskService:
             if task_info and task_info['status'] == 'completed':
                 return task_info['result']
             return None
-    
+
     def is_task_running(self, task_id: str) -> bool:
-        """Verifica se uma tarefa está rodando"""
+        """Verifica se uma tarefa está na fila ou rodando"""
         with self.lock:
             task_info = self.results.get(task_id)
-            return task_info and task_info['status'] == 'running'
-    
+            return bool(task_info and task_info['status'] in ('queued', 'running'))
+
+    def _evict_expired(self):
+        """Remove resultados finalizados há mais de result_ttl segundos (chamado com o lock)"""
+        self._remove_finished_before(datetime.now() - timedelta(seconds=self.result_ttl))
+
+    def _remove_finished_before(self, cutoff_time: datetime) -> int:
+        tasks_to_remove = [
+            task_id for task_id, task_info in self.results.items()
+            if task_info.get('completed_at') and task_info['completed_at'] < cutoff_time
+        ]
+        for task_id in tasks_to_remove:
+            del self.results[task_id]
+        self._metrics['evicted'] += len(tasks_to_remove)
+        return len(tasks_to_remove)
+
     def cleanup_old_tasks(self, max_age_hours: int = 24):
         """Remove tarefas antigas dos resultados"""
-        cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-        
         with self.lock:
-            tasks_to_remove = []
-            for task_id, task_info in self.results.items():
-                completed_at = task_info.get('completed_at')
-                if completed_at and completed_at < cutoff_time:
-                    tasks_to_remove.append(task_id)
-            
-            for task_id in tasks_to_remove:
-                del self.results[task_id]
-                if task_id in self.tasks:
-                    del self.tasks[task_id]
-            
-            if tasks_to_remove:
-                print(f"Removidas {len(tasks_to_remove)} tarefas antigas")
+            removed = self._remove_finished_before(datetime.now() - timedelta(hours=max_age_hours))
+        if removed:
+            print(f"Removidas {removed} tarefas antigas")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Retorna profundidade da fila, latências e contadores do pool"""
+        with self.lock:
+            self._evict_expired()
+            queued = [info for info in self.results.values() if info['status'] == 'queued']
+            running = sum(1 for info in self.results.values() if info['status'] == 'running')
+            by_priority: Dict[int, int] = {}
+            for info in queued:
+                by_priority[info['priority']] = by_priority.get(info['priority'], 0) + 1
+
+            metrics = dict(self._metrics)
+            started = metrics['started']
+            finished = started - running
+            oldest = min((info['_queued_ts'] for info in queued), default=None)
+
+            return {
+                'workers': self.max_workers,
+                'queue_depth': len(queued),
+                'queue_depth_by_priority': by_priority,
+                'oldest_queued_ms': round((time.time() - oldest) * 1000, 1) if oldest else 0,
+                'running': running,
+                'stored_results': len(self.results),
+                'result_ttl_seconds': self.result_ttl,
+                'avg_wait_ms': round(metrics.pop('total_wait_ms') / started, 1) if started else 0,
+                'avg_run_ms': round(metrics.pop('total_run_ms') / finished, 1) if finished else 0,
+                **{key: round(value, 1) if isinstance(value, float) else value
+                   for key, value in metrics.items() if not key.startswith('total_')}
+            }
 
 # Instância global do serviço
-background_service = BackgroundTaskService()
\ No newline at end of file
+background_service = BackgroundTaskService(
+    max_workers=int(os.getenv('BACKGROUND_WORKERS', '2')),
+    result_ttl=int(os.getenv('BACKGROUND_RESULT_TTL', '3600'))
+)
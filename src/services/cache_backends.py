@@ -0,0 +1,824 @@
+"""
+Backends de Cache Persistente
+Interface comum para o armazenamento do cache inteligente com implementações
+Supabase, SQLite local, memória pura e protocolo Redis (RESP)
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+# Colunas de um registro de cache (mesmo formato da tabela cache_data do Supabase)
+CACHE_COLUMNS = ('cache_key', 'data', 'expires_at', 'data_type', 'compressed', 'updated_at', 'content_hash', 'tags')
+# Colunas de metadados usadas na verificação de validade (sem o payload)
+META_COLUMNS = ('cache_key', 'expires_at', 'updated_at', 'content_hash', 'data_type')
+
+
+def _expires_timestamp(expires_at: str) -> float:
+    """Converte expires_at (ISO) em epoch no mesmo referencial de datetime.now()"""
+    parsed = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.timestamp()
+
+
+class CacheBackend(ABC):
+    """
+    Interface de armazenamento do cache inteligente
+
+    Todos os backends guardam registros no formato de cache_data e seguem a
+    mesma semântica: expires_at é absoluto, data_type agrupa as chaves e a
+    validação de expiração é feita pelo serviço de cache.
+    """
+
+    name = 'base'
+    # True quando o armazenamento é compartilhado entre processos/instâncias
+    shared = False
+
+    @abstractmethod
+    def fetch(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Retorna os registros existentes para as chaves informadas"""
+
+    @abstractmethod
+    def fetch_meta(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Retorna apenas os metadados (META_COLUMNS) dos registros, sem baixar data"""
+
+    @abstractmethod
+    def upsert(self, records: List[Dict[str, Any]]):
+        """Insere ou atualiza registros"""
+
+    @abstractmethod
+    def delete(self, keys: List[str]) -> int:
+        """Remove as chaves informadas"""
+
+    @abstractmethod
+    def delete_matching(self, pattern: Optional[str] = None, data_type: Optional[str] = None) -> int:
+        """Remove registros cuja chave contém o padrão e/ou do tipo informado (tudo se ambos None)"""
+
+    @abstractmethod
+    def delete_by_tags(self, tags: List[str]) -> int:
+        """Remove registros marcados com qualquer uma das tags"""
+
+    @abstractmethod
+    def delete_expired(self, now: datetime) -> int:
+        """Remove registros expirados"""
+
+    @abstractmethod
+    def count_by_type(self) -> Dict[str, int]:
+        """Retorna a quantidade de registros por data_type"""
+
+    @abstractmethod
+    def upsert_sync_status(self, record: Dict[str, Any]):
+        """Insere ou atualiza o status de sincronização de um tipo de dados"""
+
+    @abstractmethod
+    def list_sync_status(self, data_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lista status de sincronização (mais recentes primeiro)"""
+
+    @abstractmethod
+    def try_acquire_lease(self, lease_name: str, owner: str, ttl_seconds: float) -> bool:
+        """Adquire (ou renova) um lease se livre, expirado ou já do mesmo dono"""
+
+    @abstractmethod
+    def release_lease(self, lease_name: str, owner: str):
+        """Libera um lease se ainda pertencer ao dono"""
+
+
+class SupabaseCacheBackend(CacheBackend):
+    """Backend usando as tabelas cache_data e sync_status do Supabase"""
+
+    name = 'supabase'
+    shared = True
+
+    def __init__(self, url: Optional[str] = None, key: Optional[str] = None, client=None):
+        if client is None:
+            from supabase import create_client
+
+            url = url or os.getenv('SUPABASE_URL')
+            key = key or os.getenv('SUPABASE_KEY')
+            if not url or not key:
+                raise Exception("Variáveis SUPABASE_URL e SUPABASE_KEY são obrigatórias")
+            client = create_client(url, key)
+        self.supabase = client
+
+    def fetch(self, keys: List[str]) -> List[Dict[str, Any]]:
+        if not keys:
+            return []
+        query = self.supabase.table('cache_data').select('*')
+        if len(keys) == 1:
+            query = query.eq('cache_key', keys[0])
+        else:
+            query = query.in_('cache_key', keys)
+        result = query.execute()
+        return result.data or []
+
+    def fetch_meta(self, keys: List[str]) -> List[Dict[str, Any]]:
+        if not keys:
+            return []
+        query = self.supabase.table('cache_data').select(','.join(META_COLUMNS))
+        if len(keys) == 1:
+            query = query.eq('cache_key', keys[0])
+        else:
+            query = query.in_('cache_key', keys)
+        result = query.execute()
+        return result.data or []
+
+    def upsert(self, records: List[Dict[str, Any]]):
+        if records:
+            self.supabase.table('cache_data').upsert(records, on_conflict='cache_key').execute()
+
+    def delete(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        result = self.supabase.table('cache_data').delete().in_('cache_key', keys).execute()
+        return len(result.data) if result.data else 0
+
+    @staticmethod
+    def _like_contains(pattern: str) -> str:
+        """Padrão LIKE para 'contém', escapando curingas do Postgres"""
+        escaped = pattern.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return f'%{escaped}%'
+
+    def delete_matching(self, pattern: Optional[str] = None, data_type: Optional[str] = None) -> int:
+        # Um único DELETE filtrado no servidor
+        query = self.supabase.table('cache_data').delete()
+        if pattern:
+            query = query.like('cache_key', self._like_contains(pattern))
+        if data_type:
+            query = query.eq('data_type', data_type)
+        if not pattern and not data_type:
+            query = query.neq('cache_key', '')
+        result = query.execute()
+        return len(result.data) if result.data else 0
+
+    def delete_by_tags(self, tags: List[str]) -> int:
+        if not tags:
+            return 0
+        result = self.supabase.table('cache_data').delete().overlaps('tags', list(tags)).execute()
+        return len(result.data) if result.data else 0
+
+    def delete_expired(self, now: datetime) -> int:
+        result = self.supabase.table('cache_data').delete().lt('expires_at', now.isoformat()).execute()
+        return len(result.data) if result.data else 0
+
+    def count_by_type(self) -> Dict[str, int]:
+        result = self.supabase.table('cache_data').select('data_type', count='exact').execute()
+        type_stats: Dict[str, int] = {}
+        for row in result.data or []:
+            data_type = row.get('data_type', 'unknown')
+            type_stats[data_type] = type_stats.get(data_type, 0) + 1
+        return type_stats
+
+    def upsert_sync_status(self, record: Dict[str, Any]):
+        self.supabase.table('sync_status').upsert(record).execute()
+
+    def list_sync_status(self, data_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = self.supabase.table('sync_status').select('*')
+        if data_type:
+            query = query.eq('data_type', data_type)
+        result = query.order('last_sync', desc=True).execute()
+        return result.data if result.data else []
+
+    def try_acquire_lease(self, lease_name: str, owner: str, ttl_seconds: float) -> bool:
+        now = datetime.now().astimezone()
+        lease = {'owner': owner, 'expires_at': (now + timedelta(seconds=ttl_seconds)).isoformat()}
+        table = self.supabase.table('cache_leases')
+
+        # Atualizações condicionais são atômicas por linha: renovar o próprio lease ou tomar um expirado
+        result = table.update(lease).eq('name', lease_name).eq('owner', owner).execute()
+        if result.data:
+            return True
+        result = table.update(lease).eq('name', lease_name).lt('expires_at', now.isoformat()).execute()
+        if result.data:
+            return True
+
+        try:
+            table.insert({'name': lease_name, **lease}).execute()
+            return True
+        except Exception as e:
+            # Violação de chave única: outro processo detém o lease
+            if getattr(e, 'code', None) == '23505':
+                return False
+            raise
+
+    def release_lease(self, lease_name: str, owner: str):
+        self.supabase.table('cache_leases').delete().eq('name', lease_name).eq('owner', owner).execute()
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """Backend em arquivo SQLite local (persistente e compartilhado entre workers do mesmo host)"""
+
+    name = 'sqlite'
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Uma conexão por thread (e por processo, após fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_data (
+                cache_key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at TEXT NOT NULL,
+                data_type TEXT NOT NULL,
+                compressed INTEGER DEFAULT 0,
+                updated_at TEXT,
+                content_hash TEXT,
+                tags TEXT DEFAULT ''
+            )
+        ''')
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(cache_data)')}
+        if 'content_hash' not in columns:
+            conn.execute('ALTER TABLE cache_data ADD COLUMN content_hash TEXT')
+        if 'tags' not in columns:
+            conn.execute("ALTER TABLE cache_data ADD COLUMN tags TEXT DEFAULT ''")
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_data_type ON cache_data(data_type)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_expires_at ON cache_data(expires_at)')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sync_status (
+                data_type TEXT PRIMARY KEY,
+                last_sync TEXT NOT NULL,
+                status TEXT NOT NULL,
+                records_count INTEGER DEFAULT 0,
+                error_message TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cache_leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+
+    @staticmethod
+    def _encode_tags(tags: Optional[List[str]]) -> str:
+        """Tags em uma coluna TEXT delimitada ('|a|b|') para busca com instr()"""
+        return f"|{'|'.join(tags)}|" if tags else ''
+
+    @staticmethod
+    def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record['compressed'] = bool(record.get('compressed'))
+        record['tags'] = [tag for tag in (record.get('tags') or '').split('|') if tag]
+        return record
+
+    def fetch(self, keys: List[str]) -> List[Dict[str, Any]]:
+        if not keys:
+            return []
+        placeholders = ','.join('?' for _ in keys)
+        rows = self._connect().execute(
+            f'SELECT * FROM cache_data WHERE cache_key IN ({placeholders})', list(keys)
+        ).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
+    def fetch_meta(self, keys: List[str]) -> List[Dict[str, Any]]:
+        if not keys:
+            return []
+        placeholders = ','.join('?' for _ in keys)
+        rows = self._connect().execute(
+            f"SELECT {', '.join(META_COLUMNS)} FROM cache_data WHERE cache_key IN ({placeholders})", list(keys)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def upsert(self, records: List[Dict[str, Any]]):
+        if not records:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT OR REPLACE INTO cache_data '
+                '(cache_key, data, expires_at, data_type, compressed, updated_at, content_hash, tags) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (r['cache_key'], r['data'], r['expires_at'], r['data_type'],
+                     int(bool(r.get('compressed'))), r.get('updated_at'), r.get('content_hash'),
+                     self._encode_tags(r.get('tags')))
+                    for r in records
+                ]
+            )
+
+    def delete(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        placeholders = ','.join('?' for _ in keys)
+        cursor = self._connect().execute(
+            f'DELETE FROM cache_data WHERE cache_key IN ({placeholders})', list(keys)
+        )
+        return cursor.rowcount
+
+    def delete_matching(self, pattern: Optional[str] = None, data_type: Optional[str] = None) -> int:
+        clauses, params = [], []
+        if pattern:
+            clauses.append("instr(cache_key, ?) > 0")
+            params.append(pattern)
+        if data_type:
+            clauses.append('data_type = ?')
+            params.append(data_type)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self._connect().execute(f'DELETE FROM cache_data{where}', params).rowcount
+
+    def delete_by_tags(self, tags: List[str]) -> int:
+        if not tags:
+            return 0
+        clauses = ' OR '.join('instr(tags, ?) > 0' for _ in tags)
+        return self._connect().execute(
+            f'DELETE FROM cache_data WHERE {clauses}', [f'|{tag}|' for tag in tags]
+        ).rowcount
+
+    def delete_expired(self, now: datetime) -> int:
+        return self._connect().execute(
+            'DELETE FROM cache_data WHERE expires_at < ?', (now.isoformat(),)
+        ).rowcount
+
+    def count_by_type(self) -> Dict[str, int]:
+        rows = self._connect().execute(
+            'SELECT data_type, COUNT(*) AS total FROM cache_data GROUP BY data_type'
+        ).fetchall()
+        return {row['data_type']: row['total'] for row in rows}
+
+    def upsert_sync_status(self, record: Dict[str, Any]):
+        self._connect().execute(
+            'INSERT OR REPLACE INTO sync_status (data_type, last_sync, status, records_count, error_message) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (record['data_type'], record['last_sync'], record['status'],
+             record.get('records_count', 0), record.get('error_message'))
+        )
+
+    def list_sync_status(self, data_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = 'SELECT * FROM sync_status'
+        params: List[Any] = []
+        if data_type:
+            query += ' WHERE data_type = ?'
+            params.append(data_type)
+        rows = self._connect().execute(query + ' ORDER BY last_sync DESC', params).fetchall()
+        return [dict(row) for row in rows]
+
+    def try_acquire_lease(self, lease_name: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        cursor = self._connect().execute(
+            'INSERT INTO cache_leases (name, owner, expires_at) VALUES (?, ?, ?) '
+            'ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at '
+            'WHERE cache_leases.owner = excluded.owner OR cache_leases.expires_at < ?',
+            (lease_name, owner, now + ttl_seconds, now)
+        )
+        return cursor.rowcount == 1
+
+    def release_lease(self, lease_name: str, owner: str):
+        self._connect().execute('DELETE FROM cache_leases WHERE name = ? AND owner = ?', (lease_name, owner))
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Backend puramente em memória (por processo; ideal para testes offline)"""
+
+    name = 'memory'
+    shared = False
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._sync_status: Dict[str, Dict[str, Any]] = {}
+        self._leases: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, keys: List[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [deepcopy(self._records[key]) for key in keys if key in self._records]
+
+    def fetch_meta(self, keys: List[str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {column: self._records[key].get(column) for column in META_COLUMNS}
+                for key in keys if key in self._records
+            ]
+
+    def upsert(self, records: List[Dict[str, Any]]):
+        with self._lock:
+            for record in records:
+                self._records[record['cache_key']] = deepcopy(record)
+
+    def delete(self, keys: List[str]) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._records.pop(key, None) is not None)
+
+    def delete_matching(self, pattern: Optional[str] = None, data_type: Optional[str] = None) -> int:
+        with self._lock:
+            keys = [
+                key for key, record in self._records.items()
+                if (pattern is None or pattern in key)
+                and (data_type is None or record.get('data_type') == data_type)
+            ]
+            for key in keys:
+                del self._records[key]
+            return len(keys)
+
+    def delete_by_tags(self, tags: List[str]) -> int:
+        tags = set(tags)
+        with self._lock:
+            keys = [key for key, record in self._records.items() if tags.intersection(record.get('tags') or ())]
+            for key in keys:
+                del self._records[key]
+            return len(keys)
+
+    def delete_expired(self, now: datetime) -> int:
+        now_ts = now.timestamp()
+        with self._lock:
+            keys = [
+                key for key, record in self._records.items()
+                if _expires_timestamp(record['expires_at']) < now_ts
+            ]
+            for key in keys:
+                del self._records[key]
+            return len(keys)
+
+    def count_by_type(self) -> Dict[str, int]:
+        with self._lock:
+            type_stats: Dict[str, int] = {}
+            for record in self._records.values():
+                data_type = record.get('data_type', 'unknown')
+                type_stats[data_type] = type_stats.get(data_type, 0) + 1
+            return type_stats
+
+    def upsert_sync_status(self, record: Dict[str, Any]):
+        with self._lock:
+            self._sync_status[record['data_type']] = dict(record)
+
+    def list_sync_status(self, data_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [dict(row) for row in self._sync_status.values()
+                    if data_type is None or row['data_type'] == data_type]
+        return sorted(rows, key=lambda row: row['last_sync'], reverse=True)
+
+    def try_acquire_lease(self, lease_name: str, owner: str, ttl_seconds: float) -> bool:
+        now = time.time()
+        with self._lock:
+            current = self._leases.get(lease_name)
+            if current and current[0] != owner and current[1] > now:
+                return False
+            self._leases[lease_name] = (owner, now + ttl_seconds)
+            return True
+
+    def release_lease(self, lease_name: str, owner: str):
+        with self._lock:
+            current = self._leases.get(lease_name)
+            if current and current[0] == owner:
+                del self._leases[lease_name]
+
+
+class RespError(Exception):
+    """Erro retornado por um servidor que fala o protocolo Redis"""
+
+
+class RespClient:
+    """Cliente mínimo do protocolo Redis (RESP2), sem dependências externas"""
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 password: Optional[str] = None, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url: str, timeout: float = 5.0) -> 'RespClient':
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or 'localhost', parsed.port or 6379, db, parsed.password, timeout)
+
+    def _connect(self):
+        if self._sock is not None and self._pid == os.getpid():
+            return
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock = sock
+        self._reader = sock.makefile('rb')
+        self._pid = os.getpid()
+        if self.password:
+            self._send(('AUTH', self.password))
+        if self.db:
+            self._send(('SELECT', self.db))
+
+    def _close(self):
+        try:
+            if self._sock is not None:
+                self._sock.close()
+        finally:
+            self._sock = None
+            self._reader = None
+
+    @staticmethod
+    def _encode(args) -> bytes:
+        parts = [f'*{len(args)}\r\n'.encode()]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            else:
+                data = str(arg).encode('utf-8')
+            parts.append(f'${len(data)}\r\n'.encode() + data + b'\r\n')
+        return b''.join(parts)
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError('Conexão encerrada pelo servidor')
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload.decode('utf-8')
+        if prefix == b'-':
+            raise RespError(payload.decode('utf-8'))
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2].decode('utf-8')
+        if prefix == b'*':
+            count = int(payload)
+            if count == -1:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise RespError(f'Resposta RESP inválida: {line!r}')
+
+    def _send(self, args):
+        self._sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def execute(self, *args):
+        """Executa um comando (reconecta uma vez em caso de falha de conexão)"""
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._connect()
+                    return self._send(args)
+                except (ConnectionError, OSError):
+                    self._close()
+                    if attempt:
+                        raise
+
+    def pipeline(self, commands: List[tuple]) -> List[Any]:
+        """
+        Envia vários comandos em uma única escrita e lê as respostas em ordem
+
+        Todas as respostas são lidas antes de propagar o primeiro erro, para a
+        conexão continuar sincronizada.
+        """
+        if not commands:
+            return []
+        payload = b''.join(self._encode(args) for args in commands)
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    self._connect()
+                    self._sock.sendall(payload)
+                    replies, error = [], None
+                    for _ in commands:
+                        try:
+                            replies.append(self._read_reply())
+                        except RespError as e:
+                            replies.append(e)
+                            error = error or e
+                    break
+                except (ConnectionError, OSError):
+                    self._close()
+                    if attempt:
+                        raise
+        if error is not None:
+            raise error
+        return replies
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend compatível com o protocolo Redis (Redis, KeyDB, Valkey ou um substituto local)"""
+
+    name = 'redis'
+    shared = True
+
+    def __init__(self, url: Optional[str] = None, prefix: str = 'financeiro:', client: Optional[RespClient] = None):
+        self.client = client or RespClient.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        self.prefix = prefix
+
+    def _data_key(self, key: str) -> str:
+        return f'{self.prefix}data:{key}'
+
+    def _meta_key(self, key: str) -> str:
+        return f'{self.prefix}meta:{key}'
+
+    def _tag_key(self, tag: str) -> str:
+        return f'{self.prefix}tag:{tag}'
+
+    def _scan(self, match: str) -> List[str]:
+        keys, cursor = [], '0'
+        while True:
+            cursor, batch = self.client.execute('SCAN', cursor, 'MATCH', match, 'COUNT', 500)
+            keys.extend(batch)
+            if cursor == '0':
+                return keys
+
+    def _records_for(self, redis_keys: List[str]) -> List[Dict[str, Any]]:
+        if not redis_keys:
+            return []
+        values = self.client.execute('MGET', *redis_keys)
+        return [json.loads(value) for value in values if value is not None]
+
+    def fetch(self, keys: List[str]) -> List[Dict[str, Any]]:
+        return self._records_for([self._data_key(key) for key in keys])
+
+    def _meta_for(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Metadados gravados (incluindo as tags) de cada chave, None se ausente"""
+        if not keys:
+            return []
+        values = self.client.execute('MGET', *[self._meta_key(key) for key in keys])
+        return [json.loads(value) if value is not None else None for value in values]
+
+    def fetch_meta(self, keys: List[str]) -> List[Dict[str, Any]]:
+        return [{column: meta.get(column) for column in META_COLUMNS}
+                for meta in self._meta_for(keys) if meta is not None]
+
+    def upsert(self, records: List[Dict[str, Any]]):
+        """
+        Grava payload e metadados com expiração (SET ... PXAT) em um pipeline
+
+        Os índices de tags expiram junto com o registro mais longo que contêm,
+        e tags que o registro deixou de ter são removidas do índice.
+        """
+        if not records:
+            return
+        previous = self._meta_for([record['cache_key'] for record in records])
+        commands = []
+        for record, old_meta in zip(records, previous):
+            key = record['cache_key']
+            tags = list(record.get('tags') or ())
+            expires_ms = int(_expires_timestamp(record['expires_at']) * 1000)
+            meta = {column: record.get(column) for column in META_COLUMNS}
+            meta['tags'] = tags
+            commands.append(('SET', self._data_key(key), json.dumps(record, ensure_ascii=False), 'PXAT', expires_ms))
+            commands.append(('SET', self._meta_key(key), json.dumps(meta, ensure_ascii=False), 'PXAT', expires_ms))
+            for tag in tags:
+                commands.append(('EVAL', self._TAG_SCRIPT, 1, self._tag_key(tag), key, expires_ms))
+            for tag in set((old_meta or {}).get('tags') or ()) - set(tags):
+                commands.append(('SREM', self._tag_key(tag), key))
+        self.client.pipeline(commands)
+
+    def _delete_redis_keys(self, keys: List[str]) -> int:
+        """Remove payload, metadados e entradas nos índices de tags; retorna o número de registros removidos"""
+        if not keys:
+            return 0
+        commands = [
+            ('SREM', self._tag_key(tag), key)
+            for key, meta in zip(keys, self._meta_for(keys)) if meta
+            for tag in meta.get('tags') or ()
+        ]
+        commands.append(('DEL', *[self._meta_key(key) for key in keys]))
+        commands.append(('DEL', *[self._data_key(key) for key in keys]))
+        return self.client.pipeline(commands)[-1]
+
+    def delete(self, keys: List[str]) -> int:
+        return self._delete_redis_keys(keys)
+
+    def delete_matching(self, pattern: Optional[str] = None, data_type: Optional[str] = None) -> int:
+        match = self._data_key('*')
+        if pattern:
+            escaped = ''.join(f'[{c}]' if c in '*?[]\\' else c for c in pattern)
+            match = self._data_key(f'*{escaped}*')
+        data_prefix = len(self._data_key(''))
+        keys = [redis_key[data_prefix:] for redis_key in self._scan(match)]
+        if data_type:
+            keys = [
+                record['cache_key'] for record in self.fetch_meta(keys)
+                if record.get('data_type') == data_type
+            ]
+        return self._delete_redis_keys(keys)
+
+    def delete_by_tags(self, tags: List[str]) -> int:
+        if not tags:
+            return 0
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        keys = self.client.execute('SUNION', *tag_keys) or []
+        removed = self._delete_redis_keys(keys)
+        self.client.execute('DEL', *tag_keys)
+        return removed
+
+    def delete_expired(self, now: datetime) -> int:
+        """
+        O próprio servidor remove os registros expirados (PXAT); aqui apenas
+        as entradas órfãs dos índices de tags são podadas
+        """
+        for tag_key in self._scan(self._tag_key('*')):
+            members = self.client.execute('SMEMBERS', tag_key) or []
+            exists = self.client.pipeline([('EXISTS', self._data_key(member)) for member in members])
+            stale = [member for member, found in zip(members, exists) if not found]
+            if stale:
+                self.client.execute('SREM', tag_key, *stale)
+        return 0
+
+    def count_by_type(self) -> Dict[str, int]:
+        type_stats: Dict[str, int] = {}
+        for record in self._records_for(self._scan(self._meta_key('*'))):
+            data_type = record.get('data_type', 'unknown')
+            type_stats[data_type] = type_stats.get(data_type, 0) + 1
+        return type_stats
+
+    def upsert_sync_status(self, record: Dict[str, Any]):
+        self.client.execute('HSET', f'{self.prefix}sync_status', record['data_type'],
+                            json.dumps(record, ensure_ascii=False))
+
+    def list_sync_status(self, data_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        if data_type:
+            value = self.client.execute('HGET', f'{self.prefix}sync_status', data_type)
+            return [json.loads(value)] if value else []
+        values = self.client.execute('HVALS', f'{self.prefix}sync_status') or []
+        rows = [json.loads(value) for value in values]
+        return sorted(rows, key=lambda row: row['last_sync'], reverse=True)
+
+    # Adiciona ao índice da tag e estende sua expiração até a do registro (nunca a reduz)
+    _TAG_SCRIPT = (
+        "redis.call('SADD', KEYS[1], ARGV[1]) "
+        "local ttl = redis.call('PTTL', KEYS[1]) "
+        "local now = redis.call('TIME') "
+        "if ttl < 0 or tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000) + ttl < tonumber(ARGV[2]) then "
+        "redis.call('PEXPIREAT', KEYS[1], ARGV[2]) end "
+        "return 1"
+    )
+
+    # Renova ou adquire atomicamente: SET NX, ou PEXPIRE se o dono for o mesmo
+    _ACQUIRE_SCRIPT = (
+        "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+        "return redis.call('PEXPIRE', KEYS[1], ARGV[2]) end "
+        "if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then return 1 end "
+        "return 0"
+    )
+    _RELEASE_SCRIPT = (
+        "if redis.call('GET', KEYS[1]) == ARGV[1] then "
+        "return redis.call('DEL', KEYS[1]) end return 0"
+    )
+
+    def try_acquire_lease(self, lease_name: str, owner: str, ttl_seconds: float) -> bool:
+        return bool(self.client.execute('EVAL', self._ACQUIRE_SCRIPT, 1, f'{self.prefix}lease:{lease_name}',
+                                        owner, int(ttl_seconds * 1000)))
+
+    def release_lease(self, lease_name: str, owner: str):
+        self.client.execute('EVAL', self._RELEASE_SCRIPT, 1, f'{self.prefix}lease:{lease_name}', owner)
+
+
+def _supabase_configured() -> bool:
+    url = os.getenv('SUPABASE_URL')
+    return bool(url and os.getenv('SUPABASE_KEY') and url != 'your_supabase_url_here')
+
+
+def default_sqlite_path() -> str:
+    """Caminho padrão do banco SQLite de cache (src/cache_data/cache.sqlite3)"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.getenv('CACHE_SQLITE_PATH', os.path.join(base_dir, 'cache_data', 'cache.sqlite3'))
+
+
+def create_cache_backend(backend_name: Optional[str] = None) -> CacheBackend:
+    """
+    Cria o backend configurado em CACHE_BACKEND (supabase, sqlite, memory ou redis)
+
+    Sem configuração explícita usa Supabase quando configurado e SQLite local caso contrário.
+    """
+    backend_name = (backend_name or os.getenv('CACHE_BACKEND', '')).strip().lower()
+    if not backend_name:
+        backend_name = 'supabase' if _supabase_configured() else 'sqlite'
+
+    if backend_name == 'supabase':
+        return SupabaseCacheBackend()
+    if backend_name == 'sqlite':
+        return SQLiteCacheBackend(default_sqlite_path())
+    if backend_name == 'memory':
+        return InMemoryCacheBackend()
+    if backend_name == 'redis':
+        return RedisCacheBackend(os.getenv('REDIS_URL'))
+
+    raise ValueError(f"CACHE_BACKEND inválido: {backend_name}")
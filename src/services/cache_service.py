@@ -1,32 +1,46 @@
 """
 Sistema de Cache Inteligente com Supabase
 Implementa cache persistente com diferentes TTLs baseados no tipo de dados
+(backend plugável: Supabase, SQLite local, memória ou Redis)
 """
 
-import json
+import asyncio
+import atexit
+import hashlib
 import gzip
 import base64
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, List
-from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
 
+from .async_runtime import run_sync
+from . import json_codec
+from .cache_backends import CacheBackend, create_cache_backend
+from .invalidation import invalidation_bus
+from .memory_cache import memory_cache, CacheNamespace
+from .write_behind import WriteBehindQueue
+
 load_dotenv()
 
+# Intervalo mínimo (segundos) entre duas limpezas de registros expirados
+_MAINTENANCE_MIN_GAP = 30
+
 class SupabaseCacheService:
-    """Serviço de cache inteligente usando Supabase como backend persistente"""
+    """Serviço de cache inteligente com backend persistente plugável (Supabase por padrão)"""
     
-    def __init__(self):
-        """Inicializa o serviço de cache com conexão Supabase"""
-        self.supabase_url = os.getenv('SUPABASE_URL')
-        self.supabase_key = os.getenv('SUPABASE_KEY')
-        
-        if not self.supabase_url or not self.supabase_key:
-            raise Exception("Variáveis SUPABASE_URL e SUPABASE_KEY são obrigatórias")
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        """
+        Inicializa o serviço de cache
         
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-        self.local_cache: Dict[str, tuple] = {}  # Cache em memória para dados frequentes
+        Args:
+            backend: Backend persistente (opcional, padrão definido por CACHE_BACKEND)
+        """
+        self.backend: CacheBackend = backend or create_cache_backend()
+        # Cache em memória para dados frequentes (LRU compartilhado com orçamento de bytes)
+        self.local_cache: CacheNamespace = memory_cache.namespace('intelligent')
         
         # TTLs configuráveis por tipo de dados (em horas)
         self.ttl_config = {
@@ -39,31 +53,58 @@ class SupabaseCacheService:
             'dashboard': 0.5,       # Dashboard: 30 minutos
             'default': 1            # Padrão: 1 hora
         }
+        
+        # Write-behind: gravações remotas em lote fora da thread da requisição
+        self.write_behind: Optional[WriteBehindQueue] = None
+        if os.getenv('CACHE_WRITE_BEHIND', '1').lower() not in ('0', 'false', 'no'):
+            self.write_behind = WriteBehindQueue(
+                build_record=self._build_record,
+                write_records=self._upsert_records,
+                max_size=int(os.getenv('CACHE_WRITE_BEHIND_MAX_SIZE', '500')),
+                batch_size=int(os.getenv('CACHE_WRITE_BEHIND_BATCH_SIZE', '50')),
+                flush_interval=float(os.getenv('CACHE_WRITE_BEHIND_INTERVAL', '1.0'))
+            )
+            atexit.register(self.flush_writes)
+        
+        # Manutenção em background: remoção de registros expirados fora do caminho de leitura
+        self.maintenance_interval = float(os.getenv('CACHE_MAINTENANCE_INTERVAL', '300'))
+        self._maintenance_event = threading.Event()
+        self._maintenance_thread: Optional[threading.Thread] = None
+        self._maintenance_pid: Optional[int] = None
+        self._maintenance_lock = threading.Lock()
+        
+        # Métricas das leituras remotas
+        self._read_stats = {
+            'revalidated': 0,        # Entradas locais vencidas confirmadas só pelos metadados
+            'downloaded': 0,         # Payloads baixados do backend
+            'expired_seen': 0,       # Registros expirados encontrados na leitura
+            'maintenance_runs': 0,
+            'maintenance_removed': 0,
+            'last_maintenance_at': None
+        }
     
     def _compress_data(self, data: Any) -> str:
         """Comprime dados usando gzip e base64"""
         try:
-            json_str = json.dumps(data, ensure_ascii=False)
-            compressed = gzip.compress(json_str.encode('utf-8'))
+            compressed = gzip.compress(json_codec.dumps_bytes(data))
             return base64.b64encode(compressed).decode('ascii')
         except Exception as e:
             print(f"Erro ao comprimir dados: {e}")
-            return json.dumps(data, ensure_ascii=False)
+            return json_codec.dumps(data)
     
     def _decompress_data(self, compressed_data: str, is_compressed: bool = True) -> Any:
         """Descomprime dados de gzip+base64"""
         try:
             if not is_compressed:
-                return json.loads(compressed_data)
+                return json_codec.loads(compressed_data)
             
             compressed_bytes = base64.b64decode(compressed_data.encode('ascii'))
-            decompressed = gzip.decompress(compressed_bytes)
-            return json.loads(decompressed.decode('utf-8'))
+            return json_codec.loads(gzip.decompress(compressed_bytes))
         except Exception as e:
             print(f"Erro ao descomprimir dados: {e}")
             # Fallback para dados não comprimidos
             try:
-                return json.loads(compressed_data)
+                return json_codec.loads(compressed_data)
             except:
                 return None
     
@@ -71,6 +112,96 @@ class SupabaseCacheService:
         """Retorna TTL em horas baseado no tipo de dados"""
         return self.ttl_config.get(data_type, self.ttl_config['default'])
     
+    @staticmethod
+    def _parse_expiration(expires_at: str) -> datetime:
+        """Converte expires_at (ISO) em datetime sem timezone"""
+        return datetime.fromisoformat(expires_at.replace('Z', '+00:00')).replace(tzinfo=None)
+    
+    @staticmethod
+    def _record_version(cache_entry: Dict[str, Any]) -> Optional[str]:
+        """Versão de um registro: hash do conteúdo (ou updated_at em registros antigos)"""
+        return cache_entry.get('content_hash') or cache_entry.get('updated_at')
+    
+    def _parse_entry(self, cache_entry: Dict[str, Any]) -> Optional[tuple]:
+        """Converte uma linha de cache_data em (dados, expires_at) se ainda válida"""
+        expires_at = self._parse_expiration(cache_entry['expires_at'])
+        
+        if datetime.now() >= expires_at:
+            return None
+        
+        data = self._decompress_data(
+            cache_entry['data'], 
+            cache_entry.get('compressed', False)
+        )
+        if data is None:
+            return None
+        
+        return data, expires_at
+    
+    def _get_expiration(self, data_type: str, ttl_hours: Optional[float]) -> tuple:
+        """Calcula (expires_at, ttl_hours) para um registro"""
+        if ttl_hours is None:
+            ttl_hours = self._get_ttl_hours(data_type)
+        return datetime.now() + timedelta(hours=ttl_hours), ttl_hours
+    
+    def _build_record(self, key: str, data: Any, data_type: str, 
+                      expires_at: datetime, tags: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Monta o registro de cache_data (com compressão se necessário)"""
+        # Serializar uma única vez e comprimir se > 1KB
+        json_bytes = json_codec.dumps_bytes(data)
+        should_compress = len(json_bytes) > 1024
+        content_hash = hashlib.sha256(json_bytes).hexdigest()
+        
+        # Marcar a cópia local com a versão gravada (permite revalidar sem baixar)
+        self.local_cache.set_version(key, content_hash, value=data)
+        
+        if should_compress:
+            stored_data = base64.b64encode(gzip.compress(json_bytes)).decode('ascii')
+        else:
+            stored_data = json_bytes.decode('utf-8')
+        
+        return {
+            'cache_key': key,
+            'data': stored_data,
+            'expires_at': expires_at.isoformat(),
+            'data_type': data_type,
+            'compressed': should_compress,
+            'updated_at': datetime.now().isoformat(),
+            'content_hash': content_hash,
+            'tags': list(tags or [])
+        }
+    
+    def _fetch_entries(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Busca (bloqueante) registros do backend para as chaves informadas"""
+        return self.backend.fetch(keys)
+    
+    def _fetch_meta(self, keys: List[str]) -> List[Dict[str, Any]]:
+        """Busca (bloqueante) apenas expires_at/updated_at/content_hash das chaves"""
+        return self.backend.fetch_meta(keys)
+    
+    def _delete_keys(self, keys: List[str]):
+        """Remove (bloqueante) chaves do backend em uma única operação"""
+        if keys:
+            self.backend.delete(keys)
+    
+    def _upsert_records(self, records: List[Dict[str, Any]]):
+        """Grava (bloqueante) registros no backend em uma única operação"""
+        if records:
+            self.backend.upsert(records)
+    
+    def _get_local(self, key: str, data_type: str = 'default') -> Optional[Any]:
+        """Consulta apenas o cache em memória"""
+        local = self.local_cache.lookup(key, data_type)
+        if local is None or not local[2]:
+            return None
+        return local[0]
+    
+    def _set_local(self, key: str, data: Any, data_type: str, expires_at: datetime,
+                   version: Optional[str] = None, tags: Optional[List[str]] = None):
+        """Armazena no cache em memória com a mesma expiração do registro remoto"""
+        self.local_cache.set(key, data, data_type, expires_at=expires_at.timestamp(),
+                             version=version, tags=tags)
+    
     async def get(self, key: str, data_type: str = 'default') -> Optional[Any]:
         """
         Recupera dados do cache
@@ -82,46 +213,97 @@ class SupabaseCacheService:
         Returns:
             Dados do cache ou None se não encontrado/expirado
         """
+        results = await self.get_many([key], data_type)
+        return results.get(key)
+    
+    async def get_many(self, keys: List[str], data_type: str = 'default') -> Dict[str, Any]:
+        """
+        Recupera várias chaves do cache com uma única ida ao backend
+        
+        Args:
+            keys: Chaves do cache
+            data_type: Tipo de dados para determinar TTL
+            
+        Returns:
+            Dicionário chave -> dados apenas para as chaves encontradas e válidas
+        """
+        found: Dict[str, Any] = {}
         try:
             # 1. Verificar cache local primeiro (mais rápido)
-            if key in self.local_cache:
-                data, expires_at = self.local_cache[key]
-                if datetime.now() < expires_at:
-                    return data
+            missing = []
+            stale: Dict[str, tuple] = {}
+            for key in keys:
+                local = self.local_cache.lookup(key, data_type)
+                if local is None:
+                    missing.append(key)
+                    continue
+                
+                data, version, fresh = local
+                if fresh:
+                    found[key] = data
                 else:
-                    # Remove entrada expirada do cache local
-                    del self.local_cache[key]
-            
-            # 2. Verificar cache no Supabase
-            result = self.supabase.table('cache_data').select('*').eq('cache_key', key).execute()
-            
-            if result.data and len(result.data) > 0:
-                cache_entry = result.data[0]
-                expires_at = datetime.fromisoformat(cache_entry['expires_at'].replace('Z', '+00:00'))
+                    missing.append(key)
+                    if version:
+                        stale[key] = (data, version)
+            
+            if not missing:
+                return found
+            
+            self._ensure_maintenance()
+            expired_seen = 0
+            to_download = [key for key in missing if key not in stale]
+            
+            # 2. Entradas locais vencidas: validar só pelos metadados (sem baixar data)
+            if stale:
+                metas = await asyncio.to_thread(self._fetch_meta, list(stale))
+                for meta in metas:
+                    key = meta['cache_key']
+                    expires_at = self._parse_expiration(meta['expires_at'])
+                    if datetime.now() >= expires_at:
+                        expired_seen += 1
+                        continue
+                    
+                    data, version = stale[key]
+                    if self._record_version(meta) == version:
+                        # Conteúdo não mudou: renovar a cópia local
+                        self.local_cache.refresh(key, expires_at.timestamp())
+                        found[key] = data
+                        self._read_stats['revalidated'] += 1
+                    else:
+                        to_download.append(key)
+            
+            # 3. Baixar o payload apenas das chaves sem cópia local ou que mudaram
+            if to_download:
+                entries = await asyncio.to_thread(self._fetch_entries, to_download)
                 
-                if datetime.now() < expires_at.replace(tzinfo=None):
-                    # Dados ainda válidos
-                    data = self._decompress_data(
-                        cache_entry['data'], 
-                        cache_entry.get('compressed', False)
-                    )
+                for cache_entry in entries:
+                    key = cache_entry['cache_key']
+                    parsed = self._parse_entry(cache_entry)
+                    if parsed is None:
+                        expired_seen += 1
+                        continue
                     
-                    if data is not None:
-                        # Adicionar ao cache local para próximas consultas
-                        self.local_cache[key] = (data, expires_at.replace(tzinfo=None))
-                        return data
-                else:
-                    # Dados expirados - remover do Supabase
-                    self.supabase.table('cache_data').delete().eq('cache_key', key).execute()
+                    data, expires_at = parsed
+                    # Adicionar ao cache local para próximas consultas
+                    self._set_local(key, data, cache_entry.get('data_type', data_type), expires_at,
+                                    version=self._record_version(cache_entry),
+                                    tags=cache_entry.get('tags'))
+                    found[key] = data
+                    self._read_stats['downloaded'] += 1
             
-            return None
+            if expired_seen:
+                # Registros expirados são removidos pela manutenção em background
+                self._read_stats['expired_seen'] += expired_seen
+                self._request_maintenance()
+            
+            return found
             
         except Exception as e:
-            print(f"Erro ao recuperar do cache {key}: {e}")
-            return None
+            print(f"Erro ao recuperar do cache {keys}: {e}")
+            return found
     
     async def set(self, key: str, data: Any, data_type: str = 'default', 
-                  ttl_hours: Optional[float] = None) -> bool:
+                  ttl_hours: Optional[float] = None, tags: Optional[List[str]] = None) -> bool:
         """
         Armazena dados no cache
         
@@ -130,49 +312,167 @@ class SupabaseCacheService:
             data: Dados para armazenar
             data_type: Tipo de dados para determinar TTL
             ttl_hours: TTL customizado em horas (opcional)
+            tags: Tags de invalidação (opcional)
             
         Returns:
             True se armazenado com sucesso
         """
-        try:
-            # Determinar TTL
-            if ttl_hours is None:
-                ttl_hours = self._get_ttl_hours(data_type)
-            
-            expires_at = datetime.now() + timedelta(hours=ttl_hours)
-            
-            # Comprimir dados se forem grandes
-            data_size = len(json.dumps(data, ensure_ascii=False))
-            should_compress = data_size > 1024  # Comprimir se > 1KB
-            
-            if should_compress:
-                compressed_data = self._compress_data(data)
-            else:
-                compressed_data = json.dumps(data, ensure_ascii=False)
+        return await self.set_many({key: data}, data_type, ttl_hours, tags)
+    
+    async def set_many(self, items: Dict[str, Any], data_type: str = 'default', 
+                       ttl_hours: Optional[float] = None, tags: Optional[List[str]] = None) -> bool:
+        """
+        Armazena várias chaves no cache com um único upsert
+        
+        Com write-behind ativo, o cache local é atualizado imediatamente e a
+        gravação remota é enfileirada; só há escrita síncrona se a fila estiver cheia.
+        
+        Args:
+            items: Dicionário chave -> dados
+            data_type: Tipo de dados para determinar TTL
+            ttl_hours: TTL customizado em horas (opcional)
+            tags: Tags de invalidação (opcional)
             
-            # Salvar no Supabase
-            cache_record = {
-                'cache_key': key,
-                'data': compressed_data,
-                'expires_at': expires_at.isoformat(),
-                'data_type': data_type,
-                'compressed': should_compress,
-                'updated_at': datetime.now().isoformat()
-            }
+        Returns:
+            True se armazenado com sucesso
+        """
+        if not items:
+            return True
+        
+        try:
+            expires_at, ttl_hours = self._get_expiration(data_type, ttl_hours)
             
-            # Usar upsert para inserir ou atualizar
-            self.supabase.table('cache_data').upsert(cache_record).execute()
+            # Salvar no cache local primeiro: leituras seguintes já são atendidas
+            for key, data in items.items():
+                self._set_local(key, data, data_type, expires_at, tags=tags)
             
-            # Salvar no cache local também
-            self.local_cache[key] = (data, expires_at)
+            pending = self._enqueue_writes(items, data_type, expires_at, tags)
+            return await self._write_remote(pending, data_type, expires_at, ttl_hours, tags)
             
-            print(f"Cache armazenado: {key} ({data_type}, TTL: {ttl_hours}h, Comprimido: {should_compress})")
+        except Exception as e:
+            print(f"Erro ao armazenar no cache {list(items.keys())}: {e}")
+            return False
+    
+    async def _write_remote(self, items: Dict[str, Any], data_type: str, 
+                            expires_at: datetime, ttl_hours: float,
+                            tags: Optional[List[str]] = None) -> bool:
+        """Grava imediatamente no backend (serialização, compressão e upsert fora do loop)"""
+        if not items:
+            return True
+        
+        def write_now():
+            records = [self._build_record(key, data, data_type, expires_at, tags) for key, data in items.items()]
+            self._upsert_records(records)
+            return records
+        
+        try:
+            records = await asyncio.to_thread(write_now)
+            for record in records:
+                print(f"Cache armazenado: {record['cache_key']} ({data_type}, TTL: {ttl_hours}h, Comprimido: {record['compressed']})")
             return True
-            
         except Exception as e:
-            print(f"Erro ao armazenar no cache {key}: {e}")
+            print(f"Erro ao armazenar no cache {list(items.keys())}: {e}")
             return False
     
+    def _enqueue_writes(self, items: Dict[str, Any], data_type: str, expires_at: datetime,
+                        tags: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Enfileira gravações no write-behind e retorna as que não couberam na fila"""
+        if not self.write_behind:
+            return items
+        
+        tags = tuple(tags or ())
+        return {
+            key: data for key, data in items.items()
+            if not self.write_behind.enqueue(key, data, data_type, expires_at, tags)
+        }
+    
+    # Fachada síncrona: executa as corrotinas no loop compartilhado
+    
+    def get_sync(self, key: str, data_type: str = 'default', timeout: Optional[float] = 30) -> Optional[Any]:
+        """Versão síncrona de get() (acerto no cache local não passa pelo loop)"""
+        data = self._get_local(key, data_type)
+        if data is not None:
+            return data
+        return run_sync(self.get(key, data_type), timeout)
+    
+    def get_many_sync(self, keys: List[str], data_type: str = 'default', 
+                      timeout: Optional[float] = 30) -> Dict[str, Any]:
+        """Versão síncrona de get_many()"""
+        return run_sync(self.get_many(keys, data_type), timeout)
+    
+    def set_sync(self, key: str, data: Any, data_type: str = 'default', 
+                 ttl_hours: Optional[float] = None, timeout: Optional[float] = 60,
+                 tags: Optional[List[str]] = None) -> bool:
+        """Versão síncrona de set()"""
+        return self.set_many_sync({key: data}, data_type, ttl_hours, timeout, tags)
+    
+    def set_many_sync(self, items: Dict[str, Any], data_type: str = 'default', 
+                      ttl_hours: Optional[float] = None, timeout: Optional[float] = 60,
+                      tags: Optional[List[str]] = None) -> bool:
+        """Versão síncrona de set_many() (com write-behind só passa pelo loop se a fila estiver cheia)"""
+        if not self.write_behind:
+            return run_sync(self.set_many(items, data_type, ttl_hours, tags), timeout)
+        
+        expires_at, ttl_hours = self._get_expiration(data_type, ttl_hours)
+        for key, data in items.items():
+            self._set_local(key, data, data_type, expires_at, tags=tags)
+        pending = self._enqueue_writes(items, data_type, expires_at, tags)
+        if not pending:
+            return True
+        return run_sync(self._write_remote(pending, data_type, expires_at, ttl_hours, tags), timeout)
+    
+    # Manutenção em background
+    
+    def _ensure_maintenance(self):
+        """Inicia a thread de manutenção sob demanda (também após fork)"""
+        if self.maintenance_interval <= 0:
+            return
+        thread = self._maintenance_thread
+        if thread and thread.is_alive() and self._maintenance_pid == os.getpid():
+            return
+        with self._maintenance_lock:
+            thread = self._maintenance_thread
+            if thread and thread.is_alive() and self._maintenance_pid == os.getpid():
+                return
+            self._maintenance_thread = threading.Thread(
+                target=self._maintenance_loop, name="cache-maintenance", daemon=True
+            )
+            self._maintenance_pid = os.getpid()
+            self._maintenance_thread.start()
+    
+    def _request_maintenance(self):
+        """Antecipa a próxima limpeza de registros expirados"""
+        self._ensure_maintenance()
+        self._maintenance_event.set()
+    
+    def _maintenance_loop(self):
+        """Loop da thread de manutenção: limpeza periódica ou sob demanda"""
+        while True:
+            self._maintenance_event.wait(self.maintenance_interval)
+            self._maintenance_event.clear()
+            self.purge_expired_remote()
+            time.sleep(_MAINTENANCE_MIN_GAP)
+    
+    def purge_expired_remote(self) -> int:
+        """Remove registros expirados do backend persistente (execução da manutenção)"""
+        try:
+            removed = self.backend.delete_expired(datetime.now())
+            self._read_stats['maintenance_runs'] += 1
+            self._read_stats['maintenance_removed'] += removed
+            self._read_stats['last_maintenance_at'] = datetime.now().isoformat()
+            if removed:
+                print(f"🧹 Manutenção do cache: {removed} registros expirados removidos ({self.backend.name})")
+            return removed
+        except Exception as e:
+            print(f"Erro na manutenção do cache: {e}")
+            return 0
+    
+    def flush_writes(self, timeout: float = 30) -> bool:
+        """Grava imediatamente as escritas pendentes do write-behind"""
+        if not self.write_behind:
+            return True
+        return self.write_behind.flush(timeout)
+    
     def clear_cache(self, pattern: Optional[str] = None, data_type: Optional[str] = None):
         """
         Limpa cache baseado em padrão ou tipo de dados
@@ -182,70 +482,63 @@ class SupabaseCacheService:
             data_type: Tipo de dados para filtrar (opcional)
         """
         try:
-            # Limpar cache local
-            if pattern:
-                keys_to_remove = [key for key in self.local_cache.keys() if pattern in key]
-                for key in keys_to_remove:
-                    del self.local_cache[key]
-            elif data_type:
-                # Para cache local, não temos info de data_type, então limpar tudo
-                self.local_cache.clear()
-            else:
-                self.local_cache.clear()
-            
-            # Limpar cache no Supabase
-            query = self.supabase.table('cache_data')
-            
-            if pattern and data_type:
-                # Filtrar por ambos (Supabase não suporta LIKE diretamente, usar RPC se necessário)
-                result = query.select('cache_key').eq('data_type', data_type).execute()
-                keys_to_delete = [
-                    row['cache_key'] for row in result.data 
-                    if pattern in row['cache_key']
-                ]
-            elif pattern:
-                # Buscar todas as chaves e filtrar localmente
-                result = query.select('cache_key').execute()
-                keys_to_delete = [
-                    row['cache_key'] for row in result.data 
-                    if pattern in row['cache_key']
-                ]
-            elif data_type:
-                # Filtrar apenas por tipo
-                result = query.select('cache_key').eq('data_type', data_type).execute()
-                keys_to_delete = [row['cache_key'] for row in result.data]
-            else:
-                # Limpar tudo
-                query.delete().neq('cache_key', '').execute()
-                print("Cache completo limpo")
-                return
+            # Limpar cache local (também nos demais workers) e escritas pendentes que recriariam as chaves
+            self.local_cache.clear(pattern=pattern, data_type=data_type)
+            invalidation_bus.publish(namespace=self.local_cache.name, pattern=pattern, data_type=data_type)
+            if self.write_behind:
+                self.write_behind.discard(pattern=pattern, data_type=data_type)
             
-            # Deletar chaves específicas
-            for key in keys_to_delete:
-                query.delete().eq('cache_key', key).execute()
+            # Limpar cache no backend persistente
+            removed = self.backend.delete_matching(pattern=pattern, data_type=data_type)
             
-            print(f"Cache limpo: {len(keys_to_delete)} entradas removidas")
+            if not pattern and not data_type:
+                print("Cache completo limpo")
+            else:
+                print(f"Cache limpo: {removed} entradas removidas")
             
         except Exception as e:
             print(f"Erro ao limpar cache: {e}")
     
+    def invalidate_tags(self, tags: List[str]) -> int:
+        """
+        Invalida todas as chaves marcadas com as tags em todas as camadas
+        
+        O cache em memória é limpo em todos os namespaces (inclusive o do
+        OmieService), já que os dados dependentes podem estar em qualquer um.
+        
+        Args:
+            tags: Tags a invalidar (ex.: SERVICES_CATALOGUE_TAG)
+            
+        Returns:
+            Número de registros removidos do backend persistente
+        """
+        if not tags:
+            return 0
+        
+        try:
+            local_count = memory_cache.invalidate_tags(tags)
+            invalidation_bus.publish(tags=list(tags))
+            if self.write_behind:
+                self.write_behind.discard(tags=tags)
+            
+            removed = self.backend.delete_by_tags(list(tags))
+            print(f"Cache invalidado por tags {list(tags)}: {local_count} local, {removed} {self.backend.name}")
+            return removed
+            
+        except Exception as e:
+            print(f"Erro ao invalidar cache por tags {list(tags)}: {e}")
+            return 0
+    
     def clear_expired(self):
         """Remove entradas expiradas do cache"""
         try:
-            now = datetime.now().isoformat()
-            
             # Limpar cache local
-            expired_keys = [
-                key for key, (_, expires_at) in self.local_cache.items()
-                if datetime.now() >= expires_at
-            ]
-            for key in expired_keys:
-                del self.local_cache[key]
+            expired_count = self.local_cache.purge_expired()
             
-            # Limpar cache no Supabase
-            result = self.supabase.table('cache_data').delete().lt('expires_at', now).execute()
+            # Limpar cache no backend persistente
+            remote_count = self.backend.delete_expired(datetime.now())
             
-            print(f"Cache expirado limpo: {len(expired_keys)} local, {len(result.data) if result.data else 0} Supabase")
+            print(f"Cache expirado limpo: {expired_count} local, {remote_count} {self.backend.name}")
             
         except Exception as e:
             print(f"Erro ao limpar cache expirado: {e}")
@@ -256,31 +549,31 @@ class SupabaseCacheService:
             # Stats do cache local
             local_count = len(self.local_cache)
             
-            # Stats do Supabase
-            result = self.supabase.table('cache_data').select('data_type', count='exact').execute()
-            supabase_count = result.count if hasattr(result, 'count') else 0
-            
-            # Stats por tipo de dados
-            type_stats = {}
-            if result.data:
-                for row in result.data:
-                    data_type = row.get('data_type', 'unknown')
-                    type_stats[data_type] = type_stats.get(data_type, 0) + 1
+            # Stats do backend persistente por tipo de dados
+            type_stats = self.backend.count_by_type()
             
             return {
+                'backend': self.backend.name,
                 'local_cache_entries': local_count,
-                'supabase_cache_entries': supabase_count,
+                'supabase_cache_entries': sum(type_stats.values()),
                 'cache_by_type': type_stats,
-                'ttl_config': self.ttl_config
+                'ttl_config': self.ttl_config,
+                'memory_cache': memory_cache.get_stats(),
+                'write_behind': self.write_behind.get_stats() if self.write_behind else None,
+                'reads': dict(self._read_stats)
             }
             
         except Exception as e:
             print(f"Erro ao obter estatísticas do cache: {e}")
             return {
+                'backend': self.backend.name,
                 'local_cache_entries': len(self.local_cache),
                 'supabase_cache_entries': 0,
                 'cache_by_type': {},
-                'ttl_config': self.ttl_config
+                'ttl_config': self.ttl_config,
+                'memory_cache': memory_cache.get_stats(),
+                'write_behind': self.write_behind.get_stats() if self.write_behind else None,
+                'reads': dict(self._read_stats)
             }
     
     def update_sync_status(self, data_type: str, status: str, records_count: int = 0, 
@@ -304,7 +597,7 @@ class SupabaseCacheService:
             }
             
             # Usar upsert para inserir ou atualizar
-            self.supabase.table('sync_status').upsert(sync_record).execute()
+            self.backend.upsert_sync_status(sync_record)
             
             print(f"Status de sincronização atualizado: {data_type} - {status}")
             
@@ -322,13 +615,7 @@ class SupabaseCacheService:
             Lista com status de sincronização
         """
         try:
-            query = self.supabase.table('sync_status').select('*')
-            
-            if data_type:
-                query = query.eq('data_type', data_type)
-            
-            result = query.order('last_sync', desc=True).execute()
-            return result.data if result.data else []
+            return self.backend.list_sync_status(data_type)
             
         except Exception as e:
             print(f"Erro ao recuperar status de sincronização: {e}")
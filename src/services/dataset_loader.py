@@ -0,0 +1,187 @@
+"""
+Carregador de Dados por Grafo de Dependências
+Busca conjuntos de dados independentes em paralelo; cada conjunto é iniciado
+assim que as suas dependências terminam e quem consome um resultado aguarda
+apenas por ele
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Sem valor padrão: a falha da carga é propagada para quem aguarda o resultado
+REQUIRED = object()
+
+
+class DatasetNode:
+    """Conjunto de dados do grafo"""
+
+    def __init__(self, name: str, loader: Callable[..., Any], depends_on: Iterable[str] = (),
+                 default: Any = None, label: Optional[str] = None):
+        """
+        Args:
+            name: Nome do conjunto de dados
+            loader: Função de carga (recebe os resultados das dependências como argumentos nomeados)
+            depends_on: Conjuntos que precisam estar prontos antes desta carga
+            default: Valor usado se a carga falhar (REQUIRED = propagar o erro)
+            label: Descrição usada nas mensagens de erro
+        """
+        self.name = name
+        self.loader = loader
+        self.depends_on = tuple(depends_on)
+        self.default = default
+        self.label = label or name
+
+
+class DatasetRun:
+    """Execução em andamento de um grafo de conjuntos de dados"""
+
+    def __init__(self, futures: Dict[str, Future]):
+        self._futures = futures
+        self.durations_ms: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def get(self, name: str, timeout: Optional[float] = None) -> Any:
+        """Aguarda apenas o conjunto solicitado e retorna o seu resultado"""
+        return self._futures[name].result(timeout=timeout)
+
+    def done(self, name: str) -> bool:
+        return self._futures[name].done()
+
+    def results(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Aguarda todos os conjuntos e retorna os resultados por nome"""
+        deadline = time.time() + timeout if timeout is not None else None
+        results = {}
+        for name, future in self._futures.items():
+            remaining = max(0.0, deadline - time.time()) if deadline is not None else None
+            results[name] = future.result(timeout=remaining)
+        return results
+
+
+class DatasetGraph:
+    """
+    Grafo de conjuntos de dados com dependências explícitas
+
+    Nós sem dependências são submetidos imediatamente ao pool; os demais são
+    submetidos pela thread que conclui a última dependência, de modo que
+    nenhuma thread do pool fica bloqueada aguardando outra.
+    """
+
+    def __init__(self, loader: 'DatasetLoader'):
+        self.loader = loader
+        self._nodes: Dict[str, DatasetNode] = {}
+
+    def add(self, name: str, loader: Callable[..., Any], depends_on: Iterable[str] = (),
+            default: Any = None, label: Optional[str] = None) -> 'DatasetGraph':
+        """Adiciona um conjunto de dados ao grafo"""
+        self._nodes[name] = DatasetNode(name, loader, depends_on, default, label)
+        return self
+
+    def _closure(self, names: Optional[Iterable[str]]) -> List[str]:
+        """Conjuntos solicitados mais as dependências, em ordem topológica"""
+        ordered: List[str] = []
+        visiting = set()
+
+        def visit(name: str):
+            if name in ordered:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependência circular no conjunto de dados '{name}'")
+            if name not in self._nodes:
+                raise KeyError(f"Conjunto de dados desconhecido: '{name}'")
+            visiting.add(name)
+            for dependency in self._nodes[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            ordered.append(name)
+
+        for name in (names if names is not None else self._nodes):
+            visit(name)
+        return ordered
+
+    def start(self, names: Optional[Iterable[str]] = None) -> DatasetRun:
+        """
+        Inicia a carga dos conjuntos solicitados (e das suas dependências)
+
+        Returns:
+            DatasetRun para aguardar cada resultado individualmente
+        """
+        ordered = self._closure(names)
+        futures: Dict[str, Future] = {name: Future() for name in ordered}
+        run = DatasetRun(futures)
+        pending = {name: len(self._nodes[name].depends_on) for name in ordered}
+        dependents: Dict[str, List[str]] = {name: [] for name in ordered}
+        for name in ordered:
+            for dependency in self._nodes[name].depends_on:
+                dependents[dependency].append(name)
+        lock = threading.Lock()
+
+        def execute(node: DatasetNode):
+            started = time.time()
+            try:
+                inputs = {dep: futures[dep].result() for dep in node.depends_on}
+                futures[node.name].set_result(node.loader(**inputs))
+            except Exception as e:
+                run.errors[node.name] = str(e)
+                print(f"Erro ao carregar {node.label}: {str(e)}")
+                if node.default is REQUIRED:
+                    futures[node.name].set_exception(e)
+                else:
+                    futures[node.name].set_result(node.default)
+            run.durations_ms[node.name] = round((time.time() - started) * 1000, 1)
+
+            # Liberar os dependentes cuja última dependência acabou de terminar
+            ready = []
+            with lock:
+                for dependent in dependents[node.name]:
+                    pending[dependent] -= 1
+                    if pending[dependent] == 0:
+                        ready.append(dependent)
+            for dependent in ready:
+                self.loader.submit(execute, self._nodes[dependent])
+
+        # Raízes calculadas antes de submeter: uma carga rápida pode zerar as
+        # pendências de um dependente (e submetê-lo) antes do fim deste laço
+        roots = [name for name in ordered if pending[name] == 0]
+        for name in roots:
+            self.loader.submit(execute, self._nodes[name])
+        return run
+
+    def resolve(self, names: Optional[Iterable[str]] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Carrega os conjuntos solicitados e aguarda todos"""
+        return self.start(names).results(timeout)
+
+
+class DatasetLoader:
+    """Pool de threads compartilhado para cargas de conjuntos de dados"""
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Cria o pool sob demanda (também após fork de workers do gunicorn)"""
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="dataset-loader")
+                self._pid = os.getpid()
+            return self._executor
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        return self._get_executor().submit(fn, *args, **kwargs)
+
+    def graph(self) -> DatasetGraph:
+        """Cria um grafo de conjuntos de dados executado neste pool"""
+        return DatasetGraph(self)
+
+
+# Instância global do carregador
+dataset_loader = DatasetLoader(max_workers=int(os.getenv('DATASET_LOADER_WORKERS', '8')))
@@ -0,0 +1,111 @@
+"""
+Projeções de Exibição
+Formatação de valores (moeda, datas, CPF/CNPJ e telefones) e projeções
+prontas para exibição calculadas uma vez por registro quando o snapshot é
+montado, em vez de a cada célula renderizada
+"""
+
+from typing import Dict, Iterable, List
+
+# Chave com os valores formatados, gravada ao lado dos campos originais do registro
+DISPLAY_KEY = 'display'
+
+# Troca ',' por '.' e vice-versa em uma única passada (1,234.50 -> 1.234,50)
+_BRL_SEPARATORS = str.maketrans({',': '.', '.': ','})
+
+
+def format_cpf_cnpj(value) -> str:
+    """Formata CPF/CNPJ"""
+    if not value:
+        return ''
+
+    # Remove caracteres não numéricos
+    numbers = ''.join(filter(str.isdigit, value))
+
+    if len(numbers) == 11:  # CPF
+        return f"{numbers[:3]}.{numbers[3:6]}.{numbers[6:9]}-{numbers[9:]}"
+    elif len(numbers) == 14:  # CNPJ
+        return f"{numbers[:2]}.{numbers[2:5]}.{numbers[5:8]}/{numbers[8:12]}-{numbers[12:]}"
+    else:
+        return value
+
+
+def format_phone(ddd, number) -> str:
+    """Formata telefone"""
+    if not ddd or not number:
+        return ''
+
+    # Remove caracteres não numéricos
+    ddd_clean = ''.join(filter(str.isdigit, ddd))
+    number_clean = ''.join(filter(str.isdigit, number))
+
+    if len(number_clean) == 9:  # Celular
+        return f"({ddd_clean}) {number_clean[:5]}-{number_clean[5:]}"
+    elif len(number_clean) == 8:  # Fixo
+        return f"({ddd_clean}) {number_clean[:4]}-{number_clean[4:]}"
+    else:
+        return f"({ddd_clean}) {number_clean}"
+
+
+def format_date(value) -> str:
+    """Formata data"""
+    if not value:
+        return ''
+
+    try:
+        # Assumindo formato dd/mm/yyyy
+        if '/' in value:
+            day, month, year = value.split('/')
+            return f"{day}/{month}/{year}"
+        return value
+    except Exception:
+        return value
+
+
+def format_currency(value) -> str:
+    """Formata valores monetários em reais"""
+    if not value:
+        return 'R$ 0,00'
+
+    try:
+        # Converte para float se for string
+        if isinstance(value, str):
+            value = float(value.replace(',', '.'))
+
+        return f"R$ {value:,.2f}".translate(_BRL_SEPARATORS)
+    except Exception:
+        return f"R$ {value}"
+
+
+def order_display(order: dict) -> Dict[str, str]:
+    """Valores formatados de uma ordem de serviço"""
+    cabecalho = order.get('Cabecalho', {})
+    return {
+        'data_previsao': format_date(cabecalho.get('dDtPrevisao', '')),
+        'valor_total': format_currency(cabecalho.get('nValorTotal', 0))
+    }
+
+
+def client_display(client: dict) -> Dict[str, str]:
+    """Valores formatados de um cliente"""
+    return {
+        'cnpj_cpf': format_cpf_cnpj(client.get('cnpj_cpf', '')),
+        'telefone1': format_phone(client.get('telefone1_ddd'), client.get('telefone1_numero')),
+        'telefone2': format_phone(client.get('telefone2_ddd'), client.get('telefone2_numero')),
+        'fax': format_phone(client.get('fax_ddd'), client.get('fax_numero'))
+    }
+
+
+def attach_display(records: Iterable[dict], projection) -> List[dict]:
+    """
+    Grava a projeção de exibição em cada registro que ainda não a possui
+
+    Os registros são alterados no próprio lugar, antes de irem para o cache:
+    snapshots lidos de um cache compartilhado gravado antes das projeções
+    são completados sem recalcular os que já estão prontos.
+    """
+    records = records if isinstance(records, list) else list(records)
+    for record in records:
+        if DISPLAY_KEY not in record:
+            record[DISPLAY_KEY] = projection(record)
+    return records
@@ -0,0 +1,284 @@
+"""
+Invalidação de Cache entre Workers
+Difunde eventos de invalidação por um journal em arquivo compartilhado para que
+todos os processos (workers do gunicorn) descartem suas cópias em memória
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from .memory_cache import memory_cache, MemoryCache
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+def default_journal_path() -> str:
+    """Caminho padrão do journal (src/cache_data/invalidation.log)"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.getenv('CACHE_INVALIDATION_FILE', os.path.join(base_dir, 'cache_data', 'invalidation.log'))
+
+
+class InvalidationBus:
+    """
+    Canal de invalidação baseado em um journal append-only
+
+    Cada evento é uma linha JSON. Os workers guardam o offset já lido e, a
+    cada poll (no máximo a cada poll_interval segundos), verificam com um
+    simples stat() se o arquivo cresceu. Cada evento recebe um número de
+    sequência (geração); ao ultrapassar max_bytes o journal é rotacionado
+    (novo inode) e um worker que detectar lacuna na sequência descarta todo
+    o seu cache em memória por segurança.
+    """
+
+    def __init__(self, path: str, cache: MemoryCache, poll_interval: float = 1.0,
+                 max_bytes: int = 256 * 1024):
+        self.path = path
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._origin: Optional[str] = None
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._last_seq = 0
+        self._last_poll = 0.0
+
+        self._stats = {
+            'published': 0,
+            'applied': 0,
+            'entries_dropped': 0,
+            'rotations': 0,
+            'gaps': 0,
+            'errors': 0,
+            'last_event_at': None,
+            'max_delay_ms': 0.0
+        }
+
+    def _ensure_process(self):
+        """Identidade e offset por processo (após fork o worker começa do fim do journal)"""
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._origin = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            stat = os.stat(self.path)
+            self._offset, self._inode = stat.st_size, stat.st_ino
+            self._last_seq = self._read_last_seq()
+        except FileNotFoundError:
+            self._offset, self._inode = 0, None
+
+    def _read_last_seq(self) -> int:
+        """Lê a sequência do último evento do journal (apenas o fim do arquivo)"""
+        try:
+            with open(self.path, 'rb') as journal:
+                journal.seek(0, os.SEEK_END)
+                journal.seek(max(0, journal.tell() - 4096))
+                lines = journal.read().splitlines()
+        except FileNotFoundError:
+            return 0
+        for raw in reversed(lines):
+            try:
+                return int(json.loads(raw).get('seq', 0))
+            except ValueError:
+                continue
+        return 0
+
+    @property
+    def generation(self) -> int:
+        """Sequência do último evento observado por este processo"""
+        return self._last_seq
+
+    def publish(self, namespace: Optional[str] = None, pattern: Optional[str] = None,
+                data_type: Optional[str] = None, tags: Optional[List[str]] = None):
+        """
+        Publica um evento de invalidação para os demais workers
+
+        O chamador já invalidou o próprio processo; eventos de mesma origem
+        são ignorados no poll.
+
+        Args:
+            namespace: Namespace do cache em memória (None = todos)
+            pattern: Padrão contido na chave (opcional)
+            data_type: Tipo de dados (opcional)
+            tags: Tags de invalidação (opcional)
+        """
+        with self._lock:
+            self._ensure_process()
+            event = {
+                'seq': 0,
+                'origin': self._origin,
+                'ts': time.time(),
+                'namespace': namespace,
+                'pattern': pattern,
+                'data_type': data_type,
+                'tags': list(tags) if tags else None
+            }
+            try:
+                self._append(event)
+                self._stats['published'] += 1
+            except OSError as e:
+                self._stats['errors'] += 1
+                print(f"⚠️  Erro ao publicar invalidação de cache: {e}")
+
+    def _append(self, event: Dict[str, Any]):
+        """Acrescenta um evento ao journal sob lock exclusivo (rotacionando se necessário)"""
+        for _ in range(3):
+            with open(self.path, 'ab') as journal:
+                if fcntl:
+                    fcntl.flock(journal, fcntl.LOCK_EX)
+                try:
+                    # O arquivo pode ter sido rotacionado enquanto aguardávamos o lock
+                    current = os.fstat(journal.fileno())
+                    if current.st_ino != os.stat(self.path).st_ino:
+                        continue
+                    event['seq'] = self._read_last_seq() + 1
+                    line = (json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8')
+                    if current.st_size + len(line) > self.max_bytes:
+                        self._rotate(line)
+                    else:
+                        journal.write(line)
+                    return
+                finally:
+                    if fcntl:
+                        fcntl.flock(journal, fcntl.LOCK_UN)
+        raise OSError("journal de invalidação rotacionado repetidamente")
+
+    def _rotate(self, line: bytes, keep_seconds: float = 60):
+        """
+        Substitui o journal por um arquivo novo (leitores detectam a troca de inode)
+
+        Os eventos recentes são copiados para que workers que ainda não
+        leram o fim do arquivo antigo não percam invalidações.
+        """
+        cutoff = time.time() - keep_seconds
+        recent = []
+        with open(self.path, 'rb') as old_journal:
+            for raw in old_journal:
+                try:
+                    if json.loads(raw).get('ts', 0) >= cutoff:
+                        recent.append(raw)
+                except ValueError:
+                    continue
+
+        # Manter no máximo metade do limite para não rotacionar a cada evento
+        kept, size = [], 0
+        for raw in reversed(recent):
+            size += len(raw)
+            if size > self.max_bytes // 2:
+                break
+            kept.append(raw)
+        recent = kept[::-1]
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as new_journal:
+            new_journal.writelines(recent)
+            new_journal.write(line)
+        os.replace(tmp_path, self.path)
+        self._stats['rotations'] += 1
+
+    def poll(self, force: bool = False) -> int:
+        """
+        Aplica eventos publicados por outros processos
+
+        Returns:
+            Número de eventos aplicados
+        """
+        now = time.time()
+        if not force and now - self._last_poll < self.poll_interval:
+            return 0
+
+        with self._lock:
+            self._ensure_process()
+            self._last_poll = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return 0
+
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                # Journal rotacionado: ler o arquivo novo desde o início
+                self._inode, self._offset = stat.st_ino, 0
+
+            if stat.st_size == self._offset:
+                return 0
+
+            try:
+                with open(self.path, 'rb') as journal:
+                    journal.seek(self._offset)
+                    chunk = journal.read(stat.st_size - self._offset)
+            except OSError as e:
+                self._stats['errors'] += 1
+                print(f"⚠️  Erro ao ler invalidações de cache: {e}")
+                return 0
+
+            # Consumir apenas linhas completas
+            end = chunk.rfind(b'\n') + 1
+            self._offset += end
+            applied = 0
+            for raw in chunk[:end].splitlines():
+                try:
+                    event = json.loads(raw)
+                except ValueError:
+                    self._stats['errors'] += 1
+                    continue
+
+                seq = int(event.get('seq', 0))
+                if seq <= self._last_seq:
+                    # Evento já visto (copiado na rotação)
+                    continue
+                if seq > self._last_seq + 1:
+                    # Eventos perdidos na rotação: descartar todo o cache em memória
+                    self.cache.clear()
+                    self._stats['gaps'] += 1
+                self._last_seq = seq
+
+                if event.get('origin') == self._origin:
+                    continue
+                self._apply(event)
+                applied += 1
+            return applied
+
+    def _apply(self, event: Dict[str, Any]):
+        """Descarta as entradas afetadas do cache em memória deste processo"""
+        namespace = event.get('namespace')
+        prefix = f"{namespace}:" if namespace else ''
+
+        if event.get('tags'):
+            dropped = self.cache.invalidate_tags(event['tags'], prefix)
+        else:
+            dropped = self.cache.clear(prefix, event.get('pattern'), event.get('data_type'))
+
+        stats = self._stats
+        stats['applied'] += 1
+        stats['entries_dropped'] += dropped
+        stats['last_event_at'] = event.get('ts')
+        if event.get('ts'):
+            delay_ms = (time.time() - event['ts']) * 1000
+            stats['max_delay_ms'] = round(max(stats['max_delay_ms'], delay_ms), 2)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores do canal de invalidação"""
+        stats = dict(self._stats)
+        stats['generation'] = self._last_seq
+        stats['poll_interval'] = self.poll_interval
+        stats['path'] = self.path
+        return stats
+
+
+# Instância global do canal de invalidação
+invalidation_bus = InvalidationBus(
+    default_journal_path(),
+    memory_cache,
+    poll_interval=float(os.getenv('CACHE_INVALIDATION_POLL_INTERVAL', '1.0'))
+)
@@ -0,0 +1,45 @@
+"""
+Codec JSON
+Serialização JSON usada pelo Flask e pelas camadas de cache: orjson quando
+instalado (opcional) e a biblioteca padrão caso contrário
+"""
+
+import json
+import os
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # dependência opcional
+    orjson = None
+
+# JSON_BACKEND=json força a biblioteca padrão mesmo com orjson instalado
+BACKEND = 'orjson' if orjson is not None and os.getenv('JSON_BACKEND', 'auto').lower() != 'json' else 'json'
+
+if BACKEND == 'orjson':
+    # Chaves não-string (ex.: mapeamentos código -> nome) como no json padrão;
+    # datetime passa pelo default para manter o formato de cada chamador
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    _ORJSON_SORTED = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS
+
+
+def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None, sort_keys: bool = False) -> bytes:
+    """Serializa em JSON compacto (UTF-8)"""
+    if BACKEND == 'orjson':
+        return orjson.dumps(obj, default=default, option=_ORJSON_SORTED if sort_keys else _ORJSON_OPTIONS)
+    return json.dumps(obj, default=default, sort_keys=sort_keys, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None, sort_keys: bool = False) -> str:
+    """Serializa em JSON compacto"""
+    if BACKEND == 'orjson':
+        return dumps_bytes(obj, default, sort_keys).decode('utf-8')
+    return json.dumps(obj, default=default, sort_keys=sort_keys, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Desserializa JSON (str ou bytes)"""
+    if BACKEND == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,492 @@
+"""
+Cache em Memória Unificado
+LRU com orçamento global de bytes, TTL por tipo de dados e métricas por tipo
+"""
+
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import json_codec
+
+# Quantidade de itens amostrados ao estimar o tamanho de coleções grandes
+_SIZE_SAMPLE = 32
+_MAX_SIZE_DEPTH = 12
+
+# Tags de invalidação compartilhadas pelas camadas de cache
+SERVICES_CATALOGUE_TAG = 'services_catalogue'
+
+
+def content_version(value: Any) -> Optional[str]:
+    """
+    Versão de um valor derivada do conteúdo
+
+    Mesmo hash gravado como content_hash no cache compartilhado (sha256 do
+    JSON compacto): a cópia local e o registro remoto têm a mesma versão.
+    """
+    try:
+        return hashlib.sha256(json_codec.dumps_bytes(value, default=str)).hexdigest()
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def has_empty_type(version: str) -> bool:
+    """Indica se algum tipo da versão do snapshot ainda não tinha dados carregados"""
+    return any(part.endswith('=empty') for part in version.split(','))
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """
+    Estima o tamanho aproximado (em bytes) de um objeto Python
+
+    Coleções grandes são estimadas por amostragem para que o custo
+    permaneça baixo mesmo para listas com milhares de ordens de serviço.
+    """
+    size = sys.getsizeof(obj)
+    if _depth >= _MAX_SIZE_DEPTH:
+        return size
+
+    if isinstance(obj, dict):
+        count = len(obj)
+        if not count:
+            return size
+        items = obj.items()
+        if count > _SIZE_SAMPLE:
+            items = list(items)[:_SIZE_SAMPLE]
+        sample = sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in items)
+        return size + int(sample * count / min(count, _SIZE_SAMPLE))
+
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        count = len(obj)
+        if not count:
+            return size
+        items = obj if count <= _SIZE_SAMPLE else list(obj)[:_SIZE_SAMPLE]
+        sample = sum(estimate_size(item, _depth + 1) for item in items)
+        return size + int(sample * count / min(count, _SIZE_SAMPLE))
+
+    return size
+
+
+class _Entry:
+    """Entrada do cache em memória"""
+
+    __slots__ = ('value', 'data_type', 'size', 'stored_at', 'expires_at', 'version', 'tags')
+
+    def __init__(self, value: Any, data_type: str, size: int, stored_at: float,
+                 expires_at: Optional[float], version: Optional[str] = None,
+                 tags: Optional[Iterable[str]] = None):
+        self.value = value
+        self.data_type = data_type
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.version = version
+        self.tags = frozenset(tags) if tags else frozenset()
+
+
+class MemoryCache:
+    """Cache LRU em memória limitado por um orçamento global de bytes"""
+
+    # TTLs padrão por tipo de dados (em segundos)
+    DEFAULT_TTLS = {
+        'clients': 3600,
+        'sellers': 3600,
+        'services': 3600,
+        'service_orders': 1800,
+        'mappings': 3600,
+        'filters': 3600,
+        'stats': 600,
+        'dashboard': 1800,
+        'users': 300,
+        'default': 600
+    }
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl_config: Optional[Dict[str, float]] = None):
+        self.max_bytes = max_bytes
+        self.ttl_config = dict(self.DEFAULT_TTLS)
+        if ttl_config:
+            self.ttl_config.update(ttl_config)
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self._metrics: Dict[str, Dict[str, int]] = {}
+
+        # Chaves por tipo de dados e resumo das versões de conteúdo de cada
+        # tipo (versão do snapshot), recalculado só quando o tipo muda
+        self._keys_by_type: Dict[str, set] = {}
+        self._digests: Dict[str, Tuple[str, float]] = {}
+        self._dirty_types: set = set()
+
+    def _touch(self, data_type: str):
+        """Registra uma alteração nas entradas do tipo de dados (chamar com lock)"""
+        self._dirty_types.add(data_type)
+
+    def _type_metrics(self, data_type: str) -> Dict[str, int]:
+        metrics = self._metrics.get(data_type)
+        if metrics is None:
+            metrics = {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 0,
+                       'evictions': 0, 'expirations': 0, 'rejected': 0}
+            self._metrics[data_type] = metrics
+        return metrics
+
+    def _remove(self, key: str, reason: Optional[str] = None) -> Optional[_Entry]:
+        """Remove uma entrada atualizando os contadores (chamar com lock)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._total_bytes -= entry.size
+        self._keys_by_type[entry.data_type].discard(key)
+        self._touch(entry.data_type)
+        metrics = self._type_metrics(entry.data_type)
+        metrics['entries'] -= 1
+        metrics['bytes'] -= entry.size
+        if reason:
+            metrics[reason] += 1
+        return entry
+
+    def get_ttl(self, data_type: str) -> float:
+        """Retorna o TTL em segundos configurado para o tipo de dados"""
+        return self.ttl_config.get(data_type, self.ttl_config['default'])
+
+    def get(self, key: str, data_type: str = 'default', max_age: Optional[float] = None) -> Optional[Any]:
+        """
+        Recupera um valor se presente e ainda válido
+
+        Args:
+            key: Chave do cache
+            data_type: Tipo usado para contabilizar misses
+            max_age: Idade máxima aceita em segundos (opcional, além do TTL da entrada)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._type_metrics(data_type)['misses'] += 1
+                return None
+
+            expired = entry.expires_at is not None and now >= entry.expires_at
+            if not expired and max_age is not None:
+                expired = now - entry.stored_at >= max_age
+
+            if expired:
+                self._remove(key, 'expirations')
+                self._type_metrics(entry.data_type)['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._type_metrics(entry.data_type)['hits'] += 1
+            return entry.value
+
+    def lookup(self, key: str, data_type: str = 'default') -> Optional[Tuple[Any, Optional[str], bool]]:
+        """
+        Recupera (valor, versão, válido) sem descartar entradas expiradas
+
+        Permite revalidar uma entrada vencida pela versão antes de baixar
+        o conteúdo novamente; entradas expiradas contam como miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._type_metrics(data_type)['misses'] += 1
+                return None
+
+            fresh = entry.expires_at is None or now < entry.expires_at
+            if fresh:
+                self._entries.move_to_end(key)
+                self._type_metrics(entry.data_type)['hits'] += 1
+            else:
+                self._type_metrics(entry.data_type)['misses'] += 1
+            return entry.value, entry.version, fresh
+
+    def set(self, key: str, value: Any, data_type: str = 'default',
+            ttl: Optional[float] = None, expires_at: Optional[float] = None,
+            version: Optional[str] = None, tags: Optional[Iterable[str]] = None) -> bool:
+        """
+        Armazena um valor, removendo as entradas menos usadas se o orçamento estourar
+
+        Args:
+            key: Chave do cache
+            value: Valor a armazenar
+            data_type: Tipo de dados (define TTL padrão e agrupamento das métricas)
+            ttl: TTL em segundos (opcional, padrão do tipo)
+            expires_at: Instante absoluto de expiração em epoch (opcional)
+            version: Identificador do conteúdo (ex.: hash do registro remoto)
+            tags: Tags de invalidação (ex.: SERVICES_CATALOGUE_TAG)
+
+        Returns:
+            True se o valor foi armazenado
+        """
+        size = estimate_size(value)
+        now = time.time()
+        if expires_at is None:
+            expires_at = now + (ttl if ttl is not None else self.get_ttl(data_type))
+
+        with self._lock:
+            self._remove(key)
+
+            if size > self.max_bytes:
+                self._type_metrics(data_type)['rejected'] += 1
+                print(f"⚠️  Cache em memória: {key} ({size} bytes) excede o orçamento de {self.max_bytes} bytes")
+                return False
+
+            self._entries[key] = _Entry(value, data_type, size, now, expires_at, version, tags)
+            self._total_bytes += size
+            self._keys_by_type.setdefault(data_type, set()).add(key)
+            self._touch(data_type)
+            metrics = self._type_metrics(data_type)
+            metrics['entries'] += 1
+            metrics['bytes'] += size
+
+            # Remover entradas menos usadas até caber no orçamento
+            while self._total_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key, 'evictions')
+
+            return True
+
+    def set_version(self, key: str, version: Optional[str], value: Any = None) -> bool:
+        """Define a versão de uma entrada (somente se ainda guarda o mesmo valor, quando informado)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (value is not None and entry.value is not value):
+                return False
+            if entry.version != version:
+                entry.version = version
+                self._touch(entry.data_type)
+            return True
+
+    def refresh(self, key: str, expires_at: float) -> bool:
+        """Renova a expiração de uma entrada revalidada"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            entry.stored_at = time.time()
+            entry.expires_at = expires_at
+            self._entries.move_to_end(key)
+            return True
+
+    def get_entry_info(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna metadados de uma entrada sem alterar a ordem LRU"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return {
+                'data_type': entry.data_type,
+                'size': entry.size,
+                'stored_at': entry.stored_at,
+                'expires_at': entry.expires_at,
+                'version': entry.version
+            }
+
+    def delete(self, key: str) -> bool:
+        """Remove uma chave"""
+        with self._lock:
+            return self._remove(key) is not None
+
+    def keys(self, prefix: str = '') -> List[str]:
+        """Lista as chaves (opcionalmente filtradas por prefixo)"""
+        with self._lock:
+            return [key for key in self._entries if key.startswith(prefix)]
+
+    def clear(self, prefix: str = '', pattern: Optional[str] = None, data_type: Optional[str] = None) -> int:
+        """
+        Remove entradas por prefixo, padrão contido na chave e/ou tipo de dados
+
+        Returns:
+            Número de entradas removidas
+        """
+        with self._lock:
+            keys_to_remove = [
+                key for key, entry in self._entries.items()
+                if key.startswith(prefix)
+                and (pattern is None or pattern in key[len(prefix):])
+                and (data_type is None or entry.data_type == data_type)
+            ]
+            for key in keys_to_remove:
+                self._remove(key)
+            return len(keys_to_remove)
+
+    def invalidate_tags(self, tags: Iterable[str], prefix: str = '') -> int:
+        """Remove todas as entradas marcadas com qualquer uma das tags"""
+        tags = frozenset(tags)
+        with self._lock:
+            keys_to_remove = [
+                key for key, entry in self._entries.items()
+                if key.startswith(prefix) and entry.tags & tags
+            ]
+            for key in keys_to_remove:
+                self._remove(key)
+            return len(keys_to_remove)
+
+    def purge_expired(self, prefix: str = '') -> int:
+        """Remove entradas expiradas e retorna quantas foram removidas"""
+        now = time.time()
+        with self._lock:
+            expired = [
+                key for key, entry in self._entries.items()
+                if key.startswith(prefix) and entry.expires_at is not None and now >= entry.expires_at
+            ]
+            for key in expired:
+                self._remove(key, 'expirations')
+            return len(expired)
+
+    def snapshot(self, data_types: Iterable[str]) -> Tuple[str, float]:
+        """
+        Retorna (versão, instante da última alteração) dos tipos de dados
+
+        A versão é um resumo das versões de conteúdo das entradas desses
+        tipos (o content_hash do cache compartilhado ou o hash calculado uma
+        vez por entrada), sem contadores do processo: workers com os mesmos
+        dados têm a mesma versão, e remover e recarregar o mesmo conteúdo
+        (expiração, LRU, revalidação) não a altera. Cópias do mesmo conteúdo
+        em namespaces diferentes contam uma vez.
+        """
+        data_types = sorted(set(data_types))
+        parts = []
+        changed_at = 0.0
+        for data_type in data_types:
+            digest, type_changed_at = self._type_digest(data_type)
+            parts.append(f"{data_type}={digest}")
+            changed_at = max(changed_at, type_changed_at)
+        return ','.join(parts), changed_at
+
+    def is_fresh(self, data_types: Iterable[str]) -> bool:
+        """
+        Indica se todos os tipos de dados têm entradas carregadas e válidas
+
+        Falso enquanto algum tipo está vazio (carga ainda não feita ou que
+        falhou) ou tem entradas expiradas aguardando recarga: a versão do
+        snapshot nesses casos não identifica o conteúdo que será servido.
+        """
+        now = time.time()
+        with self._lock:
+            for data_type in set(data_types):
+                keys = self._keys_by_type.get(data_type)
+                if not keys:
+                    return False
+                for key in keys:
+                    expires_at = self._entries[key].expires_at
+                    if expires_at is not None and now >= expires_at:
+                        return False
+            return True
+
+    def _type_digest(self, data_type: str) -> Tuple[str, float]:
+        """Resumo (e instante da última mudança) das versões de conteúdo de um tipo"""
+        with self._lock:
+            cached = self._digests.get(data_type)
+            if cached is not None and data_type not in self._dirty_types:
+                return cached
+            self._dirty_types.discard(data_type)
+            entries = [self._entries[key] for key in self._keys_by_type.get(data_type, ())]
+
+        # Entradas sem versão recebem o hash do conteúdo fora do lock; o mesmo
+        # objeto já versionado em outra chave reaproveita a versão
+        known = {id(entry.value): entry.version for entry in entries if entry.version}
+        versions = set()
+        for entry in entries:
+            version = entry.version or known.get(id(entry.value))
+            if version is None:
+                version = content_version(entry.value)
+                if version is None:
+                    # Conteúdo não serializável: identificado apenas pelo objeto
+                    versions.add(f"object-{id(entry.value)}")
+                    continue
+                known[id(entry.value)] = version
+            if entry.version is None:
+                entry.version = version
+            versions.add(version)
+
+        if versions:
+            digest = hashlib.sha1('|'.join(sorted(versions)).encode('utf-8')).hexdigest()[:16]
+        else:
+            digest = 'empty'
+
+        with self._lock:
+            previous = self._digests.get(data_type)
+            if previous is not None and previous[0] == digest:
+                result = previous
+            else:
+                result = (digest, time.time() if versions else 0.0)
+            if data_type not in self._dirty_types:
+                self._digests[data_type] = result
+            return result
+
+    def namespace(self, name: str) -> 'CacheNamespace':
+        """Retorna uma visão do cache com chaves prefixadas"""
+        return CacheNamespace(self, name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna métricas de tamanho, hits, misses e remoções por tipo de dados"""
+        with self._lock:
+            by_type = {data_type: dict(metrics) for data_type, metrics in self._metrics.items()}
+            for metrics in by_type.values():
+                lookups = metrics['hits'] + metrics['misses']
+                metrics['hit_rate'] = round(metrics['hits'] / lookups, 4) if lookups else 0
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'usage_percent': round(self._total_bytes * 100 / self.max_bytes, 2) if self.max_bytes else 0,
+                'by_type': by_type
+            }
+
+
+class CacheNamespace:
+    """Visão de um MemoryCache restrita às chaves de um prefixo"""
+
+    def __init__(self, cache: MemoryCache, name: str):
+        self.cache = cache
+        self.name = name
+        self.prefix = f"{name}:"
+
+    def get(self, key: str, data_type: str = 'default', max_age: Optional[float] = None) -> Optional[Any]:
+        return self.cache.get(self.prefix + key, data_type, max_age)
+
+    def lookup(self, key: str, data_type: str = 'default') -> Optional[Tuple[Any, Optional[str], bool]]:
+        return self.cache.lookup(self.prefix + key, data_type)
+
+    def set(self, key: str, value: Any, data_type: str = 'default',
+            ttl: Optional[float] = None, expires_at: Optional[float] = None,
+            version: Optional[str] = None, tags: Optional[Iterable[str]] = None) -> bool:
+        return self.cache.set(self.prefix + key, value, data_type, ttl, expires_at, version, tags)
+
+    def set_version(self, key: str, version: Optional[str], value: Any = None) -> bool:
+        return self.cache.set_version(self.prefix + key, version, value)
+
+    def refresh(self, key: str, expires_at: float) -> bool:
+        return self.cache.refresh(self.prefix + key, expires_at)
+
+    def delete(self, key: str) -> bool:
+        return self.cache.delete(self.prefix + key)
+
+    def clear(self, pattern: Optional[str] = None, data_type: Optional[str] = None) -> int:
+        return self.cache.clear(self.prefix, pattern, data_type)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        return self.cache.invalidate_tags(tags, self.prefix)
+
+    def purge_expired(self) -> int:
+        return self.cache.purge_expired(self.prefix)
+
+    def keys(self) -> List[str]:
+        return [key[len(self.prefix):] for key in self.cache.keys(self.prefix)]
+
+    def __contains__(self, key: str) -> bool:
+        return self.cache.get_entry_info(self.prefix + key) is not None
+
+    def __len__(self) -> int:
+        return len(self.cache.keys(self.prefix))
+
+
+# Instância global compartilhada pelas camadas de cache do processo
+memory_cache = MemoryCache(
+    max_bytes=int(float(os.getenv('MEMORY_CACHE_MAX_MB', '256')) * 1024 * 1024)
+)
@@ -1,24 +1,36 @@
 import requests
 import json
-from typing import Dict, List, Optional, Callable
+from typing import Dict, Iterator, List, Optional, Callable
 import sys
 import os
+import threading
 import time
-import asyncio
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import Settings
+from .memory_cache import memory_cache, SERVICES_CATALOGUE_TAG
+from .invalidation import invalidation_bus
+from .refresh_lock import refresh_coordinator
+from .dataset_loader import dataset_loader, DatasetGraph, REQUIRED
+from .background_service import background_service
+from .progress_events import progress_events
+from .display import attach_display, order_display, client_display
+
+# Chave das ordens de serviço no cache compartilhado (a mesma do carregador progressivo)
+SHARED_SERVICE_ORDERS_KEY = "all_service_orders"
 
 class OmieService:
     def __init__(self):
+        # Importado sob demanda: pydantic-settings pesa na importação do módulo
+        from config import Settings
         self.settings = Settings()
         self.base_url = self.settings.BASE_URL
         self.app_key = self.settings.OMIE_APP_KEY
         self.app_secret = self.settings.OMIE_APP_SECRET
         self.headers = {"Content-Type": "application/json"}
         
-        # Cache simples com expiração configurável (fallback)
-        self._cache = {}
+        # Cache em memória (LRU com orçamento de bytes compartilhado) com expiração configurável
+        self._cache = memory_cache.namespace("omie")
         self._cache_expiry = 600  # 10 minutos em segundos (padrão)
         self._service_cache_expiry = 1800  # 30 minutos para ordens de serviço
         self._mapping_cache_expiry = 3600  # 1 hora para mapeamentos (mudam menos)
@@ -26,6 +38,22 @@ class OmieService:
         # Sistema de cache inteligente (será inicializado externamente)
         self.intelligent_cache = None
         self.progress_callback: Optional[Callable] = None
+        
+        # Atualização antecipada: leituras de cache ignoradas apenas na thread que atualiza
+        self._refresh_state = threading.local()
+    
+    @contextmanager
+    def force_refresh(self):
+        """Recarrega da API na thread atual sem descartar o cache usado pelas demais"""
+        previous = getattr(self._refresh_state, 'active', False)
+        self._refresh_state.active = True
+        try:
+            yield
+        finally:
+            self._refresh_state.active = previous
+    
+    def _is_forcing_refresh(self) -> bool:
+        return getattr(self._refresh_state, 'active', False)
     
     def _get_cache_key(self, method_name: str, **kwargs) -> str:
         """Gera uma chave de cache baseada no método e parâmetros"""
@@ -36,43 +64,55 @@ class OmieService:
     
     def _get_from_cache(self, cache_key: str, use_service_expiry: bool = False, use_mapping_expiry: bool = False):
         """Recupera dados do cache se ainda válidos"""
-        if cache_key in self._cache:
-            data, timestamp = self._cache[cache_key]
-            
-            # Determinar tempo de expiração baseado no tipo de dados
-            if use_mapping_expiry:
-                expiry_time = self._mapping_cache_expiry
-            elif use_service_expiry:
-                expiry_time = self._service_cache_expiry
-            else:
-                expiry_time = self._cache_expiry
-                
-            if time.time() - timestamp < expiry_time:
-                return data
-            else:
-                # Remove entrada expirada
-                del self._cache[cache_key]
-        return None
+        if self._is_forcing_refresh():
+            return None
+        
+        # Determinar tempo de expiração baseado no tipo de dados
+        if use_mapping_expiry:
+            expiry_time = self._mapping_cache_expiry
+        elif use_service_expiry:
+            expiry_time = self._service_cache_expiry
+        else:
+            expiry_time = self._cache_expiry
+        
+        return self._cache.get(cache_key, max_age=expiry_time)
+    
+    def _get_cache_ttl(self, data_type: str) -> int:
+        """Retorna o TTL local (em segundos) para o tipo de dados"""
+        if data_type == "service_orders":
+            return self._service_cache_expiry
+        if data_type in ("stats", "default"):
+            return self._cache_expiry
+        return self._mapping_cache_expiry
     
-    def _set_cache(self, cache_key: str, data):
-        """Armazena dados no cache com timestamp"""
-        self._cache[cache_key] = (data, time.time())
+    def _set_cache(self, cache_key: str, data, data_type: str = "default", tags: Optional[List[str]] = None):
+        """Armazena dados no cache com TTL do tipo de dados"""
+        self._cache.set(cache_key, data, data_type, ttl=self._get_cache_ttl(data_type), tags=tags)
     
     def clear_cache(self):
-        """Limpa todo o cache"""
+        """Limpa todo o cache (também nos demais workers)"""
         self._cache.clear()
+        invalidation_bus.publish(namespace=self._cache.name)
     
     def clear_cache_by_pattern(self, pattern: str):
-        """Limpa entradas do cache que contenham o padrão especificado"""
-        keys_to_remove = [key for key in self._cache.keys() if pattern in key]
-        for key in keys_to_remove:
-            del self._cache[key]
+        """Limpa entradas do cache que contenham o padrão especificado (também nos demais workers)"""
+        self._cache.clear(pattern=pattern)
+        invalidation_bus.publish(namespace=self._cache.name, pattern=pattern)
+    
+    def invalidate_services_catalogue(self):
+        """Invalida todos os dados dependentes do catálogo de serviços (local e persistente)"""
+        if self.intelligent_cache:
+            self.intelligent_cache.invalidate_tags([SERVICES_CATALOGUE_TAG])
+        else:
+            self._cache.invalidate_tags([SERVICES_CATALOGUE_TAG])
+            invalidation_bus.publish(namespace=self._cache.name, tags=[SERVICES_CATALOGUE_TAG])
+        print("Cache do catálogo de serviços invalidado")
     
     def clear_weeks_cache(self):
         """Limpa especificamente o cache de semanas disponíveis"""
         self.clear_cache_by_pattern("get_available_weeks_for_services")
         if self.intelligent_cache:
-            asyncio.create_task(self.intelligent_cache.clear_cache(pattern="get_available_weeks_for_services"))
+            self.intelligent_cache.clear_cache(pattern="get_available_weeks_for_services")
         print("Cache de semanas disponíveis limpo")
     
     def set_intelligent_cache(self, cache_service):
@@ -84,20 +124,34 @@ class OmieService:
         """Define callback para progresso de carregamento"""
         self.progress_callback = callback
     
-    async def _get_from_intelligent_cache(self, cache_key: str, data_type: str) -> Optional[any]:
+    def _report_page(self, dataset: str, page: int, total_pages: int, records: int):
+        """Publica o progresso de um paginador (evento 'page' do stream de progresso)"""
+        progress_events.publish('page', {
+            'dataset': dataset,
+            'page': page,
+            'total_pages': total_pages,
+            'records': records
+        })
+        if dataset == 'service_orders' and self.progress_callback:
+            try:
+                self.progress_callback(page, total_pages, records)
+            except Exception as e:
+                print(f"Erro no callback de progresso: {str(e)}")
+    
+    def _get_from_intelligent_cache(self, cache_key: str, data_type: str) -> Optional[any]:
         """Recupera dados do cache inteligente se disponível"""
-        if self.intelligent_cache:
+        if self.intelligent_cache and not self._is_forcing_refresh():
             try:
-                return await self.intelligent_cache.get(cache_key, data_type)
+                return self.intelligent_cache.get_sync(cache_key, data_type)
             except Exception as e:
                 print(f"Erro ao acessar cache inteligente: {e}")
         return None
     
-    async def _set_intelligent_cache(self, cache_key: str, data: any, data_type: str) -> bool:
+    def _set_intelligent_cache(self, cache_key: str, data: any, data_type: str) -> bool:
         """Armazena dados no cache inteligente se disponível"""
         if self.intelligent_cache:
             try:
-                return await self.intelligent_cache.set(cache_key, data, data_type)
+                return self.intelligent_cache.set_sync(cache_key, data, data_type)
             except Exception as e:
                 print(f"Erro ao salvar no cache inteligente: {e}")
         return False
@@ -181,7 +235,7 @@ class OmieService:
                 clients = response.get("clientes_cadastro", [])
                 all_clients.extend(clients)
             
-            return all_clients
+            return attach_display(all_clients, client_display)
             
         except Exception as e:
             print(f"Erro ao buscar clientes: {str(e)}")
@@ -210,6 +264,7 @@ class OmieService:
             # Adiciona os clientes da primeira página
             clients = first_response.get("clientes_cadastro_resumido", [])
             all_clients.extend(clients)
+            self._report_page('clients', 1, total_pages, len(all_clients))
             
             # Busca as páginas restantes com timeout otimizado
             for page in range(2, total_pages + 1):
@@ -217,6 +272,7 @@ class OmieService:
                     response = self.get_clients_summary_page(page)
                     clients = response.get("clientes_cadastro_resumido", [])
                     all_clients.extend(clients)
+                    self._report_page('clients', page, total_pages, len(all_clients))
                     
                     # Log de progresso a cada 20 páginas
                     if page % 20 == 0:
@@ -230,7 +286,7 @@ class OmieService:
             print(f"Clientes carregados: {len(all_clients)} registros de {total_pages} páginas")
             
             # Armazenar no cache
-            self._set_cache(cache_key, all_clients)
+            self._set_cache(cache_key, all_clients, "clients")
             return all_clients
             
         except Exception as e:
@@ -243,21 +299,10 @@ class OmieService:
         
         # Tentar cache inteligente se disponível
         if self.intelligent_cache:
-            try:
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    cached_mapping = loop.run_until_complete(
-                        self._get_from_intelligent_cache(cache_key, "mappings")
-                    )
-                    if cached_mapping is not None:
-                        print(f"Mapeamento de clientes carregado do cache inteligente: {len(cached_mapping)} clientes")
-                        return cached_mapping
-                finally:
-                    loop.close()
-            except Exception as e:
-                print(f"Erro ao acessar cache inteligente para mapeamento: {e}")
+            cached_mapping = self._get_from_intelligent_cache(cache_key, "mappings")
+            if cached_mapping is not None:
+                print(f"Mapeamento de clientes carregado do cache inteligente: {len(cached_mapping)} clientes")
+                return cached_mapping
         
         # Verificar cache local com tempo de vida estendido
         cached_data = self._get_from_cache(cache_key, use_mapping_expiry=True)
@@ -304,23 +349,11 @@ class OmieService:
                     pass
             
             # Armazenar no cache local
-            self._set_cache(cache_key, mapping)
+            self._set_cache(cache_key, mapping, "mappings")
             
             # Salvar no cache inteligente se disponível
-            if self.intelligent_cache:
-                try:
-                    import asyncio
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(
-                            self._set_intelligent_cache(cache_key, mapping, "mappings")
-                        )
-                        print("Mapeamento de clientes salvo no cache inteligente")
-                    finally:
-                        loop.close()
-                except Exception as e:
-                    print(f"Erro ao salvar mapeamento no cache inteligente: {e}")
+            if self._set_intelligent_cache(cache_key, mapping, "mappings"):
+                print("Mapeamento de clientes salvo no cache inteligente")
             
             print(f"Mapeamento de clientes criado: {len(mapping)} clientes")
             return mapping
@@ -372,6 +405,7 @@ class OmieService:
             # Adiciona os vendedores da primeira página
             sellers = first_response.get("cadastro", [])
             all_sellers.extend(sellers)
+            self._report_page('sellers', 1, total_pages, len(all_sellers))
             
             # Busca as páginas restantes com timeout otimizado
             for page in range(2, total_pages + 1):
@@ -379,6 +413,7 @@ class OmieService:
                     response = self.get_sellers_page(page)
                     sellers = response.get("cadastro", [])
                     all_sellers.extend(sellers)
+                    self._report_page('sellers', page, total_pages, len(all_sellers))
                     
                     # Log de progresso a cada 10 páginas
                     if page % 10 == 0:
@@ -392,7 +427,7 @@ class OmieService:
             print(f"Vendedores carregados: {len(all_sellers)} registros de {total_pages} páginas")
             
             # Armazenar no cache
-            self._set_cache(cache_key, all_sellers)
+            self._set_cache(cache_key, all_sellers, "sellers")
             return all_sellers
             
         except Exception as e:
@@ -438,7 +473,7 @@ class OmieService:
                     pass
             
             # Armazenar no cache
-            self._set_cache(cache_key, mapping)
+            self._set_cache(cache_key, mapping, "mappings")
             print(f"Mapeamento de vendedores criado: {len(mapping)} vendedores")
             return mapping
             
@@ -463,27 +498,31 @@ class OmieService:
     def search_clients(self, search_term: str) -> List[dict]:
         """Busca clientes por nome, razão social ou CNPJ/CPF"""
         try:
-            all_clients = self.get_all_clients()
-            search_term = search_term.lower()
-            
-            filtered_clients = []
-            for client in all_clients:
-                # Busca em nome fantasia, razão social e CNPJ/CPF
-                nome_fantasia = client.get("nome_fantasia", "").lower()
-                razao_social = client.get("razao_social", "").lower()
-                cnpj_cpf = client.get("cnpj_cpf", "").lower()
-                
-                if (search_term in nome_fantasia or 
-                    search_term in razao_social or 
-                    search_term in cnpj_cpf):
-                    filtered_clients.append(client)
-            
-            return filtered_clients
+            return list(self.iter_clients(search_term))
             
         except Exception as e:
             print(f"Erro ao buscar clientes: {str(e)}")
             return []
     
+    def iter_clients(self, search_term: Optional[str] = None) -> Iterator[dict]:
+        """Itera os clientes (filtrados por nome, razão social ou CNPJ/CPF) sem montar uma nova lista"""
+        all_clients = self.get_all_clients()
+        if not search_term:
+            yield from all_clients
+            return
+        
+        search_term = search_term.lower()
+        for client in all_clients:
+            # Busca em nome fantasia, razão social e CNPJ/CPF
+            nome_fantasia = client.get("nome_fantasia", "").lower()
+            razao_social = client.get("razao_social", "").lower()
+            cnpj_cpf = client.get("cnpj_cpf", "").lower()
+            
+            if (search_term in nome_fantasia or 
+                search_term in razao_social or 
+                search_term in cnpj_cpf):
+                yield client
+    
     def get_clients_stats(self) -> dict:
         """Retorna estatísticas dos clientes"""
         # Verificar cache inteligente primeiro
@@ -491,21 +530,10 @@ class OmieService:
         
         # Tentar cache inteligente se disponível
         if self.intelligent_cache:
-            try:
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    cached_stats = loop.run_until_complete(
-                        self._get_from_intelligent_cache(cache_key, "stats")
-                    )
-                    if cached_stats is not None:
-                        print("Estatísticas de clientes carregadas do cache inteligente")
-                        return cached_stats
-                finally:
-                    loop.close()
-            except Exception as e:
-                print(f"Erro ao acessar cache inteligente para stats: {e}")
+            cached_stats = self._get_from_intelligent_cache(cache_key, "stats")
+            if cached_stats is not None:
+                print("Estatísticas de clientes carregadas do cache inteligente")
+                return cached_stats
         
         # Verificar cache local
         cached_data = self._get_from_cache(cache_key)
@@ -543,23 +571,11 @@ class OmieService:
             }
             
             # Salvar no cache local
-            self._set_cache(cache_key, stats)
+            self._set_cache(cache_key, stats, "stats")
             
             # Salvar no cache inteligente se disponível
-            if self.intelligent_cache:
-                try:
-                    import asyncio
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        loop.run_until_complete(
-                            self._set_intelligent_cache(cache_key, stats, "stats")
-                        )
-                        print("Estatísticas salvas no cache inteligente")
-                    finally:
-                        loop.close()
-                except Exception as e:
-                    print(f"Erro ao salvar no cache inteligente: {e}")
+            if self._set_intelligent_cache(cache_key, stats, "stats"):
+                print("Estatísticas salvas no cache inteligente")
             
             return stats
             
@@ -867,13 +883,73 @@ class OmieService:
     
     def get_all_service_orders(self, use_optimized_loading: bool = True) -> List[dict]:
         """Busca todas as ordens de serviço com estratégia de carregamento otimizada"""
-        # Verificar cache primeiro (com tempo de vida estendido)
+        # Verificar cache primeiro (com tempo de vida estendido; a cópia vencida é mantida como fallback)
+        cache_key = self._get_cache_key("get_all_service_orders")
+        cached = self._cache.lookup(cache_key, "service_orders")
+        forcing = self._is_forcing_refresh()
+        if cached and cached[2] and not forcing:
+            print(f"Ordens de serviço carregadas do cache: {len(cached[0])} registros")
+            return cached[0]
+        
+        # Apenas um processo/instância recarrega da API; os demais aguardam o
+        # resultado publicado no cache compartilhado ou servem a cópia anterior
+        try:
+            return refresh_coordinator.run(
+                "service_orders",
+                load=lambda: self._load_all_service_orders(use_optimized_loading),
+                read_shared=None if forcing else self._read_shared_service_orders,
+                publish=self._publish_service_orders,
+                stale=cached[0] if cached else None
+            )
+        except Exception:
+            # Falha do Omie: servir a cópia vencida (a atualização forçada precisa ver o erro)
+            if cached and not forcing:
+                print(f"Servindo ordens de serviço anteriores após falha na atualização: {len(cached[0])} registros")
+                return cached[0]
+            raise
+    
+    def _read_shared_service_orders(self) -> Optional[List[dict]]:
+        """Lê as ordens de serviço publicadas por outro processo no cache compartilhado"""
+        orders = self._get_from_intelligent_cache(SHARED_SERVICE_ORDERS_KEY, "service_orders")
+        if orders is not None:
+            print(f"Ordens de serviço carregadas do cache compartilhado: {len(orders)} registros")
+            attach_display(orders, order_display)
+            self._set_cache(self._get_cache_key("get_all_service_orders"), orders, "service_orders")
+        return orders
+    
+    def _publish_service_orders(self, orders: List[dict]):
+        """Publica as ordens de serviço no cache compartilhado (gravação imediata)"""
+        if self._set_intelligent_cache(SHARED_SERVICE_ORDERS_KEY, orders, "service_orders"):
+            self.intelligent_cache.flush_writes()
+    
+    def services_data_graph(self) -> DatasetGraph:
+        """
+        Grafo dos dados usados pelas rotas de serviços
+
+        Ordens e mapeamentos são independentes e carregados em paralelo;
+        'invoiced_orders' depende apenas das ordens, então os filtros podem
+        começar antes de os mapeamentos ficarem prontos. As opções de período
+        (anos, meses e semanas) aguardam as ordens para não carregá-las duas vezes.
+        """
+        graph = dataset_loader.graph()
+        graph.add('service_orders', self.get_all_service_orders, default=REQUIRED, label='ordens de serviço')
+        graph.add('invoiced_orders',
+                  lambda service_orders: [o for o in service_orders if o.get('Cabecalho', {}).get('cEtapa') == '60'],
+                  depends_on=('service_orders',), default=REQUIRED, label='ordens faturadas')
+        graph.add('client_name_mapping', self.get_client_name_mapping, default={}, label='mapeamento de clientes')
+        graph.add('seller_name_mapping', self.get_seller_name_mapping, default={}, label='mapeamento de vendedores')
+        graph.add('service_name_mapping', self.get_service_name_mapping, default={}, label='mapeamento de serviços')
+        graph.add('available_years', lambda service_orders: self.get_available_years_for_services(),
+                  depends_on=('service_orders',), default=[], label='anos disponíveis')
+        graph.add('available_months', lambda service_orders: self.get_available_months_for_services(),
+                  depends_on=('service_orders',), default=[], label='meses disponíveis')
+        graph.add('available_weeks', lambda service_orders: self.get_available_weeks_for_services(fill_gaps=True),
+                  depends_on=('service_orders',), default=[], label='semanas disponíveis')
+        return graph
+    
+    def _load_all_service_orders(self, use_optimized_loading: bool = True) -> List[dict]:
+        """Carrega todas as ordens de serviço da API Omie e armazena no cache local"""
         cache_key = self._get_cache_key("get_all_service_orders")
-        cached_data = self._get_from_cache(cache_key, use_service_expiry=True)
-        if cached_data is not None:
-            print(f"Ordens de serviço carregadas do cache: {len(cached_data)} registros")
-            return cached_data
-        
         all_orders = []
         page = 1
         
@@ -892,6 +968,7 @@ class OmieService:
             # Adiciona as ordens da primeira página
             orders = first_response.get("osCadastro", [])
             all_orders.extend(orders)
+            self._report_page('service_orders', 1, total_pages, len(all_orders))
             
             # Busca as páginas restantes com timeout otimizado
             for page in range(2, total_pages + 1):
@@ -899,6 +976,7 @@ class OmieService:
                     response = self.get_service_orders_page(page)
                     orders = response.get("osCadastro", [])
                     all_orders.extend(orders)
+                    self._report_page('service_orders', page, total_pages, len(all_orders))
                     
                     # Log de progresso a cada 10 páginas
                     if page % 10 == 0:
@@ -911,13 +989,15 @@ class OmieService:
             
             print(f"Ordens de serviço carregadas: {len(all_orders)} registros de {total_pages} páginas")
             
-            # Armazenar no cache
-            self._set_cache(cache_key, all_orders)
+            # Armazenar no cache (com os valores de exibição já formatados)
+            attach_display(all_orders, order_display)
+            self._set_cache(cache_key, all_orders, "service_orders")
             return all_orders
             
         except Exception as e:
+            # Propagar: uma lista vazia seria tratada (e publicada) como carga bem-sucedida
             print(f"Erro ao buscar ordens de serviço: {str(e)}")
-            return []
+            raise
     
     def _get_service_orders_optimized(self, first_response: dict, total_pages: int) -> List[dict]:
         """Estratégia otimizada para muitas páginas - carrega em lotes com pausa"""
@@ -926,6 +1006,7 @@ class OmieService:
         # Adiciona as ordens da primeira página
         orders = first_response.get("osCadastro", [])
         all_orders.extend(orders)
+        self._report_page('service_orders', 1, total_pages, len(all_orders))
         
         # Carrega em lotes de 8 páginas por vez com pausa entre lotes
         batch_size = 8
@@ -942,6 +1023,7 @@ class OmieService:
                     response = self.get_service_orders_page(page)
                     orders = response.get("osCadastro", [])
                     all_orders.extend(orders)
+                    self._report_page('service_orders', page, total_pages, len(all_orders))
                     batch_orders += len(orders)
                     
                     # Pequena pausa entre páginas para não sobrecarregar
@@ -961,8 +1043,9 @@ class OmieService:
         print(f"Carregamento otimizado concluído: {len(all_orders)} ordens de serviço")
         
         # Cache com tempo de vida maior para dados completos
+        attach_display(all_orders, order_display)
         cache_key = self._get_cache_key("get_all_service_orders")
-        self._set_cache(cache_key, all_orders)
+        self._set_cache(cache_key, all_orders, "service_orders")
         
         return all_orders
     
@@ -1428,7 +1511,7 @@ class OmieService:
                     })
             
             # Armazenar no cache
-            self._set_cache(cache_key, result)
+            self._set_cache(cache_key, result, "filters")
             print(f"Anos disponíveis processados: {len(result)} anos")
             
             return result
@@ -1623,7 +1706,7 @@ class OmieService:
                     })
             
             # Armazenar no cache
-            self._set_cache(cache_key, result)
+            self._set_cache(cache_key, result, "filters")
             print(f"Semanas disponíveis processadas: {len(result)} semanas")
             
             # Debug: mostrar as primeiras 10 semanas para verificar ordenação
@@ -1928,11 +2011,17 @@ class OmieService:
             result['service_orders'] = self.get_all_service_orders(use_optimized_loading=True)
             print(f"Carregadas {len(result['service_orders'])} ordens de serviço")
             
+            # Ponto de cancelamento entre as etapas (tarefa em background)
+            background_service.raise_if_cancelled()
+            
             # Carregar mapeamento completo de clientes
             print("Carregando mapeamento completo de clientes...")
             result['client_mapping'] = self.get_client_name_mapping()
             print(f"Carregados {len(result['client_mapping'])} clientes")
             
+            # Ponto de cancelamento entre as etapas (tarefa em background)
+            background_service.raise_if_cancelled()
+            
             # Carregar mapeamento completo de vendedores
             print("Carregando mapeamento completo de vendedores...")
             result['seller_mapping'] = self.get_seller_name_mapping()
@@ -1986,6 +2075,7 @@ class OmieService:
             # Adiciona os serviços da primeira página
             services = first_response.get("cadastros", [])
             all_services.extend(services)
+            self._report_page('services', 1, total_pages, len(all_services))
             
             # Busca as páginas restantes com timeout otimizado
             for page in range(2, total_pages + 1):
@@ -1993,6 +2083,7 @@ class OmieService:
                     response = self.get_services_page(page)
                     services = response.get("cadastros", [])
                     all_services.extend(services)
+                    self._report_page('services', page, total_pages, len(all_services))
                     
                     # Log de progresso a cada 10 páginas
                     if page % 10 == 0:
@@ -2006,7 +2097,7 @@ class OmieService:
             print(f"Serviços carregados: {len(all_services)} registros de {total_pages} páginas")
             
             # Armazenar no cache
-            self._set_cache(cache_key, all_services)
+            self._set_cache(cache_key, all_services, "services", tags=[SERVICES_CATALOGUE_TAG])
             return all_services
             
         except Exception as e:
@@ -2132,7 +2223,7 @@ class OmieService:
                     mapping[service_code] = service_name
             
             # Armazenar no cache
-            self._set_cache(cache_key, mapping)
+            self._set_cache(cache_key, mapping, "mappings", tags=[SERVICES_CATALOGUE_TAG])
             print(f"Mapeamento de serviços criado: {len(mapping)} serviços")
             
             return mapping
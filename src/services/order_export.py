@@ -0,0 +1,104 @@
+"""
+Exportação de Ordens de Serviço
+Gera CSV ou NDJSON das ordens filtradas em streaming, com nomes de cliente,
+vendedor e serviços resolvidos a partir dos mapeamentos
+"""
+
+import csv
+import io
+from typing import Dict, Iterable, Iterator, List
+
+from . import json_codec
+
+# Colunas exportadas (mesma ordem no CSV e no NDJSON)
+EXPORT_COLUMNS = [
+    'numero_os',
+    'codigo_os',
+    'data_previsao',
+    'etapa',
+    'valor_total',
+    'codigo_cliente',
+    'cliente',
+    'codigo_vendedor',
+    'vendedor',
+    'servicos',
+    'observacoes'
+]
+
+# Linhas acumuladas antes de cada envio
+EXPORT_BATCH_SIZE = 500
+
+# Início de célula que planilhas interpretam como fórmula (injeção de CSV)
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _neutralize_formula(value):
+    """Prefixa com ' textos que o Excel/LibreOffice executariam como fórmula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_row(order: dict, client_name_mapping: Dict, seller_name_mapping: Dict,
+               service_name_mapping: Dict) -> Dict:
+    """Achata uma ordem de serviço em uma linha de exportação com os nomes resolvidos"""
+    cabecalho = order.get('Cabecalho', {})
+    client_code = cabecalho.get('nCodCli', '')
+    seller_code = cabecalho.get('nCodVend', '')
+
+    services = []
+    for servico in order.get('ServicosPrestados', []) or []:
+        name = service_name_mapping.get(servico.get('nCodServ')) or servico.get('cDescServ', '').strip()
+        if name:
+            services.append(name)
+
+    return {
+        'numero_os': cabecalho.get('cNumOS', ''),
+        'codigo_os': cabecalho.get('nCodOS', ''),
+        'data_previsao': cabecalho.get('dDtPrevisao', ''),
+        'etapa': cabecalho.get('cEtapa', ''),
+        'valor_total': cabecalho.get('nValorTotal', 0),
+        'codigo_cliente': client_code,
+        'cliente': client_name_mapping.get(client_code, f'Cliente {client_code}' if client_code else ''),
+        'codigo_vendedor': seller_code,
+        'vendedor': seller_name_mapping.get(seller_code, ''),
+        'servicos': ' | '.join(services),
+        'observacoes': (order.get('Observacoes', {}) or {}).get('cObsOS', '')
+    }
+
+
+def iter_csv(rows: Iterable[Dict], columns: List[str] = EXPORT_COLUMNS) -> Iterator[str]:
+    """
+    Gera CSV em blocos (com BOM UTF-8 para o Excel reconhecer os acentos)
+
+    Um único buffer é reaproveitado entre os blocos, mantendo a memória
+    constante. Textos vindos do Omie (observações, nomes) que começam como
+    fórmula são neutralizados; o NDJSON mantém os valores originais.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    buffer.write('\ufeff')
+    writer.writeheader()
+
+    pending = 0
+    for row in rows:
+        writer.writerow({key: _neutralize_formula(value) for key, value in row.items()})
+        pending += 1
+        if pending >= EXPORT_BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+def iter_ndjson(rows: Iterable[Dict]) -> Iterator[str]:
+    """Gera NDJSON (um objeto JSON por linha) em blocos"""
+    batch = []
+    for row in rows:
+        batch.append(json_codec.dumps(row, default=str))
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield '\n'.join(batch) + '\n'
+            batch = []
+    if batch:
+        yield '\n'.join(batch) + '\n'
@@ -0,0 +1,197 @@
+"""
+Índice de Ordens de Serviço
+Ordens ordenadas por data (mais recentes primeiro) com índices por período e
+por serviço, usados pela paginação por cursor (keyset) da API
+"""
+
+import base64
+import threading
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from datetime import date
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import json_codec
+from .memory_cache import memory_cache
+from .service_filters import _week_range, parse_order_date
+
+# Posição de uma ordem na ordenação: (data ordinal, nCodOS), ambos decrescentes
+SortKey = Tuple[int, int]
+
+# Separador dos campos no texto de busca (não aparece em buscas digitadas)
+_SEARCH_SEPARATOR = '\x1f'
+
+
+class InvalidCursor(ValueError):
+    """Cursor malformado ou adulterado"""
+
+
+def encode_cursor(key: SortKey, version: str) -> str:
+    """Cursor opaco com a chave da última ordem entregue e a versão do snapshot"""
+    raw = json_codec.dumps_bytes([key[0], key[1], version])
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[SortKey, str]:
+    """Retorna ((data ordinal, nCodOS), versão) de um cursor de encode_cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        ordinal, code, version = json_codec.loads(raw)
+        return (int(ordinal), int(code)), str(version)
+    except Exception:
+        raise InvalidCursor('Cursor inválido')
+
+
+def _order_code(order: dict) -> int:
+    try:
+        return int(order.get('Cabecalho', {}).get('nCodOS') or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def date_bounds(year_filter: str = '', month_filter: str = '',
+                week_filter: str = '') -> Optional[Tuple[int, int]]:
+    """
+    Período dos filtros como (primeiro, último) dia ordinal, inclusive
+
+    Mesma precedência de iter_filtered_orders: ano, depois semana, depois mês
+    (que só vale sem semana). None quando não há filtro de período; período
+    vazio (1, 0) quando o valor do filtro é inválido.
+    """
+    try:
+        if year_filter:
+            year = int(year_filter)
+            return date(year, 1, 1).toordinal(), date(year, 12, 31).toordinal()
+        if week_filter:
+            week_range = _week_range(week_filter)
+            if not week_range:
+                return None  # Semana inválida desativa o filtro de período
+            return week_range[0].toordinal(), week_range[1].toordinal()
+        if month_filter:
+            month, year = (int(part) for part in month_filter.split('/'))
+            return date(year, month, 1).toordinal(), date(year, month, monthrange(year, month)[1]).toordinal()
+    except (TypeError, ValueError):
+        return 1, 0
+    return None
+
+
+class OrderIndex:
+    """
+    Ordens de um snapshot em ordem (data de previsão, nCodOS) decrescente
+
+    Como a lista está ordenada por data, qualquer filtro de período é um
+    intervalo contíguo encontrado por busca binária; o filtro de serviço usa
+    listas de posições por descrição. Um cursor (data, nCodOS) vira a posição
+    inicial por busca binária, então páginas profundas custam o mesmo que a
+    primeira. O texto de busca (com nomes de clientes e vendedores) é montado
+    na primeira busca e guardado por versão dos mapeamentos.
+    """
+
+    def __init__(self, orders: List[dict], version: str):
+        self.version = version
+        keyed = sorted(
+            ((parse_order_date(order.get('Cabecalho', {}).get('dDtPrevisao', '')).toordinal(),
+              _order_code(order), order) for order in orders),
+            key=lambda item: (item[0], item[1]), reverse=True)
+        self.orders = [order for _, _, order in keyed]
+        self.keys: List[SortKey] = [(ordinal, code) for ordinal, code, _ in keyed]
+        # Chaves negadas: crescentes, para o bisect
+        self._bisect_keys = [(-ordinal, -code) for ordinal, code in self.keys]
+
+        self.by_service: Dict[str, List[int]] = {}
+        for position, order in enumerate(self.orders):
+            for description in {s.get('cDescServ', '').strip() for s in order.get('ServicosPrestados', [])}:
+                self.by_service.setdefault(description, []).append(position)
+
+        self._search_lock = threading.Lock()
+        self._search_texts: Optional[Tuple[str, List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def date_range(self, bounds: Optional[Tuple[int, int]]) -> Tuple[int, int]:
+        """Intervalo de posições [início, fim) das ordens dentro do período"""
+        if bounds is None:
+            return 0, len(self.orders)
+        first_day, last_day = bounds
+        if first_day > last_day:
+            return 0, 0
+        start = bisect_left(self._bisect_keys, (-last_day,))
+        end = bisect_left(self._bisect_keys, (-first_day + 1,))
+        return start, max(start, end)
+
+    def position_after(self, key: SortKey) -> int:
+        """Primeira posição depois da chave do cursor (a ordem pode não existir mais)"""
+        return bisect_right(self._bisect_keys, (-key[0], -key[1]))
+
+    def search_texts(self, mappings_version: str, client_name_mapping: Dict,
+                     seller_name_mapping: Dict) -> List[str]:
+        """Texto de busca de cada posição (mesmos campos de iter_filtered_orders)"""
+        cached = self._search_texts
+        if cached is not None and cached[0] == mappings_version:
+            return cached[1]
+        with self._search_lock:
+            if self._search_texts is not None and self._search_texts[0] == mappings_version:
+                return self._search_texts[1]
+            texts = []
+            for order in self.orders:
+                cabecalho = order.get('Cabecalho', {})
+                client_code = cabecalho.get('nCodCli', '')
+                seller_code = cabecalho.get('nCodVend', '')
+                texts.append(_SEARCH_SEPARATOR.join((
+                    str(client_code),
+                    client_name_mapping.get(client_code, ''),
+                    str(cabecalho.get('cNumOS', '')),
+                    str(cabecalho.get('nCodOS', '')),
+                    str(seller_code),
+                    seller_name_mapping.get(seller_code, ''),
+                    order.get('Observacoes', {}).get('cObsOS', '')
+                )).lower())
+            self._search_texts = (mappings_version, texts)
+            return texts
+
+    def candidates(self, start: int, end: int, service_filter: str = '') -> Iterator[int]:
+        """Posições em [start, end) que atendem ao filtro de serviço, em ordem"""
+        if not service_filter:
+            return iter(range(start, end))
+        postings = self.by_service.get(service_filter, [])
+        return iter(postings[bisect_left(postings, start):bisect_left(postings, end)])
+
+    def count(self, start: int, end: int, service_filter: str = '') -> int:
+        """Quantidade de posições em [start, end) com o serviço (sem percorrê-las)"""
+        if not service_filter:
+            return end - start
+        postings = self.by_service.get(service_filter, [])
+        return bisect_left(postings, end) - bisect_left(postings, start)
+
+
+class OrderIndexCache:
+    """Índice do snapshot atual, reconstruído uma vez quando as ordens mudam"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Optional[OrderIndex] = None
+
+    def get(self, load_orders: Callable[[], List[dict]]) -> OrderIndex:
+        """
+        Retorna o índice da versão atual das ordens
+
+        A versão é lida antes do carregamento (mesma regra do ETag): se as
+        ordens mudarem durante a construção, a próxima chamada reconstrói.
+        """
+        version, _ = memory_cache.snapshot(('service_orders',))
+        index = self._index
+        if index is not None and index.version == version:
+            return index
+        with self._lock:
+            if self._index is None or self._index.version != version:
+                self._index = OrderIndex(load_orders(), version)
+            return self._index
+
+    def clear(self):
+        with self._lock:
+            self._index = None
+
+
+# Instância global do processo
+order_index_cache = OrderIndexCache()
@@ -0,0 +1,130 @@
+"""
+Eventos de Progresso em Tempo Real
+Canal em memória para eventos de progresso de carregamento (etapas e páginas
+dos paginadores da API Omie), entregue ao navegador via Server-Sent Events
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class ProgressEvents:
+    """
+    Canal publish/subscribe de eventos de progresso
+
+    Cada evento recebe um ID crescente e fica em um histórico limitado, de
+    modo que um cliente que reconecta (cabeçalho Last-Event-ID) recebe os
+    eventos perdidos. Os assinantes aguardam em uma Condition, sem polling.
+
+    O histórico é do processo: o ID enviado ao navegador leva um token do
+    processo, e um Last-Event-ID de outro worker não é confundido com um ID local.
+    """
+
+    def __init__(self, history: int = 200):
+        self._condition = threading.Condition()
+        self._events = deque(maxlen=history)
+        self._last_id = 0
+        self._token_pid: Optional[int] = None
+        self._token = ''
+
+    @property
+    def last_id(self) -> int:
+        return self._last_id
+
+    @property
+    def token(self) -> str:
+        """Token do processo (novo após fork: o histórico herdado não é deste worker)"""
+        if self._token_pid != os.getpid():
+            self._token_pid = os.getpid()
+            self._token = uuid.uuid4().hex[:8]
+        return self._token
+
+    def parse_event_id(self, value: Optional[str]) -> Optional[int]:
+        """ID local de um Last-Event-ID; None se ausente, inválido ou de outro processo"""
+        if not value:
+            return None
+        token, _, event_id = value.partition(':')
+        if token != self.token or not event_id.isdigit():
+            return None
+        return int(event_id)
+
+    def publish(self, event: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Publica um evento para todos os assinantes
+
+        Args:
+            event: Tipo do evento ('stage', 'page' ou 'done')
+            data: Conteúdo do evento (serializável em JSON)
+        """
+        with self._condition:
+            self._last_id += 1
+            entry = {'id': self._last_id, 'event': event, 'data': dict(data, timestamp=time.time())}
+            self._events.append(entry)
+            self._condition.notify_all()
+        return entry
+
+    def latest(self, event: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Último evento publicado (opcionalmente de um tipo)"""
+        with self._condition:
+            for entry in reversed(self._events):
+                if event is None or entry['event'] == event:
+                    return entry
+        return None
+
+    def wait_for(self, after_id: int, timeout: float) -> List[Dict[str, Any]]:
+        """Aguarda eventos com ID maior que after_id (até timeout segundos)"""
+        with self._condition:
+            if self._last_id <= after_id:
+                self._condition.wait(timeout)
+            return [entry for entry in self._events if entry['id'] > after_id]
+
+    def format_sse(self, entry: Dict[str, Any]) -> str:
+        """Formata um evento no protocolo text/event-stream (ID = token do processo + ID local)"""
+        payload = json.dumps(entry['data'], ensure_ascii=False, default=str)
+        return f"id: {self.token}:{entry['id']}\nevent: {entry['event']}\ndata: {payload}\n\n"
+
+    def stream(self, after_id: int, max_duration: float = 25, heartbeat: float = 10,
+               snapshot: bool = True) -> Iterator[str]:
+        """
+        Gera o stream SSE até um evento 'done' ou max_duration segundos
+
+        O stream é encerrado ao fim do carregamento para não prender um
+        worker síncrono; o cliente fecha o EventSource ao receber 'done' e,
+        se o tempo máximo for atingido, reconecta com Last-Event-ID. O tempo
+        máximo precisa ficar abaixo do --timeout do gunicorn, senão o worker
+        (e o cache em memória dele) é encerrado no meio do stream.
+
+        Args:
+            after_id: Entregar apenas eventos posteriores a este ID
+            max_duration: Tempo máximo de conexão
+            heartbeat: Intervalo dos comentários de keep-alive
+            snapshot: Enviar primeiro o último evento de etapa conhecido
+        """
+        yield "retry: 3000\n\n"
+
+        if snapshot:
+            current = self.latest('stage')
+            if current and current['id'] <= after_id:
+                yield self.format_sse(current)
+
+        deadline = time.time() + max_duration
+        while time.time() < deadline:
+            entries = self.wait_for(after_id, min(heartbeat, max(0.0, deadline - time.time())))
+            if not entries:
+                yield ": keep-alive\n\n"
+                continue
+
+            for entry in entries:
+                after_id = entry['id']
+                yield self.format_sse(entry)
+                if entry['event'] == 'done':
+                    return
+
+
+# Instância global (por processo)
+progress_events = ProgressEvents()
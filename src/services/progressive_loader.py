@@ -9,6 +9,7 @@ from typing import Any, Dict, Optional, Callable, List
 from datetime import datetime
 from .omie_service import OmieService
 from .cache_service import SupabaseCacheService
+from .progress_events import progress_events
 
 class ProgressiveDataLoader:
     """Carregador de dados progressivo com feedback em tempo real"""
@@ -20,12 +21,27 @@ class ProgressiveDataLoader:
         self.current_message = ""
         self.is_loading = False
         self.start_time = None
+        self.stage_manager = LoadingStageManager()
         
     def _update_progress(self, percentage: int, message: str, callback: Optional[Callable] = None):
         """Atualiza progresso e chama callback se fornecido"""
         self.current_progress = percentage
         self.current_message = message
         
+        # Publicar no stream de progresso (SSE)
+        self.stage_manager.update_stage_progress(max(percentage, 0), message)
+        progress_events.publish('stage', {
+            'stage': self.stage_manager.get_current_stage()['id'],
+            'progress': percentage,
+            'message': message,
+            'elapsed_time': time.time() - self.start_time if self.start_time else 0
+        })
+        if percentage >= 100 or percentage < 0:
+            progress_events.publish('done', {
+                'status': 'error' if percentage < 0 else 'success',
+                'message': message
+            })
+        
         if callback:
             callback(percentage, message)
         
@@ -48,9 +64,14 @@ class ProgressiveDataLoader:
             # Etapa 1: Verificar cache existente (5%)
             self._update_progress(5, "Verificando cache existente...", progress_callback)
             
-            # Verificar se há dados básicos em cache
+            # Verificar se há dados básicos em cache (uma única ida ao cache para todas as chaves;
+            # as etapas seguintes passam a ser atendidas pelo cache local)
             basic_cache_key = "dashboard_basic_data"
-            cached_basic = await self.cache_service.get(basic_cache_key, "dashboard")
+            prefetched = await self.cache_service.get_many(
+                [basic_cache_key, "client_name_mapping", "seller_name_mapping", "all_service_orders"],
+                "dashboard"
+            )
+            cached_basic = prefetched.get(basic_cache_key)
             
             # Etapa 2: Carregar mapeamentos essenciais (25%)
             self._update_progress(15, "Carregando mapeamentos de clientes...", progress_callback)
@@ -133,9 +154,9 @@ class ProgressiveDataLoader:
             print(f"📦 Dados carregados do cache: {cache_key}")
             return cached_data
         
-        # Se não há cache, carregar da API
+        # Se não há cache, carregar da API (fora do loop compartilhado)
         print(f"🔄 Carregando da API: {cache_key}")
-        data = loader_func()
+        data = await asyncio.to_thread(loader_func)
         
         # Salvar no cache
         await self.cache_service.set(cache_key, data, data_type)
@@ -156,7 +177,7 @@ class ProgressiveDataLoader:
         # Carregar da API com progresso
         self._update_progress(40, "Iniciando carregamento de ordens de serviço...", progress_callback)
         
-        # Simular progresso durante carregamento da API
+        # Progresso real por página (reportado pelos paginadores do OmieService)
         orders = []
         try:
             # Hook no método do omie_service para capturar progresso
@@ -175,7 +196,7 @@ class ProgressiveDataLoader:
             if hasattr(self.omie_service, 'set_progress_callback'):
                 self.omie_service.set_progress_callback(progress_hook)
             
-            orders = original_method()
+            orders = await asyncio.to_thread(original_method)
             
             # Salvar no cache
             await self.cache_service.set(cache_key, orders, "service_orders")
@@ -0,0 +1,278 @@
+"""
+Lock Distribuído de Atualização
+Leases por conjunto de dados para que apenas um processo/instância recarregue
+dados da API Omie enquanto os demais aguardam o resultado publicado ou usam dados antigos
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class FileLeaseStore:
+    """Leases em arquivos locais (coordena os workers de um mesmo host)"""
+
+    name = 'file'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, lease_name: str) -> str:
+        return os.path.join(self.directory, f"{lease_name}.lease")
+
+    def try_acquire_lease(self, lease_name: str, owner: str, ttl_seconds: float) -> bool:
+        """Adquire (ou renova) o lease se estiver livre, expirado ou já for do mesmo dono"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(lease_name), 'a+') as lease_file:
+            if fcntl:
+                fcntl.flock(lease_file, fcntl.LOCK_EX)
+            try:
+                lease_file.seek(0)
+                content = lease_file.read().strip()
+                try:
+                    current = json.loads(content) if content else None
+                except ValueError:
+                    current = None
+
+                now = time.time()
+                if current and current.get('owner') != owner and current.get('expires_at', 0) > now:
+                    return False
+
+                lease_file.seek(0)
+                lease_file.truncate()
+                lease_file.write(json.dumps({'owner': owner, 'expires_at': now + ttl_seconds}))
+                lease_file.flush()
+                return True
+            finally:
+                if fcntl:
+                    fcntl.flock(lease_file, fcntl.LOCK_UN)
+
+    def release_lease(self, lease_name: str, owner: str):
+        """Libera o lease se ainda pertencer ao dono"""
+        path = self._path(lease_name)
+        if not os.path.exists(path):
+            return
+        with open(path, 'r+') as lease_file:
+            if fcntl:
+                fcntl.flock(lease_file, fcntl.LOCK_EX)
+            try:
+                content = lease_file.read().strip()
+                try:
+                    current = json.loads(content) if content else None
+                except ValueError:
+                    current = None
+                if current and current.get('owner') == owner:
+                    lease_file.seek(0)
+                    lease_file.truncate()
+            finally:
+                if fcntl:
+                    fcntl.flock(lease_file, fcntl.LOCK_UN)
+
+
+class RefreshCoordinator:
+    """
+    Coordena atualizações de conjuntos de dados caros entre processos
+
+    Quem adquire o lease recarrega os dados e os publica no cache compartilhado;
+    os demais servem dados antigos (se houver) ou aguardam a publicação. Leases
+    expiram (cobrindo processos que caíram) e são renovados enquanto a carga dura.
+    """
+
+    def __init__(self, store, lease_seconds: float = 300, wait_timeout: float = 180,
+                 poll_interval: float = 1.0):
+        """
+        Args:
+            store: Armazenamento de leases (FileLeaseStore ou CacheBackend compartilhado)
+            lease_seconds: Duração do lease (renovado a cada 1/3 enquanto a carga dura)
+            wait_timeout: Tempo máximo aguardando a publicação de outro processo
+            poll_interval: Intervalo entre verificações do resultado publicado
+        """
+        self.store = store
+        self.lease_seconds = lease_seconds
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+        self._process_id: Optional[str] = None
+        self._pid: Optional[int] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'refreshes': 0,
+            'served_stale': 0,
+            'waited': 0,
+            'received_published': 0,
+            'wait_timeouts': 0,
+            'lease_errors': 0,
+            'claims': 0,
+            'claims_skipped': 0
+        }
+
+    def use_store(self, store):
+        """Troca o armazenamento de leases (ex.: backend compartilhado do cache)"""
+        self.store = store
+        print(f"🔒 Leases de atualização usando: {getattr(store, 'name', type(store).__name__)}")
+
+    def _process_owner(self) -> str:
+        """Identificador do processo (host, PID e um token por processo)"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._process_id = f"{socket.gethostname()}:{self._pid}:{uuid.uuid4().hex[:8]}"
+        return self._process_id
+
+    @property
+    def owner(self) -> str:
+        """Identificador do dono do lease (host, processo e thread)"""
+        return f"{self._process_owner()}:{threading.get_ident()}"
+
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+    def _try_acquire(self, name: str, owner: str) -> bool:
+        """Tenta adquirir o lease; falhas do armazenamento liberam a carga local"""
+        try:
+            return self.store.try_acquire_lease(name, owner, self.lease_seconds)
+        except Exception as e:
+            self._count('lease_errors')
+            print(f"⚠️  Erro ao adquirir lease '{name}': {e} - carregando localmente")
+            return True
+
+    def _release(self, name: str, owner: str):
+        try:
+            self.store.release_lease(name, owner)
+        except Exception as e:
+            self._count('lease_errors')
+            print(f"⚠️  Erro ao liberar lease '{name}': {e}")
+
+    def claim(self, name: str, window_seconds: float) -> bool:
+        """
+        Reserva uma tarefa periódica para este processo durante uma janela
+
+        O lease não é liberado: enquanto a janela não expira, os outros
+        processos não executam a mesma tarefa. O mesmo processo pode renovar
+        a reserva na próxima execução; se ele cair, outro assume depois da janela.
+        """
+        with self._stats_lock:
+            self._stats['claims'] += 1
+        try:
+            claimed = self.store.try_acquire_lease(name, self._process_owner(), window_seconds)
+        except Exception as e:
+            self._count('lease_errors')
+            print(f"⚠️  Erro ao reservar '{name}': {e} - executando localmente")
+            return True
+        if not claimed:
+            self._count('claims_skipped')
+        return claimed
+
+    def run(self, name: str, load: Callable[[], Any],
+            read_shared: Optional[Callable[[], Any]] = None,
+            publish: Optional[Callable[[Any], None]] = None,
+            stale: Any = None) -> Any:
+        """
+        Obtém um conjunto de dados garantindo uma única atualização por vez
+
+        Args:
+            name: Nome do conjunto de dados (lease)
+            load: Função que recarrega os dados da origem
+            read_shared: Função que lê o resultado publicado no cache compartilhado
+            publish: Função que publica o resultado no cache compartilhado
+            stale: Dados antigos para servir enquanto outro processo atualiza
+
+        Returns:
+            Dados carregados, publicados por outro processo ou antigos
+        """
+        if read_shared:
+            data = read_shared()
+            if data is not None:
+                self._count('received_published')
+                return data
+
+        owner = self.owner
+        if self._try_acquire(name, owner):
+            return self._refresh(name, owner, load, read_shared, publish)
+
+        if stale is not None:
+            self._count('served_stale')
+            print(f"🔒 '{name}' em atualização por outro processo - servindo dados anteriores")
+            return stale
+
+        # Aguardar a publicação do processo que detém o lease
+        self._count('waited')
+        print(f"🔒 '{name}' em atualização por outro processo - aguardando resultado")
+        deadline = time.time() + self.wait_timeout
+        while time.time() < deadline:
+            time.sleep(self.poll_interval)
+            if read_shared:
+                data = read_shared()
+                if data is not None:
+                    self._count('received_published')
+                    return data
+            if self._try_acquire(name, owner):
+                # Lease liberado sem publicação ou expirado (dono caiu)
+                return self._refresh(name, owner, load, read_shared, publish)
+
+        self._count('wait_timeouts')
+        print(f"⚠️  Tempo esgotado aguardando '{name}' - carregando localmente")
+        return load()
+
+    def _refresh(self, name: str, owner: str, load: Callable[[], Any],
+                 read_shared: Optional[Callable[[], Any]],
+                 publish: Optional[Callable[[Any], None]]) -> Any:
+        """Executa a carga como dono do lease, renovando-o até terminar"""
+        stop = threading.Event()
+
+        def heartbeat():
+            while not stop.wait(self.lease_seconds / 3):
+                self._try_acquire(name, owner)
+
+        renewer = threading.Thread(target=heartbeat, name=f"lease-{name}", daemon=True)
+        renewer.start()
+        try:
+            # Outro processo pode ter publicado entre a leitura e a aquisição
+            if read_shared:
+                data = read_shared()
+                if data is not None:
+                    self._count('received_published')
+                    return data
+
+            self._count('refreshes')
+            data = load()
+            if data and publish:
+                try:
+                    publish(data)
+                except Exception as e:
+                    print(f"⚠️  Erro ao publicar '{name}' no cache compartilhado: {e}")
+            return data
+        finally:
+            stop.set()
+            self._release(name, owner)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores de coordenação"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['store'] = getattr(self.store, 'name', type(self.store).__name__)
+        stats['lease_seconds'] = self.lease_seconds
+        return stats
+
+
+def default_lease_directory() -> str:
+    """Diretório padrão dos leases locais (src/cache_data/leases)"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.getenv('REFRESH_LEASE_DIR', os.path.join(base_dir, 'cache_data', 'leases'))
+
+
+# Instância global (leases em arquivo até um backend compartilhado ser configurado)
+refresh_coordinator = RefreshCoordinator(
+    FileLeaseStore(default_lease_directory()),
+    lease_seconds=float(os.getenv('REFRESH_LEASE_SECONDS', '300')),
+    wait_timeout=float(os.getenv('REFRESH_WAIT_TIMEOUT', '180'))
+)
@@ -0,0 +1,115 @@
+"""
+Filtros de Ordens de Serviço
+Filtros compartilhados pelo dashboard de serviços, pela API e pela exportação
+(ano, semana, mês, serviço e busca), aplicados em uma única passagem
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+def _week_range(week_filter: str):
+    """Converte 'YYYY-MM-DD_YYYY-MM-DD' em (início, fim); None se inválido"""
+    try:
+        start_date_str, end_date_str = week_filter.split("_")
+        return (datetime.strptime(start_date_str, '%Y-%m-%d'),
+                datetime.strptime(end_date_str, '%Y-%m-%d'))
+    except Exception as e:
+        print(f"Erro ao filtrar por semana: {str(e)}")
+        return None
+
+
+def _matches_date(date_str: str, year_filter: str, week_range, month_filter: str) -> bool:
+    """Filtro de período: ano tem prioridade sobre semana, e semana sobre mês"""
+    if not date_str:
+        return False
+    try:
+        if year_filter:
+            # Extrair ano da data (formato dd/mm/yyyy)
+            return date_str.split("/")[2] == year_filter
+        if week_range:
+            day, month, year = date_str.split("/")
+            order_date = datetime(int(year), int(month), int(day))
+            return week_range[0] <= order_date <= week_range[1]
+        # Extrair mês/ano da data (formato dd/mm/yyyy)
+        return "/".join(date_str.split("/")[1:]) == month_filter
+    except Exception:
+        return False
+
+
+def iter_filtered_orders(orders: Iterable[dict], year_filter: str = '', month_filter: str = '',
+                         week_filter: str = '', service_filter: str = '', search: str = '',
+                         client_name_mapping: Optional[Dict] = None,
+                         seller_name_mapping: Optional[Dict] = None) -> Iterator[dict]:
+    """
+    Itera as ordens que atendem a todos os filtros (sem listas intermediárias)
+
+    Args:
+        orders: Ordens de serviço
+        year_filter: Ano (yyyy)
+        month_filter: Mês (mm/yyyy), usado apenas sem ano e semana
+        week_filter: Semana ('YYYY-MM-DD_YYYY-MM-DD'), usada apenas sem ano
+        service_filter: Descrição exata do serviço prestado
+        search: Texto buscado em cliente, vendedor, número/código da OS e observações
+        client_name_mapping: Código do cliente -> nome (para a busca)
+        seller_name_mapping: Código do vendedor -> nome (para a busca)
+    """
+    week_range = _week_range(week_filter) if week_filter and not year_filter else None
+    # Semana inválida desativa o filtro de período (o mês só vale sem ano e sem semana)
+    filter_by_date = bool(year_filter or week_range or (month_filter and not week_filter))
+    search_lower = search.lower() if search else ''
+    client_name_mapping = client_name_mapping or {}
+    seller_name_mapping = seller_name_mapping or {}
+
+    for order in orders:
+        cabecalho = order.get('Cabecalho', {})
+
+        if filter_by_date and not _matches_date(cabecalho.get('dDtPrevisao', ''), year_filter,
+                                                week_range, month_filter):
+            continue
+
+        if service_filter:
+            servicos = order.get('ServicosPrestados', [])
+            if not any(s.get('cDescServ', '').strip() == service_filter for s in servicos):
+                continue
+
+        if search_lower:
+            observacoes = order.get('Observacoes', {})
+            client_code = cabecalho.get('nCodCli', '')
+            client_name = client_name_mapping.get(client_code, '').lower()
+            seller_code = cabecalho.get('nCodVend', '')
+            seller_name = seller_name_mapping.get(seller_code, '').lower()
+
+            # Buscar nos campos da estrutura da API, incluindo nome do cliente e vendedor
+            if not (search_lower in str(client_code).lower() or
+                    search_lower in client_name or
+                    search_lower in str(cabecalho.get('cNumOS', '')).lower() or
+                    search_lower in str(cabecalho.get('nCodOS', '')).lower() or
+                    search_lower in str(cabecalho.get('nCodVend', '')).lower() or
+                    search_lower in seller_name or
+                    search_lower in observacoes.get('cObsOS', '').lower()):
+                continue
+
+        yield order
+
+
+def filter_orders(orders: Iterable[dict], **filters) -> List[dict]:
+    """Lista das ordens que atendem aos filtros (ver iter_filtered_orders)"""
+    return list(iter_filtered_orders(orders, **filters))
+
+
+def parse_order_date(date_str: str) -> datetime:
+    """Converte data dd/mm/yyyy para datetime (datetime.min se ausente ou inválida)"""
+    try:
+        if date_str:
+            day, month, year = date_str.split('/')
+            return datetime(int(year), int(month), int(day))
+        return datetime.min
+    except Exception:
+        return datetime.min
+
+
+def sort_orders_by_date(orders: List[dict]):
+    """Ordena por data de previsão (mais recentes primeiro), na própria lista"""
+    orders.sort(key=lambda order: parse_order_date(order.get('Cabecalho', {}).get('dDtPrevisao', '')),
+                reverse=True)
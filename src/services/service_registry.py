@@ -0,0 +1,157 @@
+"""
+Registro de Serviços da Aplicação
+Cria os serviços (cache inteligente, Omie, autenticação, carregador
+progressivo e pré-carregamento) sob demanda, no primeiro uso, e mede o
+tempo de importação e de construção de cada um
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class BootReport:
+    """Tempos de inicialização do processo (importação e construção dos serviços)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps: Dict[str, float] = {}
+
+    def record(self, step: str, seconds: float):
+        with self._lock:
+            self._steps[step] = round(seconds * 1000, 1)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Etapas em milissegundos, na ordem em que ocorreram"""
+        with self._lock:
+            steps = dict(self._steps)
+        return {'steps_ms': steps, 'total_ms': round(sum(steps.values()), 1)}
+
+    def summary(self) -> str:
+        report = self.as_dict()
+        steps = ', '.join(f"{step}={ms}ms" for step, ms in report['steps_ms'].items())
+        return f"⏱️  Inicialização: {report['total_ms']}ms ({steps})"
+
+
+class ServiceRegistry:
+    """
+    Serviços da aplicação construídos sob demanda
+
+    Importar o app não cria clientes de rede nem threads: cada serviço é
+    construído (uma única vez, sob lock) no primeiro acesso. Serviços
+    opcionais que falham ao inicializar (cache inteligente, autenticação)
+    ficam como None, como antes.
+    """
+
+    def __init__(self, boot_report: BootReport):
+        self.boot_report = boot_report
+        self._lock = threading.RLock()
+        self._instances: Dict[str, Any] = {}
+        self._nested_seconds = 0.0
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        if name in self._instances:
+            return self._instances[name]
+        with self._lock:
+            if name not in self._instances:
+                # Tempo exclusivo: dependências construídas dentro da fábrica são medidas à parte
+                outer_nested, self._nested_seconds = self._nested_seconds, 0.0
+                started = time.perf_counter()
+                self._instances[name] = factory()
+                elapsed = time.perf_counter() - started
+                self.boot_report.record(name, elapsed - self._nested_seconds)
+                self._nested_seconds = outer_nested + elapsed
+            return self._instances[name]
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._instances
+
+    @property
+    def cache_service(self):
+        return self._get('cache_service', self._create_cache_service)
+
+    @property
+    def omie_service(self):
+        return self._get('omie_service', self._create_omie_service)
+
+    @property
+    def progressive_loader(self):
+        return self._get('progressive_loader', self._create_progressive_loader)
+
+    @property
+    def startup_service(self):
+        return self._get('startup_service', self._create_startup_service)
+
+    @property
+    def auth_service(self):
+        return self._get('auth_service', self._create_auth_service)
+
+    def _create_cache_service(self) -> Optional[Any]:
+        from .cache_service import SupabaseCacheService
+        try:
+            cache_service = SupabaseCacheService()
+            print(f"✅ Cache inteligente inicializado com sucesso (backend: {cache_service.backend.name})")
+            return cache_service
+        except Exception as e:
+            print(f"⚠️  Aviso: Cache inteligente não disponível: {e}")
+            print("   A aplicação continuará funcionando com cache local apenas.")
+            return None
+
+    def _create_omie_service(self):
+        from .omie_service import OmieService
+        from .refresh_lock import refresh_coordinator
+        from .api_endpoints import initialize_services
+
+        omie_service = OmieService()
+        cache_service = self.cache_service
+        if cache_service:
+            try:
+                omie_service.intelligent_cache = cache_service
+                print("✅ Cache inteligente integrado ao OmieService")
+
+                # Leases de atualização no armazenamento compartilhado (coordena instâncias diferentes)
+                if cache_service.backend.shared:
+                    refresh_coordinator.use_store(cache_service.backend)
+            except Exception as e:
+                print(f"⚠️  Erro ao integrar cache: {e}")
+
+            # Endpoints /api/v2 usam as mesmas instâncias
+            try:
+                initialize_services(omie_service, cache_service)
+            except Exception as e:
+                print(f"⚠️  Erro ao inicializar endpoints otimizados: {e}")
+        return omie_service
+
+    def _create_progressive_loader(self) -> Optional[Any]:
+        from .progressive_loader import ProgressiveDataLoader
+        cache_service = self.cache_service
+        if not cache_service:
+            return None
+        try:
+            progressive_loader = ProgressiveDataLoader(self.omie_service, cache_service)
+            print("✅ Carregador progressivo inicializado")
+            return progressive_loader
+        except Exception as e:
+            print(f"⚠️  Erro ao inicializar carregador progressivo: {e}")
+            return None
+
+    def _create_startup_service(self):
+        from .startup_service import initialize_startup_service
+        return initialize_startup_service(self.omie_service)
+
+    def _create_auth_service(self) -> Optional[Any]:
+        from .auth_service import AuthService
+        try:
+            auth_service = AuthService()
+            print("✅ Serviço de autenticação inicializado com sucesso")
+            return auth_service
+        except Exception as e:
+            print(f"⚠️  Aviso: Não foi possível inicializar o serviço de autenticação: {e}")
+            print("   Verifique se as variáveis SUPABASE_URL e SUPABASE_KEY estão configuradas corretamente no arquivo .env")
+            print("   A aplicação continuará funcionando, mas sem autenticação.")
+            return None
+
+
+# Instância global do processo
+boot_report = BootReport()
+service_registry = ServiceRegistry(boot_report)
@@ -0,0 +1,182 @@
+"""
+Dashboard de Serviços
+Contexto da página de serviços dividido em fragmentos independentes (opções
+de filtro, estatísticas e tabela de ordens), cada um carregando apenas os
+conjuntos de dados que usa
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .service_filters import filter_orders, sort_orders_by_date
+
+# Ordens por página na tabela do dashboard
+ORDERS_PER_PAGE = 20
+
+
+def parse_service_filters(args) -> Dict[str, Any]:
+    """
+    Lê os filtros da query string da página de serviços
+
+    Sem nenhum filtro aplicado, o ano atual é usado como padrão (mesma regra
+    do shell e de todos os fragmentos).
+    """
+    filters = {
+        'page': args.get('page', 1, type=int),
+        'search': args.get('search', '', type=str),
+        'service_filter': args.get('service', '', type=str),
+        'month_filter': args.get('month', '', type=str),
+        'week_filter': args.get('week', '', type=str),
+        'year_filter': args.get('year', '', type=str)
+    }
+    if not (filters['search'] or filters['month_filter'] or filters['week_filter'] or filters['year_filter']):
+        filters['year_filter'] = str(datetime.now().year)
+    return filters
+
+
+def has_active_filters(filters: Dict[str, Any]) -> bool:
+    """Verifica se algum filtro (incluindo o ano padrão) está aplicado"""
+    return any(filters[name] for name in
+               ('search', 'service_filter', 'year_filter', 'month_filter', 'week_filter'))
+
+
+def load_filtered_orders(omie_service, filters: Dict[str, Any],
+                         datasets: Tuple[str, ...] = ()) -> Tuple[Any, List[dict]]:
+    """
+    Ordens faturadas filtradas e ordenadas (mais recentes primeiro)
+
+    Args:
+        omie_service: Serviço Omie
+        filters: Filtros de parse_service_filters
+        datasets: Conjuntos adicionais iniciados junto com as ordens (ex.: mapeamentos)
+
+    Returns:
+        (DatasetRun com os conjuntos iniciados, lista de ordens filtradas)
+    """
+    search = filters['search']
+    names = ['invoiced_orders', *datasets]
+    if search:
+        names += ['client_name_mapping', 'seller_name_mapping']
+    services_data = omie_service.services_data_graph().start(names)
+
+    # Os mapeamentos só são aguardados antes do filtro quando a busca usa os nomes
+    orders = filter_orders(
+        services_data.get('invoiced_orders'),
+        year_filter=filters['year_filter'],
+        month_filter=filters['month_filter'],
+        week_filter=filters['week_filter'],
+        service_filter=filters['service_filter'],
+        search=search,
+        client_name_mapping=services_data.get('client_name_mapping') if search else None,
+        seller_name_mapping=services_data.get('seller_name_mapping') if search else None
+    )
+    sort_orders_by_date(orders)
+    return services_data, orders
+
+
+def build_pagination(total: int, page: int, per_page: int = ORDERS_PER_PAGE) -> Dict[str, Any]:
+    """Informações de paginação no formato usado pelos templates"""
+    total_pages = (total + per_page - 1) // per_page
+    has_prev = page > 1
+    has_next = page < total_pages
+    return {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'total_pages': total_pages,
+        'has_prev': has_prev,
+        'has_next': has_next,
+        'prev_num': page - 1 if has_prev else None,
+        'next_num': page + 1 if has_next else None
+    }
+
+
+def build_stats(omie_service, orders: List[dict], filters: Dict[str, Any]) -> Dict[str, Any]:
+    """Estatísticas calculadas sobre as mesmas ordens filtradas da tabela"""
+    applied_filters = {
+        'search': filters['search'],
+        'service_filter': filters['service_filter'],
+        'year_filter': filters['year_filter'],
+        'month_filter': filters['month_filter'],
+        'week_filter': filters['week_filter'],
+        'total_filtered_orders': len(orders)
+    }
+    try:
+        stats = omie_service.get_service_orders_stats(
+            faturada_only=False,
+            orders=orders,
+            service_filter=filters['service_filter'],
+            year_filter=filters['year_filter'],
+            month_filter=filters['month_filter'],
+            week_filter=filters['week_filter']
+        )
+        print(f"Estatísticas calculadas para {len(orders)} ordens filtradas")
+    except Exception as e:
+        print(f"Erro ao carregar estatísticas: {str(e)}")
+        stats = {
+            "total_orders": len(orders),
+            "total_value": 0,
+            "average_value": 0,
+            "by_client": {},
+            "top_clients": [],
+            "by_status": {},
+            "by_service_type": {},
+            "top_services": [],
+            "by_technician": {},
+            "monthly_stats": {},
+            "monthly_values": {}
+        }
+    stats['applied_filters'] = applied_filters
+    return stats
+
+
+def build_period_stats(omie_service, filters: Dict[str, Any]) -> Dict[str, Optional[dict]]:
+    """
+    Estatísticas do período selecionado (ano, senão semana, senão mês)
+
+    Mesma precedência da página original: apenas um período é calculado, e
+    uma falha deixa o período sem estatísticas em vez de derrubar o fragmento.
+    """
+    period_stats = {'yearly_stats': None, 'weekly_stats': None, 'monthly_stats': None}
+    if filters['year_filter']:
+        name, loader, value = 'yearly_stats', omie_service.get_yearly_service_stats, filters['year_filter']
+    elif filters['week_filter']:
+        name, loader, value = 'weekly_stats', omie_service.get_weekly_service_stats, filters['week_filter']
+    elif filters['month_filter']:
+        name, loader, value = 'monthly_stats', omie_service.get_monthly_service_stats, filters['month_filter']
+    else:
+        return period_stats
+
+    try:
+        period_stats[name] = loader(value)
+    except Exception as e:
+        print(f"Erro ao carregar estatísticas do período {value}: {str(e)}")
+    return period_stats
+
+
+def _find_label(options: List[dict], value: str) -> Optional[str]:
+    for option in options:
+        if option.get('value') == value:
+            return option.get('label')
+    return None
+
+
+def filter_labels(options: Dict[str, List[dict]], filters: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """Rótulos dos períodos selecionados (uma busca por filtro, não um laço por exibição)"""
+    return {
+        'year': _find_label(options['available_years'], filters['year_filter']) if filters['year_filter'] else None,
+        'week': _find_label(options['available_weeks'], filters['week_filter']) if filters['week_filter'] else None,
+        'month': _find_label(options['available_months'], filters['month_filter']) if filters['month_filter'] else None
+    }
+
+
+def load_filter_options(omie_service) -> Dict[str, List]:
+    """Opções dos filtros (serviços, anos, meses e semanas) carregadas em paralelo"""
+    options = omie_service.services_data_graph().start(
+        ['service_name_mapping', 'available_years', 'available_months', 'available_weeks'])
+    return {
+        'available_services': sorted(options.get('service_name_mapping').values()),
+        'available_years': options.get('available_years'),
+        'available_months': options.get('available_months'),
+        'available_weeks': options.get('available_weeks')
+    }
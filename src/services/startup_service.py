@@ -1,11 +1,65 @@
+import heapq
+import os
+import random
 import threading
 import time
-from typing import Optional
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
 from .omie_service import OmieService
+from .dataset_loader import dataset_loader
+from .refresh_lock import refresh_coordinator
+
+
+class RefreshDataset:
+    """Conjunto de dados mantido aquecido pelo agendador de atualização antecipada"""
+
+    def __init__(self, name: str, loader: Callable, data_type: str, priority: int, label: str):
+        """
+        Args:
+            name: Nome do conjunto de dados (chave no status)
+            loader: Função do OmieService que carrega os dados
+            data_type: Tipo de dados (define o TTL no cache local e no inteligente)
+            priority: Prioridade (menor = mais importante para as rotas mais acessadas)
+            label: Descrição usada no progresso (ex.: 'clientes')
+        """
+        self.name = name
+        self.loader = loader
+        self.data_type = data_type
+        self.priority = priority
+        self.label = label
+
+        self.ttl_seconds = 0.0
+        self.next_run_at: Optional[float] = None
+        self.last_run_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.last_duration_ms: Optional[float] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.runs = 0
+
+    def to_dict(self) -> Dict:
+        def iso(timestamp: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+        return {
+            'priority': self.priority,
+            'data_type': self.data_type,
+            'ttl_seconds': self.ttl_seconds,
+            'next_run_at': iso(self.next_run_at),
+            'last_run_at': iso(self.last_run_at),
+            'last_duration_ms': self.last_duration_ms,
+            'last_status': self.last_status,
+            'last_error': self.last_error,
+            'runs': self.runs
+        }
+
 
 class StartupService:
-    """Serviço para pré-carregar dados essenciais na inicialização"""
-    
+    """Serviço para pré-carregar dados essenciais e mantê-los atualizados antes de expirarem"""
+
+    # Conjuntos sem os quais as rotas principais não têm o que mostrar (prontidão)
+    REQUIRED_DATASETS = ('service_orders',)
+
     def __init__(self, omie_service: OmieService):
         self.omie_service = omie_service
         self.preload_thread: Optional[threading.Thread] = None
@@ -15,83 +69,264 @@ class StartupService:
             'error': None,
             'progress': {}
         }
-    
+
+        # Atualização antecipada: recarregar quando esta fração do TTL tiver passado
+        self.refresh_ahead_fraction = float(os.getenv('REFRESH_AHEAD_FRACTION', '0.8'))
+        self.refresh_jitter_fraction = float(os.getenv('REFRESH_JITTER_FRACTION', '0.05'))
+        self.refresh_enabled = os.getenv('REFRESH_AHEAD', '1').lower() not in ('0', 'false', 'no')
+
+        # Ordem de prioridade: dados das rotas mais acessadas primeiro (/services, dashboard)
+        self.datasets: List[RefreshDataset] = [
+            RefreshDataset('service_orders', omie_service.get_all_service_orders, 'service_orders', 0, 'ordens'),
+            RefreshDataset('clients', omie_service.get_client_name_mapping, 'mappings', 1, 'clientes'),
+            RefreshDataset('clients_stats', omie_service.get_clients_stats, 'stats', 2, 'estatísticas'),
+            RefreshDataset('services', omie_service.get_service_name_mapping, 'mappings', 3, 'serviços'),
+            RefreshDataset('sellers', omie_service.get_seller_name_mapping, 'mappings', 4, 'vendedores'),
+        ]
+        self._wakeup = threading.Event()
+        self._schedule_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started_pid: Optional[int] = None
+        # Processo que criou workers (master do gunicorn com --preload): não atualiza mais
+        self._forked_children = False
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_parent=self._after_fork_in_parent,
+                                after_in_child=self._after_fork_in_child)
+
     def start_preload(self):
-        """Inicia o pré-carregamento de dados em background"""
+        """Inicia o pré-carregamento de dados em background (seguido do agendador de atualização)"""
+        with self._start_lock:
+            self._start_preload()
+
+    def ensure_running(self):
+        """
+        Retoma o pré-carregamento e o agendador em um processo filho
+
+        Threads não sobrevivem ao fork: com o --preload do gunicorn,
+        create_app() roda no master e os workers herdam o cache aquecido, mas
+        não o agendador. O primeiro acesso em cada worker o inicia de novo (a
+        nova carga lê os dados herdados ou publicados, sem chamar o Omie).
+        """
+        if self._started_pid is None or self._started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._started_pid != os.getpid():
+                print(f"🔁 Retomando pré-carregamento e agendador no worker {os.getpid()}")
+                self._start_preload()
+
+    def _after_fork_in_parent(self):
+        """O master não atende requisições: seu agendador para e os workers assumem"""
+        self._forked_children = True
+        self._wakeup.set()
+
+    def _after_fork_in_child(self):
+        """No worker só existe a thread do fork: locks e eventos são recriados"""
+        self._forked_children = False
+        self._wakeup = threading.Event()
+        self._schedule_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    def _start_preload(self):
+        self._started_pid = os.getpid()
         if self.preload_thread and self.preload_thread.is_alive():
-            print("Pré-carregamento já está em andamento")
+            # Agendador já ativo: antecipar a atualização de todos os conjuntos
+            self._schedule_all(time.time())
+            self._wakeup.set()
+            print("Pré-carregamento já está em andamento - atualização antecipada solicitada")
             return
-        
+
         self.preload_status = {
             'started': True,
             'completed': False,
             'error': None,
             'progress': {}
         }
-        
-        self.preload_thread = threading.Thread(target=self._preload_data, daemon=True)
+
+        self.preload_thread = threading.Thread(target=self._run, name="startup-refresh-ahead", daemon=True)
         self.preload_thread.start()
         print("Pré-carregamento de dados iniciado em background")
-    
+
+    def _run(self):
+        """Pré-carregamento inicial seguido do laço de atualização antecipada"""
+        self._preload_data()
+        if self.refresh_enabled and not self._forked_children:
+            self._scheduler_loop()
+
     def _preload_data(self):
         """Executa o pré-carregamento de dados"""
         try:
             print("Iniciando pré-carregamento de dados essenciais...")
-            
-            # 1. Pré-carregar mapeamento de clientes (mais importante)
-            print("Pré-carregando mapeamento de clientes...")
-            self.preload_status['progress']['clients'] = 'loading'
-            try:
-                client_mapping = self.omie_service.get_client_name_mapping()
-                self.preload_status['progress']['clients'] = f'completed ({len(client_mapping)} clientes)'
-                print(f"Mapeamento de clientes pré-carregado: {len(client_mapping)} registros")
-            except Exception as e:
-                self.preload_status['progress']['clients'] = f'error: {str(e)}'
-                print(f"Erro ao pré-carregar clientes: {e}")
-            
-            # 2. Pré-carregar mapeamento de vendedores
-            print("Pré-carregando mapeamento de vendedores...")
-            self.preload_status['progress']['sellers'] = 'loading'
-            try:
-                seller_mapping = self.omie_service.get_seller_name_mapping()
-                self.preload_status['progress']['sellers'] = f'completed ({len(seller_mapping)} vendedores)'
-                print(f"Mapeamento de vendedores pré-carregado: {len(seller_mapping)} registros")
-            except Exception as e:
-                self.preload_status['progress']['sellers'] = f'error: {str(e)}'
-                print(f"Erro ao pré-carregar vendedores: {e}")
-            
-            # 3. Pré-carregar ordens de serviço (pode demorar mais)
-            print("Pré-carregando ordens de serviço...")
-            self.preload_status['progress']['service_orders'] = 'loading'
-            try:
-                service_orders = self.omie_service.get_all_service_orders()
-                self.preload_status['progress']['service_orders'] = f'completed ({len(service_orders)} ordens)'
-                print(f"Ordens de serviço pré-carregadas: {len(service_orders)} registros")
-            except Exception as e:
-                self.preload_status['progress']['service_orders'] = f'error: {str(e)}'
-                print(f"Erro ao pré-carregar ordens de serviço: {e}")
-            
+
+            # Conjuntos independentes: carregados em paralelo (tempo do mais lento, não da soma)
+            graph = dataset_loader.graph()
+            for dataset in sorted(self.datasets, key=lambda d: d.priority):
+                graph.add(dataset.name, lambda dataset=dataset: self._refresh_dataset(dataset, force=False),
+                          label=dataset.label)
+            started = time.time()
+            graph.resolve()
+            print(f"Pré-carregamento levou {time.time() - started:.1f}s")
+
             self.preload_status['completed'] = True
             print("Pré-carregamento de dados concluído com sucesso!")
-            
+
         except Exception as e:
             self.preload_status['error'] = str(e)
             print(f"Erro no pré-carregamento: {e}")
-    
+
+    def _dataset_ttl(self, dataset: RefreshDataset) -> float:
+        """TTL efetivo (segundos): o menor entre o cache local do OmieService e o cache inteligente"""
+        ttl = float(self.omie_service._get_cache_ttl(dataset.data_type))
+        cache_service = self.omie_service.intelligent_cache
+        if cache_service:
+            ttl_hours = cache_service.ttl_config.get(dataset.data_type, cache_service.ttl_config['default'])
+            ttl = min(ttl, ttl_hours * 3600)
+        return ttl
+
+    def _schedule(self, dataset: RefreshDataset, now: float):
+        """Agenda a próxima atualização antes da expiração, com jitter"""
+        dataset.ttl_seconds = self._dataset_ttl(dataset)
+        delay = dataset.ttl_seconds * self.refresh_ahead_fraction
+        jitter = dataset.ttl_seconds * self.refresh_jitter_fraction
+        delay += random.uniform(-jitter, jitter)
+        # Nunca depois da expiração nem em um laço apertado
+        dataset.next_run_at = now + max(30.0, min(delay, dataset.ttl_seconds - 5))
+
+    def _schedule_all(self, run_at: float):
+        with self._schedule_lock:
+            for dataset in self.datasets:
+                dataset.next_run_at = run_at
+
+    def _claim_refresh(self, dataset: RefreshDataset) -> bool:
+        """
+        Reserva a atualização antecipada do conjunto entre workers e instâncias
+
+        Apenas quem obtém a reserva recarrega do Omie e publica no cache
+        compartilhado; os demais apenas reagendam e, quando o cache local
+        expira, leem o resultado publicado. A janela cobre um ciclo de atualização.
+        """
+        window = max(30.0, self._dataset_ttl(dataset) * self.refresh_ahead_fraction)
+        return refresh_coordinator.claim(f"refresh-ahead-{dataset.name}", window)
+
+    def _refresh_dataset(self, dataset: RefreshDataset, force: bool = True):
+        """Carrega um conjunto de dados registrando duração e status"""
+        if force and not self._claim_refresh(dataset):
+            with self._schedule_lock:
+                self._schedule(dataset, time.time())
+            print(f"Atualização de {dataset.label} reservada por outro processo - reagendada")
+            return
+
+        print(f"Atualizando {dataset.label}...")
+        self.preload_status['progress'][dataset.name] = 'loading'
+        started = time.time()
+        try:
+            if force:
+                # Substituir as entradas atuais sem invalidá-las para as requisições em andamento
+                with self.omie_service.force_refresh():
+                    data = dataset.loader()
+            else:
+                data = dataset.loader()
+            count = len(data) if hasattr(data, '__len__') else 0
+            if not count and dataset.name in self.REQUIRED_DATASETS:
+                raise ValueError(f"nenhum registro de {dataset.label} carregado")
+            dataset.last_status = 'success'
+            dataset.last_error = None
+            dataset.last_success_at = time.time()
+            self.preload_status['progress'][dataset.name] = f'completed ({count} {dataset.label})'
+            print(f"Atualização de {dataset.label} concluída: {count} registros")
+        except Exception as e:
+            dataset.last_status = 'error'
+            dataset.last_error = str(e)
+            self.preload_status['progress'][dataset.name] = f'error: {str(e)}'
+            print(f"Erro ao atualizar {dataset.label}: {e}")
+        finally:
+            finished = time.time()
+            dataset.runs += 1
+            dataset.last_run_at = finished
+            dataset.last_duration_ms = round((finished - started) * 1000, 1)
+            with self._schedule_lock:
+                self._schedule(dataset, finished)
+
+    def _scheduler_loop(self):
+        """Executa as atualizações vencidas em ordem de horário e prioridade"""
+        print("🔄 Agendador de atualização antecipada iniciado")
+        while not self._forked_children:
+            with self._schedule_lock:
+                queue = [(d.next_run_at or 0, d.priority, d.name, d) for d in self.datasets]
+            heapq.heapify(queue)
+            next_run_at, _, _, dataset = queue[0]
+
+            wait = next_run_at - time.time()
+            if wait > 0:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                continue
+
+            # Entre os vencidos, o heap garante horário mais antigo e, no empate, maior prioridade
+            self._refresh_dataset(dataset)
+
     def get_status(self):
-        """Retorna o status do pré-carregamento"""
-        return self.preload_status.copy()
-    
+        """Retorna o status do pré-carregamento e do agendador de atualização"""
+        status = self.preload_status.copy()
+        status['refresh_ahead'] = {
+            'enabled': self.refresh_enabled,
+            'running': bool(self.preload_thread and self.preload_thread.is_alive() and status.get('completed')),
+            'refresh_ahead_fraction': self.refresh_ahead_fraction,
+            'jitter_fraction': self.refresh_jitter_fraction,
+            'datasets': {dataset.name: dataset.to_dict() for dataset in self.datasets}
+        }
+        return status
+
+    def get_readiness(self) -> Dict:
+        """
+        Prontidão do worker calculada apenas com o estado em memória (sem E/S)
+
+        O worker está pronto quando os conjuntos obrigatórios (ordens de
+        serviço) já foram carregados com sucesso ao menos uma vez, neste
+        processo ou no master antes do fork (--preload); um pré-carregamento
+        concluído com falha em todos os conjuntos não conta. Os demais
+        conjuntos podem continuar aquecendo. Cada conjunto informa a idade da
+        última carga bem-sucedida e se já passou do TTL; falhas da API do
+        Omie aparecem como 'degraded'.
+        """
+        now = time.time()
+        datasets = {}
+        for dataset in self.datasets:
+            age = round(now - dataset.last_success_at, 1) if dataset.last_success_at else None
+            datasets[dataset.name] = {
+                'status': dataset.last_status or 'pending',
+                'age_seconds': age,
+                'stale': age is None or (dataset.ttl_seconds > 0 and age > dataset.ttl_seconds),
+                'last_error': dataset.last_error
+            }
+
+        failing = [name for name, info in datasets.items() if info['status'] == 'error']
+        missing = [dataset.name for dataset in self.datasets
+                   if dataset.name in self.REQUIRED_DATASETS and dataset.last_success_at is None]
+        return {
+            'ready': not missing,
+            'missing_datasets': missing,
+            'preload_completed': bool(self.preload_status.get('completed')),
+            'preload_error': self.preload_status.get('error'),
+            'upstream': 'degraded' if failing else 'ok',
+            'failing_datasets': failing,
+            'refresh_ahead_running': bool(self.preload_thread and self.preload_thread.is_alive()),
+            'datasets': datasets
+        }
+
     def is_completed(self):
         """Verifica se o pré-carregamento foi concluído"""
         return self.preload_status.get('completed', False)
-    
+
     def wait_for_completion(self, timeout: int = 300):
         """Aguarda a conclusão do pré-carregamento com timeout"""
         if not self.preload_thread:
             return False
-        
-        self.preload_thread.join(timeout=timeout)
+
+        deadline = time.time() + timeout
+        while time.time() < deadline and self.preload_thread.is_alive():
+            if self.is_completed():
+                return True
+            time.sleep(0.2)
         return self.is_completed()
 
 # Instância global
@@ -101,4 +336,4 @@ def initialize_startup_service(omie_service: OmieService):
     """Inicializa o serviço de startup"""
     global startup_service
     startup_service = StartupService(omie_service)
-    return startup_service
\ No newline at end of file
+    return startup_service
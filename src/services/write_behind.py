@@ -0,0 +1,174 @@
+"""
+Fila de Escrita Assíncrona (Write-Behind)
+Agrupa gravações do cache remoto em background, coalescendo escritas repetidas
+da mesma chave e enviando-as em lotes fora da thread da requisição
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class WriteBehindQueue:
+    """Fila limitada de escritas remotas com coalescência por chave e flush em lote"""
+
+    def __init__(self, build_record: Callable[..., Dict[str, Any]],
+                 write_records: Callable[[List[Dict[str, Any]]], None],
+                 max_size: int = 500, batch_size: int = 50, flush_interval: float = 1.0):
+        """
+        Args:
+            build_record: Função que serializa/comprime um item pendente em registro remoto
+            write_records: Função que grava um lote de registros no backend
+            max_size: Número máximo de chaves pendentes
+            batch_size: Número máximo de registros por flush
+            flush_interval: Intervalo máximo (segundos) entre flushes
+        """
+        self.build_record = build_record
+        self.write_records = write_records
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._pending: "OrderedDict[str, tuple]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+        self._stats = {
+            'enqueued': 0,
+            'coalesced': 0,
+            'rejected': 0,
+            'flushed_records': 0,
+            'flushes': 0,
+            'failed_records': 0,
+            'last_flush_at': None,
+            'last_flush_latency_ms': 0.0,
+            'max_flush_latency_ms': 0.0,
+            'total_flush_latency_ms': 0.0
+        }
+
+    def _ensure_worker(self):
+        """Inicia a thread de flush sob demanda (também após fork)"""
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        self._thread = threading.Thread(target=self._run, name="cache-write-behind", daemon=True)
+        self._pid = os.getpid()
+        self._thread.start()
+
+    def enqueue(self, key: str, data: Any, data_type: str, expires_at, tags: Tuple[str, ...] = ()) -> bool:
+        """
+        Agenda a gravação de uma chave
+
+        Returns:
+            False se a fila está cheia (o chamador deve gravar de forma síncrona)
+        """
+        with self._condition:
+            if key in self._pending:
+                # Coalescer: a escrita mais recente substitui a pendente
+                self._pending[key] = (data, data_type, expires_at, tags)
+                self._stats['coalesced'] += 1
+                return True
+
+            if len(self._pending) >= self.max_size:
+                self._stats['rejected'] += 1
+                return False
+
+            self._pending[key] = (data, data_type, expires_at, tags)
+            self._stats['enqueued'] += 1
+            self._ensure_worker()
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+            return True
+
+    def discard(self, pattern: Optional[str] = None, data_type: Optional[str] = None,
+                tags: Optional[Iterable[str]] = None) -> int:
+        """Descarta escritas pendentes (usado ao invalidar o cache)"""
+        tags = set(tags) if tags else None
+        with self._condition:
+            keys = [
+                key for key, (_, pending_type, _, pending_tags) in self._pending.items()
+                if (pattern is None or pattern in key)
+                and (data_type is None or pending_type == data_type)
+                and (tags is None or tags.intersection(pending_tags))
+            ]
+            for key in keys:
+                del self._pending[key]
+            return len(keys)
+
+    def _take_batch(self) -> List[tuple]:
+        batch = []
+        while self._pending and len(batch) < self.batch_size:
+            key, (data, data_type, expires_at, tags) = self._pending.popitem(last=False)
+            batch.append((key, data, data_type, expires_at, tags))
+        self._in_flight += len(batch)
+        return batch
+
+    def _run(self):
+        """Loop da thread de flush"""
+        while True:
+            with self._condition:
+                if len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                batch = self._take_batch()
+
+            if batch:
+                self._flush_batch(batch)
+
+    def _flush_batch(self, batch: List[tuple]):
+        """Serializa, comprime e grava um lote de registros"""
+        started = time.time()
+        try:
+            records = [
+                self.build_record(key, data, data_type, expires_at=expires_at, tags=tags)
+                for key, data, data_type, expires_at, tags in batch
+            ]
+            self.write_records(records)
+            ok = True
+        except Exception as e:
+            print(f"Erro no flush do cache (write-behind) para {len(batch)} chaves: {e}")
+            ok = False
+
+        latency_ms = (time.time() - started) * 1000
+        with self._condition:
+            self._in_flight -= len(batch)
+            stats = self._stats
+            stats['flushes'] += 1
+            stats['last_flush_at'] = time.time()
+            stats['last_flush_latency_ms'] = round(latency_ms, 2)
+            stats['max_flush_latency_ms'] = round(max(stats['max_flush_latency_ms'], latency_ms), 2)
+            stats['total_flush_latency_ms'] += latency_ms
+            if ok:
+                stats['flushed_records'] += len(batch)
+            else:
+                stats['failed_records'] += len(batch)
+            self._condition.notify_all()
+
+    def flush(self, timeout: float = 30) -> bool:
+        """Grava imediatamente todas as escritas pendentes (na thread chamadora)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._condition:
+                batch = self._take_batch()
+                if not batch:
+                    # Aguardar lotes que a thread de background ainda está gravando
+                    while self._in_flight and time.time() < deadline:
+                        self._condition.wait(0.1)
+                    return not self._in_flight
+            self._flush_batch(batch)
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna profundidade da fila e latência dos flushes"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats['depth'] = len(self._pending)
+            stats['in_flight'] = self._in_flight
+            stats['max_size'] = self.max_size
+            stats['avg_flush_latency_ms'] = (
+                round(stats['total_flush_latency_ms'] / stats['flushes'], 2) if stats['flushes'] else 0.0
+            )
+            del stats['total_flush_latency_ms']
+            return stats
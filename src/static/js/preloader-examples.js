@@ -43,14 +43,12 @@ function loadClientsData() {
 // Exemplo 2: Preloader com progresso personalizado
 function syncDataWithProgress() {
     const steps = [
-        'Conectando com a API Omie...',
-        'Buscando dados de clientes...',
-        'Processando informações...',
-        'Atualizando banco de dados...',
-        'Finalizando sincronização...'
+        { text: 'Buscando dados de clientes...', run: () => fetch('/api/clients') },
+        { text: 'Carregando dashboard...', run: () => fetch('/api/progressive/status') }
     ];
     
-    preloaderManager.showWithProgress(steps);
+    preloaderManager.showWithProgress(steps)
+        .catch(error => console.error('Erro na sincronização:', error));
 }
 
 // Exemplo 3: Preloader para card específico
@@ -152,20 +150,27 @@ function loadDashboard() {
 }
 
 // Exemplo 8: Preloader para exportação de dados
-function exportDataWithPreloader(format = 'excel') {
+function exportDataWithPreloader(format = 'csv') {
+    let blob = null;
     const steps = [
-        'Preparando dados para exportação...',
-        'Formatando arquivo...',
-        'Gerando download...'
+        {
+            text: 'Gerando arquivo...',
+            run: () => fetch(`/api/services/export?format=${format}`).then(response => response.blob()).then(data => { blob = data; })
+        },
+        {
+            text: 'Iniciando download...',
+            run: async () => {
+                const link = document.createElement('a');
+                link.href = URL.createObjectURL(blob);
+                link.download = `servicos.${format}`;
+                link.click();
+                URL.revokeObjectURL(link.href);
+            }
+        }
     ];
     
-    preloaderManager.showWithProgress(steps);
-    
-    // Simular processo de exportação
-    setTimeout(() => {
-        // Aqui seria feito o download real
-        console.log(`Dados exportados em formato ${format}`);
-    }, 3000);
+    preloaderManager.showWithProgress(steps)
+        .catch(error => console.error('Erro na exportação:', error));
 }
 
 // Exemplo 9: Preloader para busca em tempo real
@@ -242,7 +247,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     const exportBtn = document.getElementById('export-btn');
     if (exportBtn) {
-        exportBtn.addEventListener('click', () => exportDataWithPreloader('excel'));
+        exportBtn.addEventListener('click', () => exportDataWithPreloader('csv'));
     }
 });
 
@@ -4,15 +4,7 @@ class PreloaderManager {
     constructor() {
         this.preloader = null;
         this.isLoading = false;
-        this.loadingTexts = [
-            'Carregando dados...',
-            'Processando informações...',
-            'Sincronizando com a API...',
-            'Preparando interface...',
-            'Finalizando carregamento...'
-        ];
-        this.currentTextIndex = 0;
-        this.textInterval = null;
+        this.defaultText = 'Carregando dados';
         this.init();
     }
 
@@ -98,13 +90,9 @@ class PreloaderManager {
         this.preloader.classList.remove('fade-out');
         this.preloader.style.display = 'flex';
         
-        // Atualizar texto se fornecido
-        if (customText) {
-            const textElement = this.preloader.querySelector('.loading-text');
-            if (textElement) textElement.textContent = customText;
-        } else {
-            this.startTextRotation();
-        }
+        // Texto fixo (ou o fornecido): mensagens de etapa só vêm de etapas reais
+        this.setText(customText || this.defaultText);
+        this.setProgress(0);
         
         // Bloquear scroll do body
         document.body.style.overflow = 'hidden';
@@ -114,7 +102,6 @@ class PreloaderManager {
         if (!this.preloader || !this.isLoading) return;
         
         this.isLoading = false;
-        this.stopTextRotation();
         
         this.preloader.classList.add('fade-out');
         
@@ -127,23 +114,14 @@ class PreloaderManager {
         }, 500);
     }
 
-    startTextRotation() {
-        this.stopTextRotation();
-        
-        this.textInterval = setInterval(() => {
-            const textElement = this.preloader?.querySelector('.loading-text');
-            if (textElement) {
-                this.currentTextIndex = (this.currentTextIndex + 1) % this.loadingTexts.length;
-                textElement.textContent = this.loadingTexts[this.currentTextIndex];
-            }
-        }, 2000);
+    setText(text) {
+        const textElement = this.preloader?.querySelector('.loading-text');
+        if (textElement) textElement.textContent = text;
     }
 
-    stopTextRotation() {
-        if (this.textInterval) {
-            clearInterval(this.textInterval);
-            this.textInterval = null;
-        }
+    setProgress(percentage) {
+        const progressBar = this.preloader?.querySelector('.preloader-progress-bar');
+        if (progressBar) progressBar.style.width = `${percentage}%`;
     }
 
     // Preloader para cards específicos
@@ -360,36 +338,23 @@ class PreloaderManager {
         }
     }
 
-    // Método para mostrar preloader com progresso personalizado
-    showWithProgress(steps = []) {
+    // Método para mostrar preloader com progresso por etapas
+    // Cada etapa é { text, run }: a barra avança quando a Promise de run() termina
+    async showWithProgress(steps = []) {
         this.show();
         
-        if (steps.length === 0) return;
-        
-        let currentStep = 0;
-        const progressBar = this.preloader?.querySelector('.preloader-progress-bar');
-        const textElement = this.preloader?.querySelector('.loading-text');
-        
-        const updateProgress = () => {
-            if (currentStep < steps.length && textElement) {
-                textElement.textContent = steps[currentStep];
-                
-                if (progressBar) {
-                    const progress = ((currentStep + 1) / steps.length) * 100;
-                    progressBar.style.width = `${progress}%`;
-                }
-                
-                currentStep++;
-                
-                if (currentStep < steps.length) {
-                    setTimeout(updateProgress, 1000);
-                } else {
-                    setTimeout(() => this.hide(), 500);
+        try {
+            for (let index = 0; index < steps.length; index++) {
+                const step = steps[index];
+                this.setText(step.text);
+                if (step.run) {
+                    await step.run();
                 }
+                this.setProgress(((index + 1) / steps.length) * 100);
             }
-        };
-        
-        updateProgress();
+        } finally {
+            this.hide();
+        }
     }
 }
 
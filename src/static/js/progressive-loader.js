@@ -17,9 +17,17 @@ class ProgressiveLoader {
         this.callbacks = {
             onProgress: null,
             onStageChange: null,
+            onPage: null,
             onComplete: null,
             onError: null
         };
+        this.eventSource = null;
+        this.datasetLabels = {
+            service_orders: 'ordens de serviço',
+            clients: 'clientes',
+            sellers: 'vendedores',
+            services: 'serviços'
+        };
     }
 
     /**
@@ -43,7 +51,11 @@ class ProgressiveLoader {
                 window.showPreloader();
             }
 
-            // Iniciar carregamento
+            // Acompanhar o progresso real do servidor (SSE); o carregamento
+            // é iniciado pelo próprio stream e os dados ficam em cache
+            await this._streamProgress();
+
+            // Buscar os dados carregados
             const response = await fetch('/api/progressive/dashboard', {
                 method: 'GET',
                 headers: {
@@ -88,51 +100,75 @@ class ProgressiveLoader {
     }
 
     /**
-     * Carrega dados com simulação de progresso
+     * Mantido por compatibilidade: o progresso agora vem do servidor
      */
-    async loadWithProgress() {
-        if (this.isLoading) return;
-
-        this.isLoading = true;
-        
-        try {
-            // Simular progresso por estágios
-            for (let i = 0; i < this.stages.length; i++) {
-                this.currentStage = i;
-                const stage = this.stages[i];
-                
-                this._updateStage(i, stage.name);
-                
-                // Simular tempo de carregamento
-                await this._simulateStageProgress(i);
-            }
-
-            // Carregar dados reais
-            const data = await this.loadDashboard();
-            return data;
-
-        } finally {
-            this.isLoading = false;
-        }
+    async loadWithProgress(options = {}) {
+        return this.loadDashboard(options);
     }
 
     /**
-     * Simula progresso de um estágio
+     * Recebe eventos de progresso via Server-Sent Events até o fim do carregamento
      */
-    async _simulateStageProgress(stageIndex) {
-        const stage = this.stages[stageIndex];
-        const baseProgress = (stageIndex / this.stages.length) * 100;
-        const stageProgress = 100 / this.stages.length;
-
-        for (let progress = 0; progress <= 100; progress += 10) {
-            stage.progress = progress;
-            const totalProgress = baseProgress + (progress * stageProgress / 100);
-            
-            this._updateProgress(totalProgress, stage.name);
-            
-            // Pequena pausa para visualização
-            await new Promise(resolve => setTimeout(resolve, 50));
+    _streamProgress() {
+        if (!window.EventSource) {
+            return Promise.resolve();
         }
+
+        return new Promise((resolve, reject) => {
+            const source = new EventSource('/api/progressive/stream');
+            this.eventSource = source;
+
+            const finish = (callback) => {
+                source.close();
+                this.eventSource = null;
+                callback();
+            };
+
+            source.addEventListener('stage', (event) => {
+                const data = JSON.parse(event.data);
+                const stageIndex = this.stages.findIndex(stage => stage.id === data.stage);
+
+                if (stageIndex >= 0 && stageIndex !== this.currentStage) {
+                    for (let i = 0; i < stageIndex; i++) {
+                        this.stages[i].progress = 100;
+                    }
+                    this._updateStage(stageIndex, this.stages[stageIndex].name);
+                }
+
+                if (data.progress >= 0) {
+                    this._updateProgress(data.progress, data.message);
+                }
+            });
+
+            source.addEventListener('page', (event) => {
+                const data = JSON.parse(event.data);
+                const label = this.datasetLabels[data.dataset] || data.dataset;
+                const message = `Carregando ${label}: página ${data.page}/${data.total_pages} (${data.records} registros)`;
+
+                if (this.callbacks.onPage) {
+                    this.callbacks.onPage(data, message);
+                }
+
+                console.log(message);
+            });
+
+            source.addEventListener('done', (event) => {
+                const data = JSON.parse(event.data);
+
+                if (data.status === 'error') {
+                    finish(() => reject(new Error(data.message || 'Erro no carregamento')));
+                } else {
+                    finish(resolve);
+                }
+            });
+
+            source.onerror = () => {
+                // Reconexão automática (com Last-Event-ID) enquanto a conexão não for fechada
+                if (source.readyState === EventSource.CLOSED) {
+                    finish(resolve);
+                }
+            };
+        });
     }
 
     /**
@@ -164,7 +200,7 @@ class ProgressiveLoader {
     }
 
     /**
-     * Verifica status do carregamento
+     * Verifica status do carregamento (consulta única; o acompanhamento é feito pelo stream)
      */
     async getStatus() {
         try {
@@ -0,0 +1,110 @@
+/**
+ * Fragmentos do Dashboard de Serviços
+ * Carrega em paralelo as partes da página que dependem dos dados do Omie
+ * (filtros, estatísticas e ordens) e as insere no shell já exibido
+ */
+
+const ServicesFragments = {
+    results: {},
+
+    /**
+     * Busca todos os fragmentos em paralelo; cada um é exibido assim que chega
+     *
+     * @param {Object} urls - Nome do fragmento -> URL do endpoint
+     * @param {string} query - Query string da página (mesmos filtros)
+     */
+    load(urls, query = '') {
+        return Promise.all(
+            Object.entries(urls).map(([name, url]) => this._fetch(name, url + query))
+        );
+    },
+
+    async _fetch(name, url) {
+        try {
+            const response = await fetch(url, {
+                headers: { 'Accept': 'application/json' },
+                credentials: 'same-origin'
+            });
+
+            if (!response.ok) {
+                throw new Error(`Erro HTTP: ${response.status}`);
+            }
+
+            const result = await response.json();
+            if (result.status !== 'success') {
+                throw new Error(result.error || 'Erro desconhecido');
+            }
+
+            this.results[name] = result.data || {};
+            this._render(result.html || {});
+            this._applyData(this.results[name]);
+
+            document.dispatchEvent(new CustomEvent('services:fragment', {
+                detail: { name, data: this.results[name] }
+            }));
+        } catch (error) {
+            console.error(`Erro ao carregar fragmento ${name}:`, error);
+            this._renderError(name, error);
+        }
+    },
+
+    _render(regions) {
+        Object.entries(regions).forEach(([region, html]) => {
+            document.querySelectorAll(`[data-fragment-region="${region}"]`).forEach(element => {
+                element.innerHTML = html;
+            });
+        });
+    },
+
+    /**
+     * Preenche os trechos do shell que dependem de dados (rótulos, contagens e totais)
+     */
+    _applyData(data) {
+        if (data.labels) {
+            Object.entries(data.labels).forEach(([filter, label]) => {
+                if (!label) return;
+                document.querySelectorAll(`[data-filter-label="${filter}"]`).forEach(element => {
+                    element.textContent = label;
+                });
+            });
+        }
+
+        if (data.counts) {
+            Object.entries(data.counts).forEach(([kind, count]) => {
+                document.querySelectorAll(`[data-filter-count="${kind}"]`).forEach(element => {
+                    element.textContent = `(${count} disponíveis)`;
+                });
+                document.querySelectorAll(`[data-filter-hint="${kind}"]`).forEach(element => {
+                    element.classList.toggle('d-none', count === 0);
+                });
+            });
+        }
+
+        if (data.total !== undefined) {
+            document.querySelectorAll('[data-orders-total]').forEach(element => {
+                element.textContent = data.total;
+            });
+        }
+    },
+
+    _renderError(name, error) {
+        const regions = {
+            filters: [],
+            stats: ['summary', 'breakdown', 'highlights'],
+            orders: ['orders']
+        }[name] || [];
+
+        regions.forEach(region => {
+            document.querySelectorAll(`[data-fragment-region="${region}"]`).forEach(element => {
+                const alert = document.createElement('div');
+                alert.className = 'alert alert-warning border-0 shadow-sm mb-4';
+                alert.setAttribute('role', 'alert');
+                alert.innerHTML = '<i class="bi bi-exclamation-triangle me-2"></i>';
+                alert.appendChild(document.createTextNode(`Não foi possível carregar esta seção: ${error.message}`));
+                element.replaceChildren(alert);
+            });
+        });
+    }
+};
+
+window.ServicesFragments = ServicesFragments;
@@ -7,7 +7,6 @@
     let isLoading = false;
     let isNavigationPreloader = false;
     let navigationStartTime = 0;
-    let progressInterval = null;
     let currentProgress = 0;
     
     function createPreloader() {
@@ -59,39 +58,37 @@
         currentProgress = progress;
     }
     
-    function startProgressAnimation(duration = 3000) {
-        if (progressInterval) {
-            clearInterval(progressInterval);
+    // Marcos reais do carregamento da página; fora deles o progresso só muda
+    // por updatePreloaderProgress (eventos SSE do carregamento progressivo)
+    const PAGE_MILESTONES = { loading: 10, interactive: 60, complete: 90 };
+    let trackingPageLoad = false;
+    
+    function onReadyStateChange() {
+        const milestone = PAGE_MILESTONES[document.readyState] || 0;
+        if (milestone > currentProgress) {
+            updateProgress(milestone);
         }
-        
-        currentProgress = 0;
+        if (document.readyState === 'complete') {
+            stopProgressTracking();
+        }
+    }
+    
+    function startProgressTracking() {
+        stopProgressTracking();
         updateProgress(0);
         
-        const startTime = Date.now();
-        const increment = 100 / (duration / 50); // Atualiza a cada 50ms
+        // Página já carregada (ex.: busca de dados via fetch): nenhum marco a acompanhar
+        if (document.readyState === 'complete') return;
         
-        progressInterval = setInterval(() => {
-            const elapsedTime = Date.now() - startTime;
-            const targetProgress = Math.min((elapsedTime / duration) * 100, 100);
-            
-            // Animação suave do progresso
-            if (currentProgress < targetProgress) {
-                currentProgress = Math.min(currentProgress + increment, targetProgress);
-                updateProgress(currentProgress);
-            }
-            
-            if (currentProgress >= 100 || elapsedTime >= duration) {
-                clearInterval(progressInterval);
-                progressInterval = null;
-                updateProgress(100);
-            }
-        }, 50);
+        trackingPageLoad = true;
+        document.addEventListener('readystatechange', onReadyStateChange);
+        onReadyStateChange();
     }
     
-    function stopProgressAnimation() {
-        if (progressInterval) {
-            clearInterval(progressInterval);
-            progressInterval = null;
+    function stopProgressTracking() {
+        if (trackingPageLoad) {
+            document.removeEventListener('readystatechange', onReadyStateChange);
+            trackingPageLoad = false;
         }
     }
     
@@ -112,9 +109,8 @@
         preloader.style.display = 'flex';
         document.body.style.overflow = 'hidden';
         
-        // Iniciar animação de progresso
-        const duration = isNavigation ? 2500 : 3000;
-        startProgressAnimation(duration);
+        // Acompanhar o carregamento real da página
+        startProgressTracking();
     }
     
     function hidePreloader(force = false) {
@@ -136,8 +132,8 @@
         
         console.log('Ocultando preloader');
         
-        // Parar animação de progresso
-        stopProgressAnimation();
+        // Parar o acompanhamento do carregamento
+        stopProgressTracking();
         
         // Garantir que o progresso chegue a 100% antes de ocultar
         updateProgress(100);
@@ -281,8 +277,8 @@
     };
     window.hidePreloader = hidePreloader;
     window.updatePreloaderProgress = updateProgress;
-    window.startPreloaderProgress = startProgressAnimation;
-    window.stopPreloaderProgress = stopProgressAnimation;
+    window.startPreloaderProgress = startProgressTracking;
+    window.stopPreloaderProgress = stopProgressTracking;
     
     // Debug: expor variáveis para inspeção
     window.preloaderDebug = {
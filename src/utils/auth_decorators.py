@@ -2,6 +2,15 @@ from functools import wraps
 from flask import session, redirect, url_for, request, flash
 import os
 
+def authentication_enabled() -> bool:
+    """A autenticação só é exigida com o Supabase configurado"""
+    supabase_url = os.getenv('SUPABASE_URL')
+    return bool(supabase_url) and supabase_url != 'your_supabase_url_here'
+
+def is_authorized() -> bool:
+    """Verifica se a requisição atual passaria pelo login_required"""
+    return not authentication_enabled() or bool(session.get('user_id'))
+
 def login_required(f):
     """
     Decorador que exige que o usuário esteja logado para acessar a rota
@@ -9,7 +18,7 @@ def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Se não há configuração do Supabase, pular autenticação
-        if not os.getenv('SUPABASE_URL') or os.getenv('SUPABASE_URL') == 'your_supabase_url_here':
+        if not authentication_enabled():
             print("⚠️  Aviso: Autenticação desabilitada - Supabase não configurado")
             return f(*args, **kwargs)
         
@@ -28,7 +37,7 @@ def logout_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Se não há configuração do Supabase, pular verificação
-        if not os.getenv('SUPABASE_URL') or os.getenv('SUPABASE_URL') == 'your_supabase_url_here':
+        if not authentication_enabled():
             return f(*args, **kwargs)
             
         if 'user_id' in session and session.get('user_id'):
@@ -0,0 +1,294 @@
+"""
+Compressão de Respostas
+gzip (e brotli, quando instalado) negociado por Accept-Encoding, com tamanho
+mínimo e níveis configuráveis; corpos imutáveis e arquivos estáticos são
+comprimidos uma vez e reaproveitados
+"""
+
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from flask import current_app, request
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # dependência opcional
+    brotli = None
+
+# Tipos textuais que valem a compressão (imagens e fontes já são comprimidas;
+# text/event-stream fica de fora para os eventos chegarem sem buffer)
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'image/svg+xml'
+})
+
+# Arquivos estáticos são comprimidos uma única vez, então usam o nível máximo
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+
+def choose_encoding(accept_encodings) -> Optional[str]:
+    """
+    Escolhe a codificação aceita pelo cliente (brotli tem preferência no empate)
+
+    Args:
+        accept_encodings: Cabeçalho Accept-Encoding já interpretado (request.accept_encodings)
+    """
+    gzip_quality = accept_encodings.quality('gzip')
+    if brotli is not None:
+        br_quality = accept_encodings.quality('br')
+        if br_quality > 0 and br_quality >= gzip_quality:
+            return 'br'
+    return 'gzip' if gzip_quality > 0 else None
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """Comprime um corpo completo (gzip ou br)"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str, level: int, source: Any) -> Iterator[bytes]:
+    """
+    Comprime uma resposta em streaming bloco a bloco
+
+    Cada bloco é descarregado (sync flush) para o cliente continuar recebendo
+    os dados de forma incremental.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    try:
+        for chunk in chunks:
+            if chunk:
+                yield process(chunk) + flush()
+        yield finish()
+    finally:
+        if hasattr(source, 'close'):
+            source.close()
+
+
+class _CompressedBodyCache:
+    """LRU de corpos comprimidos indexado pelo hash do corpo original"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple[str, bytes], bytes]' = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[bytes]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Tuple[str, bytes], value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = value
+            self._total_bytes += len(value)
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._entries), 'total_bytes': self._total_bytes, 'max_bytes': self.max_bytes}
+
+
+class ResponseCompressor:
+    """
+    Compressão das respostas do Flask (after_request)
+
+    - Respostas com ETag (rotas do snapshot, fragmentos e payloads
+      pré-serializados) são imutáveis enquanto o snapshot não muda: o corpo
+      comprimido fica em um LRU pelo hash do conteúdo e é reaproveitado
+    - Arquivos de src/static são comprimidos no nível máximo na primeira
+      requisição e reaproveitados enquanto o arquivo não muda (mtime/tamanho)
+    - Respostas em streaming são comprimidas bloco a bloco
+    - Corpos menores que min_size seguem sem compressão
+
+    Respostas comprimidas com ETag forte passam a ter ETag fraco (a
+    representação muda, o conteúdo é equivalente).
+    """
+
+    def __init__(self, enabled: bool = True, min_size: int = 500, gzip_level: int = 6,
+                 brotli_quality: int = 5, cache_max_bytes: int = 8 * 1024 * 1024):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.levels = {'gzip': gzip_level, 'br': brotli_quality}
+        self._bodies = _CompressedBodyCache(cache_max_bytes)
+        self._static: Dict[Tuple[str, str], Tuple[int, int, Optional[bytes]]] = {}
+        self._static_lock = threading.Lock()
+        self._metrics = {'compressed': 0, 'skipped_small': 0, 'streamed': 0,
+                         'body_cache_hits': 0, 'static_hits': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    @property
+    def encodings(self) -> Tuple[str, ...]:
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def init_app(self, app):
+        app.after_request(self.compress_response)
+
+    def compress_response(self, response):
+        """Comprime a resposta quando o cliente aceita e o conteúdo compensa"""
+        if not self.enabled or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code != 200 or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        if response.direct_passthrough:
+            if request.endpoint == 'static' or (request.endpoint or '').endswith('.static'):
+                self._apply_static(response, encoding)
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), encoding,
+                                                 self.levels[encoding], response.response)
+            response.headers.pop('Content-Length', None)
+            self._mark_encoded(response, encoding)
+            self._metrics['streamed'] += 1
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            self._metrics['skipped_small'] += 1
+            return response
+
+        if response.get_etag()[0]:
+            key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+            compressed = self._bodies.get(key)
+            if compressed is None:
+                compressed = compress(body, encoding, self.levels[encoding])
+                self._bodies.put(key, compressed)
+            else:
+                self._metrics['body_cache_hits'] += 1
+        else:
+            compressed = compress(body, encoding, self.levels[encoding])
+
+        if len(compressed) >= len(body):
+            return response
+        self._replace_body(response, len(body), compressed, encoding)
+        return response
+
+    def _apply_static(self, response, encoding: str):
+        """Troca o arquivo estático pela versão pré-comprimida"""
+        filename = (request.view_args or {}).get('filename')
+        blueprint = current_app.blueprints.get(request.blueprint) if request.blueprint else None
+        static_folder = (blueprint or current_app).static_folder
+        path = safe_join(static_folder, filename) if static_folder and filename else None
+        if path is None:
+            return
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        key = (path, encoding)
+        cached = self._static.get(key)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            compressed = cached[2]
+            self._metrics['static_hits'] += 1
+        else:
+            with open(path, 'rb') as f:
+                original = f.read()
+            level = STATIC_BROTLI_QUALITY if encoding == 'br' else STATIC_GZIP_LEVEL
+            compressed = compress(original, encoding, level)
+            if len(original) < self.min_size or len(compressed) >= len(original):
+                compressed = None
+            with self._static_lock:
+                self._static[key] = (stat.st_mtime_ns, stat.st_size, compressed)
+        if compressed is None:
+            return
+
+        if hasattr(response.response, 'close'):
+            response.response.close()
+        response.direct_passthrough = False
+        self._replace_body(response, stat.st_size, compressed, encoding)
+
+    def _replace_body(self, response, original_size: int, compressed: bytes, encoding: str):
+        response.set_data(compressed)
+        self._mark_encoded(response, encoding)
+        self._metrics['compressed'] += 1
+        self._metrics['bytes_in'] += original_size
+        self._metrics['bytes_out'] += len(compressed)
+
+    @staticmethod
+    def _mark_encoded(response, encoding: str):
+        response.headers['Content-Encoding'] = encoding
+        response.headers.pop('Accept-Ranges', None)
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+    def clear(self):
+        """Descarta os corpos e arquivos estáticos pré-comprimidos"""
+        self._bodies.clear()
+        with self._static_lock:
+            self._static.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna contadores de compressão, taxa média e uso do cache de corpos"""
+        metrics = dict(self._metrics)
+        return {
+            'enabled': self.enabled,
+            'encodings': list(self.encodings),
+            'min_size': self.min_size,
+            'levels': dict(self.levels),
+            'ratio': round(metrics['bytes_out'] / metrics['bytes_in'], 4) if metrics['bytes_in'] else 0,
+            'body_cache': self._bodies.stats(),
+            'static_files': sum(1 for entry in self._static.values() if entry[2] is not None),
+            **metrics
+        }
+
+
+def configure_compression(app) -> str:
+    """
+    Ativa a compressão de respostas no app
+
+    Returns:
+        Codificações disponíveis (ou 'desativada')
+    """
+    response_compressor.init_app(app)
+    if not response_compressor.enabled:
+        return 'desativada'
+    return ', '.join(response_compressor.encodings)
+
+
+# Instância global (COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL,
+# COMPRESSION_BROTLI_QUALITY e COMPRESSION_CACHE_MAX_MB)
+response_compressor = ResponseCompressor(
+    enabled=os.getenv('COMPRESSION_ENABLED', 'true').lower() not in ('0', 'false', 'no'),
+    min_size=int(os.getenv('COMPRESSION_MIN_SIZE', '500')),
+    gzip_level=int(os.getenv('COMPRESSION_GZIP_LEVEL', '6')),
+    brotli_quality=int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5')),
+    cache_max_bytes=int(float(os.getenv('COMPRESSION_CACHE_MAX_MB', '8')) * 1024 * 1024)
+)
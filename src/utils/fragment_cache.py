@@ -0,0 +1,130 @@
+"""
+Cache de Fragmentos Renderizados
+LRU limitado por quantidade e bytes para o HTML dos fragmentos do dashboard,
+com chave por nome do fragmento, filtros e versão do snapshot de dados
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from services.memory_cache import estimate_size, has_empty_type, memory_cache
+
+
+def _filters_key(filters: Optional[Dict[str, Any]]) -> Tuple:
+    """Filtros como tupla ordenada (a ordem dos parâmetros não muda a chave)"""
+    if not filters:
+        return ()
+    return tuple(sorted((name, str(value)) for name, value in filters.items()))
+
+
+class FragmentCache:
+    """
+    Cache LRU de fragmentos renderizados
+
+    O conteúdo de um fragmento depende apenas dos filtros e dos dados em
+    memória, então é o mesmo para todos os usuários enquanto a versão do
+    snapshot não muda. A versão entra na chave: quando os dados mudam, as
+    entradas antigas deixam de ser encontradas e são descartadas na próxima
+    gravação do mesmo fragmento.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple, Tuple[Any, int]]' = OrderedDict()
+        self._versions: Dict[str, str] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'misses': 0, 'evictions': 0, 'stale_drops': 0}
+
+    def get_or_render(self, name: str, data_types: Iterable[str],
+                      filters: Optional[Dict[str, Any]], render: Callable[[], Any],
+                      version: Optional[str] = None) -> Any:
+        """
+        Retorna o fragmento em cache ou o renderiza e armazena
+
+        A versão é lida antes da renderização (mesma regra do ETag): se os
+        dados mudarem durante o processamento, o resultado fica sob a versão
+        antiga e a próxima requisição simplesmente renderiza de novo.
+        Fragmentos renderizados enquanto algum tipo estava vazio (carga ainda
+        não feita ou que falhou) não são armazenados.
+
+        Args:
+            name: Nome do fragmento
+            data_types: Tipos de dados do cache em memória usados pelo fragmento
+            filters: Filtros que alteram o conteúdo
+            render: Função sem argumentos que produz o fragmento (não é alterado depois)
+            version: Versão lida pelo chamador antes de carregar os dados que
+                render usa (quando os dados não são carregados dentro de render)
+        """
+        if version is None:
+            version, _ = memory_cache.snapshot(data_types)
+        key = (name, version, _filters_key(filters))
+
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._metrics['hits'] += 1
+                return cached[0]
+            self._metrics['misses'] += 1
+
+        value = render()
+        if not has_empty_type(version):
+            self._store(name, version, key, value)
+        return value
+
+    def _store(self, name: str, version: str, key: Tuple, value: Any):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            # Uma versão nova do fragmento torna as anteriores inalcançáveis
+            if self._versions.get(name) != version:
+                self._versions[name] = version
+                for stale_key in [k for k in self._entries if k[0] == name and k[1] != version]:
+                    self._remove(stale_key)
+                    self._metrics['stale_drops'] += 1
+
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                self._metrics['evictions'] += 1
+
+    def _remove(self, key: Tuple):
+        _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def clear(self):
+        """Remove todos os fragmentos"""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Retorna tamanho, hits, misses e remoções do cache de fragmentos"""
+        with self._lock:
+            lookups = self._metrics['hits'] + self._metrics['misses']
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self._metrics['hits'] / lookups, 4) if lookups else 0,
+                **self._metrics
+            }
+
+
+# Instância global dos fragmentos do dashboard
+fragment_cache = FragmentCache(
+    max_entries=int(os.getenv('FRAGMENT_CACHE_MAX_ENTRIES', '256')),
+    max_bytes=int(float(os.getenv('FRAGMENT_CACHE_MAX_MB', '16')) * 1024 * 1024)
+)
@@ -0,0 +1,139 @@
+"""
+Cache HTTP Condicional
+ETag e Last-Modified derivados da versão do snapshot de dados, respondendo
+304 a requisições condicionais antes de qualquer processamento da rota
+"""
+
+import hashlib
+import os
+from datetime import date
+from functools import wraps
+from typing import Iterable, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import Response, make_response, request, session
+
+from services.memory_cache import memory_cache
+
+# Parâmetros que não alteram o conteúdo (cache-busters adicionados pelo front-end)
+IGNORED_QUERY_PARAMS = frozenset({'_', '_t', '_ts'})
+
+# O navegador guarda a resposta, mas sempre revalida com o servidor
+CACHE_CONTROL = 'private, no-cache'
+
+# Variáveis com o commit publicado, definidas pelas plataformas de deploy
+_BUILD_ENV_VARS = ('APP_VERSION', 'RAILWAY_GIT_COMMIT_SHA', 'RENDER_GIT_COMMIT', 'SOURCE_VERSION')
+_BUILD_DIRS = ('templates', 'static')
+
+
+def _build_version() -> str:
+    """
+    Versão da aplicação publicada
+
+    Usa o commit informado pela plataforma (ou APP_VERSION); sem ele,
+    resume nome, tamanho e data de modificação de templates e estáticos.
+    Um deploy novo altera os ETags mesmo sem mudança nos dados.
+    """
+    for name in _BUILD_ENV_VARS:
+        value = os.getenv(name)
+        if value:
+            return value
+
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha1()
+    for directory in _BUILD_DIRS:
+        for root, dirs, files in os.walk(os.path.join(base_dir, directory)):
+            dirs.sort()
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                digest.update(f"{os.path.relpath(path, base_dir)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+BUILD_VERSION = _build_version()
+
+
+def _normalized_query() -> str:
+    """Parâmetros da query ordenados (a ordem na URL não muda o ETag)"""
+    items = sorted(
+        (key, value)
+        for key, values in request.args.lists()
+        if key not in IGNORED_QUERY_PARAMS
+        for value in values
+    )
+    return urlencode(items)
+
+
+def snapshot_validators(data_types: Iterable[str]) -> Tuple[str, Optional[float]]:
+    """
+    Calcula (ETag, Last-Modified) da requisição atual
+
+    O ETag combina a versão da aplicação e a do snapshot dos tipos de dados
+    com a rota, os parâmetros normalizados, o usuário (páginas exibem seus dados) e o dia
+    (filtros padrão dependem da data atual); Last-Modified é None enquanto
+    nenhum dado desses tipos foi carregado.
+    """
+    version, changed_at = memory_cache.snapshot(data_types)
+    raw = f"{BUILD_VERSION}|{version}|{request.path}|{_normalized_query()}|{session.get('user_id', '')}|{date.today().isoformat()}"
+    etag = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    return etag, (changed_at or None)
+
+
+def _is_not_modified(etag: str, last_modified: Optional[float]) -> bool:
+    """If-None-Match tem precedência; If-Modified-Since só vale sem ele"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def _set_validators(response: Response, etag: str, last_modified: Optional[float]):
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = int(last_modified)
+    if 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = CACHE_CONTROL
+
+
+def snapshot_etag(*data_types: str):
+    """
+    Decorador de rotas GET baseadas nos dados do Omie
+
+    Se o cliente já possui a versão atual (If-None-Match / If-Modified-Since)
+    responde 304 sem executar a rota. Respostas 200 recebem os validadores
+    calculados antes da execução: se os dados mudarem durante o
+    processamento, a próxima requisição simplesmente não casa e recebe o
+    conteúdo completo. Enquanto algum tipo estiver vazio ou com entradas
+    expiradas a rota é executada sem validadores: uma resposta vazia ou de
+    falha não deve ser revalidada com 304 depois que os dados carregarem.
+
+    Args:
+        data_types: Tipos de dados do cache em memória usados pela rota
+            (nenhum para páginas que não exibem dados, como o shell de serviços)
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated_function(*args, **kwargs):
+            # Mensagens flash pendentes precisam ser renderizadas (e consumidas) pela rota
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return view(*args, **kwargs)
+            if data_types and not memory_cache.is_fresh(data_types):
+                return view(*args, **kwargs)
+
+            etag, last_modified = snapshot_validators(data_types)
+            if _is_not_modified(etag, last_modified):
+                response = Response(status=304)
+                _set_validators(response, etag, last_modified)
+                return response
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified)
+            return response
+        return decorated_function
+    return decorator
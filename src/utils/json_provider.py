@@ -0,0 +1,79 @@
+"""
+Provedor JSON do Flask
+jsonify e request.get_json usando o codec JSON rápido, e respostas montadas
+com trechos pré-serializados (codificados uma vez por versão do snapshot)
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+from services import json_codec
+from utils.fragment_cache import fragment_cache
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    DefaultJSONProvider com serialização pelo codec (orjson quando instalado)
+
+    Mantém o default do Flask (datas HTTP, UUID, Decimal, dataclasses). As
+    chaves não são ordenadas e a saída é UTF-8 compacta; com indentação
+    (modo debug) usa a implementação padrão.
+    """
+
+    sort_keys = False
+    ensure_ascii = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs.get('indent') is not None or 'cls' in kwargs:
+            return super().dumps(obj, **kwargs)
+        return json_codec.dumps(obj, default=kwargs.get('default', self.default),
+                                sort_keys=kwargs.get('sort_keys', self.sort_keys))
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return json_codec.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = json_codec.dumps_bytes(obj, default=self.default, sort_keys=self.sort_keys)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def preserialized(name: str, data_types: Iterable[str], build: Callable[[], Any],
+                  version: Optional[str] = None) -> bytes:
+    """
+    JSON de um payload imutável codificado uma vez por versão do snapshot
+
+    Usa o cache de fragmentos: enquanto os tipos de dados não mudam, as
+    requisições reaproveitam os mesmos bytes.
+
+    Args:
+        name: Nome do payload (ex.: 'client_mapping')
+        data_types: Tipos de dados do cache em memória de que o payload depende
+        build: Função sem argumentos que retorna o payload
+        version: Versão do snapshot lida ANTES de obter o payload, quando ele
+            já foi carregado fora de build (senão bytes antigos poderiam ficar
+            guardados sob uma versão mais nova)
+    """
+    return fragment_cache.get_or_render(f"json:{name}", data_types, None,
+                                        lambda: json_codec.dumps_bytes(build()), version=version)
+
+
+def json_response(payload: Dict[str, Any], raw_fields: Dict[str, bytes], status: int = 200) -> Response:
+    """
+    Resposta JSON com campos já serializados embutidos sem recodificação
+
+    Args:
+        payload: Campos pequenos (status, contagens, timestamp)
+        raw_fields: Campo -> bytes JSON pré-serializados (ex.: de preserialized)
+    """
+    parts = [json_codec.dumps_bytes(field) + b':' + raw for field, raw in raw_fields.items()]
+    envelope = json_codec.dumps_bytes(payload, default=DefaultJSONProvider.default)
+    if envelope != b'{}':
+        parts.append(envelope[1:-1])
+    return Response(b'{' + b','.join(parts) + b'}\n', status=status, mimetype='application/json')
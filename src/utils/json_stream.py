@@ -0,0 +1,127 @@
+"""
+Respostas JSON em streaming
+Escreve objetos JSON incrementalmente a partir de geradores, mantendo a
+memória limitada e permitindo ao cliente começar a processar antes do fim
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+from flask import Response, request, stream_with_context
+
+from services import json_codec
+
+# Itens serializados por bloco enviado (menos chamadas de escrita sem acumular a resposta)
+DEFAULT_BATCH_SIZE = 200
+
+
+def _dumps(value: Any) -> str:
+    return json_codec.dumps(value, default=str)
+
+
+class JsonArray:
+    """Array JSON escrito item a item a partir de um iterável"""
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+
+    def chunks(self, batch_size: int) -> Iterator[str]:
+        yield '['
+        batch, first = [], True
+        for item in self.items:
+            batch.append(_dumps(item))
+            if len(batch) >= batch_size:
+                yield ('' if first else ',') + ','.join(batch)
+                batch, first = [], False
+        if batch:
+            yield ('' if first else ',') + ','.join(batch)
+        yield ']'
+
+
+class JsonObject:
+    """Objeto JSON escrito par a par a partir de um iterável de (chave, valor)"""
+
+    def __init__(self, pairs: Iterable[Tuple[Any, Any]]):
+        self.pairs = pairs
+
+    def chunks(self, batch_size: int) -> Iterator[str]:
+        yield '{'
+        batch, first, seen = [], True, set()
+        for key, value in self.pairs:
+            # Chaves JSON são strings: códigos int e str equivalentes viram uma só chave
+            key = str(key)
+            if key in seen:
+                continue
+            seen.add(key)
+            batch.append(f"{_dumps(key)}:{_dumps(value)}")
+            if len(batch) >= batch_size:
+                yield ('' if first else ',') + ','.join(batch)
+                batch, first = [], False
+        if batch:
+            yield ('' if first else ',') + ','.join(batch)
+        yield '}'
+
+
+def iter_json(fields: Dict[str, Any], batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[str]:
+    """
+    Gera um objeto JSON campo a campo
+
+    Valores JsonArray/JsonObject são escritos incrementalmente; valores
+    chamáveis são avaliados apenas quando o campo é escrito (ex.: totais
+    contados durante a escrita de um array anterior).
+    """
+    yield '{'
+    for index, (name, value) in enumerate(fields.items()):
+        yield ('' if index == 0 else ',') + _dumps(name) + ':'
+        if isinstance(value, (JsonArray, JsonObject)):
+            yield from value.chunks(batch_size)
+        else:
+            yield _dumps(value() if callable(value) else value)
+    yield '}'
+
+
+def stream_json_response(fields: Dict[str, Any], status: int = 200,
+                         batch_size: int = DEFAULT_BATCH_SIZE) -> Response:
+    """Resposta application/json escrita em streaming"""
+    return Response(
+        stream_with_context(iter_json(fields, batch_size)),
+        status=status,
+        mimetype='application/json',
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+
+def wants_stream() -> bool:
+    """Verifica se o cliente pediu a resposta em streaming (?stream=1)"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+class Counter:
+    """Conta os itens de um iterável enquanto ele é consumido"""
+
+    def __init__(self, items: Iterable[Any]):
+        self.items = items
+        self.count = 0
+
+    def __iter__(self):
+        for item in self.items:
+            self.count += 1
+            yield item
+
+    def __call__(self) -> int:
+        return self.count
+
+
+def paginate_iter(items: Iterable[Any], page: int, per_page: int) -> Iterator[Any]:
+    """
+    Itera apenas a página solicitada (per_page <= 0 = todos os itens)
+
+    O iterável é consumido até o fim para que um Counter anterior conte o total.
+    """
+    if per_page <= 0:
+        yield from items
+        return
+    start = (page - 1) * per_page
+    end = start + per_page
+    for index, item in enumerate(items):
+        if start <= index < end:
+            yield item
@@ -0,0 +1,201 @@
+"""
+Armazenamento de Sessões
+Backends de sessão configuráveis: cookie assinado (sem estado no servidor),
+SQLite com expiração e limpeza periódica, ou o filesystem do Flask-Session
+"""
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from typing import Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSessionInterface, SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+# Tempo de vida padrão das sessões no servidor e dos cookies permanentes
+DEFAULT_SESSION_LIFETIME_HOURS = 12
+
+# Intervalo mínimo entre limpezas de sessões expiradas (em segundos)
+SWEEP_INTERVAL = 300
+
+# Valores de exemplo do código e da documentação (públicos, não são segredos)
+PLACEHOLDER_SECRET_KEYS = frozenset({'your-secret-key-here', 'sua-chave-secreta-aqui', 'sua-chave-secreta'})
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Sessão guardada no servidor; o cookie leva apenas o identificador assinado"""
+
+    def __init__(self, initial=None, sid: Optional[str] = None, new: bool = False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class SQLiteSessionInterface(SessionInterface):
+    """
+    Sessões em SQLite local (compartilhado entre workers do mesmo host)
+
+    A sessão só é gravada quando muda ou quando já passou metade do tempo de
+    vida (renovação da expiração); requisições comuns fazem apenas uma leitura
+    por chave primária. Sessões expiradas são removidas em lote, no máximo
+    uma vez por SWEEP_INTERVAL, mantendo o banco limitado.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, path: str, lifetime: timedelta, sweep_interval: float = SWEEP_INTERVAL):
+        self.path = path
+        self.lifetime = lifetime
+        self.sweep_interval = sweep_interval
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._sweep_lock = threading.Lock()
+        self._last_sweep = 0.0
+        self._connect().execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                sid TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        self._connect().execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at)')
+
+    def _connect(self) -> sqlite3.Connection:
+        """Uma conexão por thread (e por processo, após fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt='session-sid')
+
+    def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('ascii')
+            except BadSignature:
+                sid = None
+            if sid:
+                row = self._connect().execute(
+                    'SELECT data, expires_at FROM sessions WHERE sid = ?', (sid,)
+                ).fetchone()
+                if row and row[1] > time.time():
+                    session = ServerSideSession(self.serializer.loads(row[0]), sid=sid)
+                    session.expires_at = row[1]
+                    return session
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        self._maybe_sweep()
+
+        if not session:
+            if session.modified and not session.new:
+                self._connect().execute('DELETE FROM sessions WHERE sid = ?', (session.sid,))
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        expires_at = getattr(session, 'expires_at', 0.0)
+        renew = expires_at - now < self.lifetime.total_seconds() / 2
+        if not (session.modified or renew):
+            return
+
+        self._connect().execute(
+            'INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)',
+            (session.sid, self.serializer.dumps(dict(session)), now + self.lifetime.total_seconds())
+        )
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode('ascii'),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+    def _maybe_sweep(self):
+        """Remove sessões expiradas (no máximo uma vez por intervalo)"""
+        now = time.time()
+        if now - self._last_sweep < self.sweep_interval or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            removed = self._connect().execute('DELETE FROM sessions WHERE expires_at <= ?', (now,)).rowcount
+            if removed:
+                print(f"🧹 Sessões expiradas removidas: {removed}")
+        except Exception as e:
+            print(f"⚠️  Erro ao limpar sessões expiradas: {e}")
+        finally:
+            self._sweep_lock.release()
+
+
+def default_session_db_path() -> str:
+    """Caminho padrão do banco SQLite de sessões (src/cache_data/sessions.sqlite3)"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.getenv('SESSION_SQLITE_PATH', os.path.join(base_dir, 'cache_data', 'sessions.sqlite3'))
+
+
+def has_secure_secret_key(app) -> bool:
+    """Verifica se a SECRET_KEY foi definida e não é um dos valores de exemplo"""
+    return bool(app.secret_key) and app.secret_key not in PLACEHOLDER_SECRET_KEYS
+
+
+def configure_sessions(app, backend_name: Optional[str] = None) -> str:
+    """
+    Configura o backend de sessão definido em SESSION_BACKEND
+
+    - cookie (padrão): cookie assinado do próprio Flask, sem E/S por requisição;
+      a sessão guarda apenas o usuário logado e mensagens flash. Não é
+      revogável: o logout apaga o cookie do navegador, mas uma cópia capturada
+      continua válida até expirar (SESSION_LIFETIME_HOURS) ou até a SECRET_KEY
+      ser trocada. Sem uma SECRET_KEY real, qualquer um poderia assinar um
+      cookie com outro usuário, então o backend passa a ser sqlite
+    - sqlite: sessões no servidor, revogáveis, com expiração e limpeza periódica
+    - filesystem: Flask-Session em arquivos (comportamento anterior), limitado
+      por SESSION_FILE_THRESHOLD
+
+    Returns:
+        Nome do backend configurado
+    """
+    backend_name = (backend_name or os.getenv('SESSION_BACKEND', 'cookie')).strip().lower()
+    if backend_name == 'cookie' and not has_secure_secret_key(app):
+        print("⚠️  SECRET_KEY ausente ou de exemplo: sessões em cookie poderiam ser forjadas; usando sqlite")
+        backend_name = 'sqlite'
+    lifetime = timedelta(hours=float(os.getenv('SESSION_LIFETIME_HOURS', DEFAULT_SESSION_LIFETIME_HOURS)))
+    app.config['PERMANENT_SESSION_LIFETIME'] = lifetime
+    app.config['SESSION_PERMANENT'] = False
+    app.config.setdefault('SESSION_COOKIE_SAMESITE', 'Lax')
+
+    if backend_name == 'cookie':
+        app.session_interface = SecureCookieSessionInterface()
+    elif backend_name == 'sqlite':
+        app.session_interface = SQLiteSessionInterface(default_session_db_path(), lifetime)
+    elif backend_name == 'filesystem':
+        from flask_session import Session
+        app.config['SESSION_TYPE'] = 'filesystem'
+        app.config['SESSION_FILE_THRESHOLD'] = int(os.getenv('SESSION_FILE_THRESHOLD', '500'))
+        Session(app)
+    else:
+        raise ValueError(f"SESSION_BACKEND inválido: {backend_name}")
+
+    return backend_name
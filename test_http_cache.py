@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Testes do cache HTTP condicional (ETag / 304) das rotas (totalmente offline)
+
+Os carregamentos do OmieService são substituídos por dados em memória; cada
+teste altera os dados e confere que a requisição condicional com o ETag
+anterior recebe o conteúdo novo em vez de 304.
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+# Autenticação desabilitada (o .env não sobrescreve variáveis já definidas)
+os.environ['SUPABASE_URL'] = ''
+
+import app as app_module
+from services.memory_cache import memory_cache
+from utils import http_cache
+
+STATS_KEY = 'test:stats'
+
+
+def _omie():
+    return app_module.service_registry.omie_service
+
+
+def _install_stats(stats, ttl=None):
+    """Publica as estatísticas no cache em memória e no serviço"""
+    memory_cache.set(STATS_KEY, stats, 'stats', ttl=ttl)
+    _omie().get_clients_stats = lambda: stats
+
+
+def test_clients_change_is_not_answered_with_304():
+    clients = [{'codigo_cliente_omie': 1, 'razao_social': 'Cliente 1'}]
+    _omie().get_all_clients = lambda: list(clients)
+    client = app_module.app.test_client()
+
+    first = client.get('/api/clients')
+    assert first.status_code == 200
+    assert first.get_json()['total'] == 1
+    etag = first.headers.get('ETag', 'W/"anterior"')
+
+    clients.append({'codigo_cliente_omie': 2, 'razao_social': 'Cliente 2'})
+    second = client.get('/api/clients', headers={'If-None-Match': etag})
+    assert second.status_code == 200
+    assert second.get_json()['total'] == 2
+
+
+def test_stats_etag_follows_data():
+    _install_stats({'total_clients': 1})
+    client = app_module.app.test_client()
+
+    first = client.get('/api/stats')
+    assert first.status_code == 200 and first.headers.get('ETag')
+    assert client.get('/api/stats', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    _install_stats({'total_clients': 2})
+    second = client.get('/api/stats', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.get_json()['total_clients'] == 2
+    assert second.headers['ETag'] != first.headers['ETag']
+    memory_cache.delete(STATS_KEY)
+
+
+def test_no_validators_while_data_is_empty_or_expired():
+    memory_cache.delete(STATS_KEY)
+    _omie().get_clients_stats = lambda: {}
+    client = app_module.app.test_client()
+
+    empty = client.get('/api/stats')
+    assert empty.status_code == 200
+    assert 'ETag' not in empty.headers and 'Last-Modified' not in empty.headers
+    assert client.get('/api/stats', headers={'If-None-Match': '*'}).status_code == 200
+
+    _install_stats({'total_clients': 3}, ttl=0.05)
+    time.sleep(0.1)
+    expired = client.get('/api/stats')
+    assert expired.status_code == 200 and 'ETag' not in expired.headers
+    memory_cache.delete(STATS_KEY)
+
+
+def test_build_version_changes_shell_etag():
+    client = app_module.app.test_client()
+    original = http_cache.BUILD_VERSION
+    try:
+        first = client.get('/services')
+        assert first.status_code == 200 and first.headers.get('ETag')
+        assert client.get('/services', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+        http_cache.BUILD_VERSION = original + '-novo-deploy'
+        second = client.get('/services', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 200
+        assert second.headers['ETag'] != first.headers['ETag']
+    finally:
+        http_cache.BUILD_VERSION = original
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Testes do RedisCacheBackend contra um servidor RESP local (totalmente offline)
+
+O substituto implementa, em memória, apenas os comandos usados pelo backend
+(incluindo os scripts EVAL do próprio backend) e registra os comandos
+recebidos, para verificar o número de idas ao servidor.
+"""
+
+import fnmatch
+import os
+import socketserver
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.cache_backends import RedisCacheBackend, RespClient
+
+
+class MiniRedis:
+    """Estado do servidor substituto: strings, conjuntos, hashes e expirações"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+        self.commands = []
+
+    def _now_ms(self):
+        return int(time.time() * 1000)
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= self._now_ms():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def _get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def _set_expire(self, key, expires_ms):
+        self.expires[key] = int(expires_ms)
+        self._alive(key)
+
+    def _delete(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                del self.data[key]
+                removed += 1
+            self.expires.pop(key, None)
+        return removed
+
+    def execute(self, args):
+        command, args = args[0].upper(), args[1:]
+        self.commands.append(command)
+        handler = getattr(self, f'cmd_{command.lower()}', None)
+        if handler is None:
+            raise ValueError(f'ERR unknown command {command}')
+        return handler(*args)
+
+    def cmd_set(self, key, value, *options):
+        self.data[key] = value
+        self.expires.pop(key, None)
+        options = [option.upper() if i % 2 == 0 else option for i, option in enumerate(options)]
+        if 'PXAT' in options:
+            self._set_expire(key, options[options.index('PXAT') + 1])
+        return 'OK'
+
+    def cmd_get(self, key):
+        return self._get(key)
+
+    def cmd_mget(self, *keys):
+        return [self._get(key) if isinstance(self._get(key), str) else None for key in keys]
+
+    def cmd_del(self, *keys):
+        return self._delete(*keys)
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_pexpireat(self, key, expires_ms):
+        if not self._alive(key):
+            return 0
+        self._set_expire(key, expires_ms)
+        return 1
+
+    def cmd_pttl(self, key):
+        if not self._alive(key):
+            return -2
+        if key not in self.expires:
+            return -1
+        return self.expires[key] - self._now_ms()
+
+    def cmd_sadd(self, key, *members):
+        current = self._get(key) or set()
+        added = len(set(members) - current)
+        self.data[key] = current | set(members)
+        return added
+
+    def cmd_srem(self, key, *members):
+        current = self._get(key) or set()
+        removed = len(current & set(members))
+        current -= set(members)
+        if not current:
+            self._delete(key)
+        return removed
+
+    def cmd_smembers(self, key):
+        return sorted(self._get(key) or ())
+
+    def cmd_sunion(self, *keys):
+        return sorted(set().union(*(self._get(key) or set() for key in keys)))
+
+    def cmd_hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value
+        return 1
+
+    def cmd_hget(self, key, field):
+        return (self._get(key) or {}).get(field)
+
+    def cmd_hvals(self, key):
+        return list((self._get(key) or {}).values())
+
+    def cmd_scan(self, cursor, _match, pattern, _count, _size):
+        keys = [key for key in list(self.data) if self._alive(key) and fnmatch.fnmatchcase(key, pattern)]
+        return ['0', keys]
+
+    def cmd_eval(self, script, _numkeys, key, *argv):
+        if script == RedisCacheBackend._TAG_SCRIPT:
+            member, expires_ms = argv
+            self.cmd_sadd(key, member)
+            ttl = self.cmd_pttl(key)
+            if ttl < 0 or self._now_ms() + ttl < int(expires_ms):
+                self._set_expire(key, expires_ms)
+            return 1
+        if script == RedisCacheBackend._ACQUIRE_SCRIPT:
+            owner, ttl_ms = argv
+            if self._get(key) == owner:
+                return self.cmd_pexpireat(key, self._now_ms() + int(ttl_ms))
+            if self._get(key) is None:
+                self.cmd_set(key, owner, 'PXAT', self._now_ms() + int(ttl_ms))
+                return 1
+            return 0
+        if script == RedisCacheBackend._RELEASE_SCRIPT:
+            return self._delete(key) if self._get(key) == argv[0] else 0
+        raise ValueError('ERR unknown script')
+
+
+def _encode_reply(value) -> bytes:
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, Exception):
+        return f'-{value}\r\n'.encode()
+    if isinstance(value, int):
+        return f':{value}\r\n'.encode()
+    if isinstance(value, (list, tuple)):
+        return f'*{len(value)}\r\n'.encode() + b''.join(_encode_reply(item) for item in value)
+    data = str(value).encode('utf-8')
+    return f'${len(data)}\r\n'.encode() + data + b'\r\n'
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        state = self.server.state
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:-2])):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2].decode('utf-8'))
+            with state.lock:
+                try:
+                    reply = state.execute(args)
+                except Exception as e:
+                    reply = e
+            self.wfile.write(_encode_reply(reply))
+
+
+def start_server():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _RespHandler)
+    server.daemon_threads = True
+    server.state = MiniRedis()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _record(key, tags=(), data_type='clients', minutes=60):
+    return {
+        'cache_key': key,
+        'data': {'value': key},
+        'expires_at': (datetime.now() + timedelta(minutes=minutes)).isoformat(),
+        'data_type': data_type,
+        'compressed': False,
+        'updated_at': datetime.now().isoformat(),
+        'content_hash': f'hash-{key}',
+        'tags': list(tags)
+    }
+
+
+def _backend(server):
+    host, port = server.server_address
+    return RedisCacheBackend(client=RespClient(host, port))
+
+
+def test_roundtrip_and_meta():
+    server = start_server()
+    backend = _backend(server)
+    backend.upsert([_record('a', ['client:1']), _record('b')])
+
+    assert [r['cache_key'] for r in backend.fetch(['a', 'b', 'missing'])] == ['a', 'b']
+    meta = backend.fetch_meta(['a'])
+    assert meta == [{'cache_key': 'a', 'expires_at': meta[0]['expires_at'], 'updated_at': meta[0]['updated_at'],
+                     'content_hash': 'hash-a', 'data_type': 'clients'}]
+    assert backend.count_by_type() == {'clients': 2}
+    server.shutdown()
+
+
+def test_upsert_is_pipelined_with_pxat():
+    server = start_server()
+    backend = _backend(server)
+    records = [_record(f'k{i}', ['shared']) for i in range(20)]
+    state = server.state
+    state.commands.clear()
+
+    calls = []
+    client = backend.client
+    execute, pipeline = client.execute, client.pipeline
+    client.execute = lambda *args: calls.append('execute') or execute(*args)
+    client.pipeline = lambda commands: calls.append('pipeline') or pipeline(commands)
+    backend.upsert(records)
+
+    # Uma leitura dos metadados anteriores + um único pipeline de escrita
+    assert calls == ['execute', 'pipeline']
+    assert 'PEXPIREAT' not in state.commands
+    assert state.commands.count('SET') == 40
+    # Payload e metadados expiram no instante do registro
+    assert all(state.expires.get(f'financeiro:data:k{i}') for i in range(20))
+    assert all(state.expires.get(f'financeiro:meta:k{i}') for i in range(20))
+    server.shutdown()
+
+
+def test_tag_sets_expire_and_are_pruned():
+    server = start_server()
+    backend = _backend(server)
+    state = server.state
+    backend.upsert([_record('short', ['t'], minutes=1), _record('long', ['t'], minutes=120)])
+    tag_key = 'financeiro:tag:t'
+    # O índice expira junto com o registro mais longo
+    assert abs(state.expires[tag_key] - state.expires['financeiro:data:long']) < 5
+
+    # Remoção tira a chave do índice
+    assert backend.delete(['short']) == 1
+    assert state.cmd_smembers(tag_key) == ['long']
+
+    # Regravar sem a tag remove do índice
+    backend.upsert([_record('long', [])])
+    assert state.cmd_exists(tag_key) == 0
+
+    # Entradas órfãs (registro expirado) são podadas por delete_expired
+    backend.upsert([_record('gone', ['t2'])])
+    state._delete('financeiro:data:gone')
+    backend.delete_expired(datetime.now())
+    assert state.cmd_exists('financeiro:tag:t2') == 0
+    server.shutdown()
+
+
+def test_delete_by_tags_and_matching():
+    server = start_server()
+    backend = _backend(server)
+    backend.upsert([_record('client_1', ['c:1']), _record('client_2', ['c:2', 'all']),
+                    _record('order_1', ['all'], data_type='service_orders')])
+
+    assert backend.delete_by_tags(['c:1']) == 1
+    assert backend.fetch(['client_1']) == []
+    assert backend.delete_matching(data_type='service_orders') == 1
+    assert server.state.cmd_smembers('financeiro:tag:all') == ['client_2']
+    assert backend.delete_matching('client') == 1
+    assert backend.count_by_type() == {}
+    server.shutdown()
+
+
+def test_leases_and_sync_status():
+    server = start_server()
+    backend = _backend(server)
+    assert backend.try_acquire_lease('refresh', 'worker-1', 30)
+    assert not backend.try_acquire_lease('refresh', 'worker-2', 30)
+    assert backend.try_acquire_lease('refresh', 'worker-1', 30)
+    backend.release_lease('refresh', 'worker-1')
+    assert backend.try_acquire_lease('refresh', 'worker-2', 30)
+
+    backend.upsert_sync_status({'data_type': 'clients', 'last_sync': '2024-01-01T00:00:00'})
+    backend.upsert_sync_status({'data_type': 'orders', 'last_sync': '2024-02-01T00:00:00'})
+    assert [row['data_type'] for row in backend.list_sync_status()] == ['orders', 'clients']
+    assert backend.list_sync_status('clients')[0]['last_sync'] == '2024-01-01T00:00:00'
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Testes da paginação por cursor de /api/v2/services/paginated (totalmente offline)
+
+As ordens são geradas em memória e entregues por um OmieService com os
+carregamentos substituídos; cada caminhada por cursor é comparada com
+iter_filtered_orders na ordenação da API.
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+# Autenticação desabilitada (o .env não sobrescreve variáveis já definidas)
+os.environ['SUPABASE_URL'] = ''
+
+import app as app_module
+from services.memory_cache import memory_cache
+from services.order_index import InvalidCursor, decode_cursor, encode_cursor
+from services.service_filters import iter_filtered_orders, parse_order_date
+
+URL = '/api/v2/services/paginated'
+CLIENTS = {code: f'Cliente {code}' for code in range(37)}
+SELLERS = {code: f'Vendedor {code}' for code in range(5)}
+
+
+def _orders(count=3000, seed=1):
+    rng = random.Random(seed)
+    orders = []
+    for i in range(count):
+        date_str = '' if i % 50 == 0 else \
+            f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.choice([2023, 2024, 2025])}"
+        orders.append({
+            'Cabecalho': {'nCodOS': 1000 + i, 'cNumOS': str(i), 'dDtPrevisao': date_str,
+                          'nCodCli': i % 37, 'nCodVend': i % 5, 'cEtapa': '60'},
+            'ServicosPrestados': [{'cDescServ': rng.choice(['A', 'B', 'C'])}],
+            'Observacoes': {'cObsOS': f'obs x{i}'}
+        })
+    return orders
+
+
+def _install(orders):
+    """Publica as ordens no cache em memória (a versão do snapshot acompanha o conteúdo)"""
+    omie_service = app_module.service_registry.omie_service
+    memory_cache.set('test:service_orders', orders, 'service_orders')
+    omie_service.get_all_service_orders = lambda *args, **kwargs: orders
+    omie_service.get_client_name_mapping = lambda: CLIENTS
+    omie_service.get_seller_name_mapping = lambda: SELLERS
+
+
+def _expected(orders, **filters):
+    matched = list(iter_filtered_orders(orders, client_name_mapping=CLIENTS, seller_name_mapping=SELLERS, **filters))
+    matched.sort(key=lambda order: (parse_order_date(order['Cabecalho']['dDtPrevisao']), order['Cabecalho']['nCodOS']),
+                 reverse=True)
+    return [order['Cabecalho']['nCodOS'] for order in matched]
+
+
+def _walk(client, args, per_page=100):
+    codes, cursor, responses = [], None, []
+    while True:
+        query = dict(args, per_page=per_page, **({'cursor': cursor} if cursor else {}))
+        response = client.get(URL, query_string=query)
+        assert response.status_code == 200, response.data
+        data = response.get_json()['data']
+        responses.append(data['pagination'])
+        codes += [order['Cabecalho']['nCodOS'] for order in data['orders']]
+        cursor = data['pagination']['next_cursor']
+        if not cursor:
+            return codes, responses
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor((739000, 1234), 'service_orders=abc')
+    assert decode_cursor(cursor) == ((739000, 1234), 'service_orders=abc')
+    for bad in ('zz!', 'e30', encode_cursor((1, 2), 'v')[:-3], 'WzEsMl0'):
+        try:
+            decode_cursor(bad)
+        except InvalidCursor:
+            continue
+        raise AssertionError(f'cursor aceito: {bad}')
+
+
+def test_cursor_walk_matches_iter_filtered_orders():
+    orders = _orders()
+    _install(orders)
+    client = app_module.app.test_client()
+    cases = [
+        ({}, {}),
+        ({'year': '2024'}, {'year_filter': '2024'}),
+        ({'month': '03/2025'}, {'month_filter': '03/2025'}),
+        ({'week': '2024-02-05_2024-02-11', 'service': 'B'},
+         {'week_filter': '2024-02-05_2024-02-11', 'service_filter': 'B'}),
+        ({'search': 'cliente 3', 'year': '2023'}, {'search': 'cliente 3', 'year_filter': '2023'}),
+        ({'search': 'X12'}, {'search': 'X12'}),
+        ({'year': 'abc'}, {'year_filter': 'abc'}),
+        ({'week': 'bad', 'month': '01/2024'}, {'week_filter': 'bad', 'month_filter': '01/2024'}),
+    ]
+    for args, filters in cases:
+        codes, pages = _walk(client, args)
+        assert codes == _expected(orders, **filters), args
+        assert len(set(codes)) == len(codes)
+        # Com busca o total não é calculado; sem ela, bate com a caminhada
+        if 'search' in args:
+            assert pages[0]['total'] is None and pages[0]['total_pages'] is None
+        else:
+            assert pages[0]['total'] == len(codes)
+
+
+def test_page_mode_matches_cursor_mode():
+    orders = _orders()
+    _install(orders)
+    client = app_module.app.test_client()
+    expected = _expected(orders, year_filter='2024')
+    data = client.get(URL, query_string={'page': 3, 'per_page': 20, 'year': '2024'}).get_json()['data']
+    assert [order['Cabecalho']['nCodOS'] for order in data['orders']] == expected[40:60]
+    assert data['pagination']['total_pages'] == (len(expected) + 19) // 20
+    assert data['pagination']['has_prev'] is True
+
+
+def test_invalid_cursor_returns_400():
+    _install(_orders(200))
+    client = app_module.app.test_client()
+    for bad in ('zz!', 'e30', 'WzEsMl0'):
+        response = client.get(URL, query_string={'cursor': bad})
+        assert response.status_code == 400
+        assert response.get_json()['status'] == 'error'
+
+
+def test_cursor_survives_snapshot_change():
+    orders = _orders(500)
+    _install(orders)
+    client = app_module.app.test_client()
+    first = client.get(URL, query_string={'per_page': 50}).get_json()['data']['pagination']
+    assert first['snapshot_changed'] is False
+
+    # Novo snapshot com uma ordem a mais: o cursor antigo continua logo após a última ordem entregue
+    _install(orders + _orders(1, seed=2))
+    data = client.get(URL, query_string={'per_page': 50, 'cursor': first['next_cursor']}).get_json()['data']
+    assert data['pagination']['snapshot_changed'] is True
+    assert data['pagination']['snapshot_version'] != first['snapshot_version']
+    assert [order['Cabecalho']['nCodOS'] for order in data['orders']] == _expected(orders)[50:100]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_') and callable(test):
+            test()
+            print(f"✅ {name}")